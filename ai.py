@@ -0,0 +1,471 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+from board import Board, BOARD_SIZE, UNREACHABLE, row_goal
+from book import OpeningBook
+from entities import Action, Player, Position, Wall
+from tablebase import Tablebase, plies_to_end
+from transposition import EXACT, LOWER, UPPER, TranspositionTable
+import telemetry
+
+
+WIN_SCORE = 100_000
+DISTANCE_WEIGHT = 10
+WALL_WEIGHT = 3
+MAX_DEPTH = 64
+DEADLINE_MARGIN = 0.05  # fraction of the budget reserved for unwinding
+# Searches for games with more than two players: "paranoid" assumes every
+# opponent plays against the bot (alpha-beta applies); "maxn" lets each
+# player maximise its own score (no pruning, so it searches shallower).
+MULTIPLAYER_STRATEGIES = ("paranoid", "maxn")
+
+
+class _Timeout(Exception):
+    """Raised inside the search when the move's time budget runs out."""
+
+
+@dataclass
+class SearchStats:
+    depth: int = 0  # deepest fully completed iteration
+    nodes: int = 0
+    elapsed: float = 0.0  # seconds
+    score: int = 0
+    tt_hits: int = 0
+    tt_probes: int = 0
+    book: bool = False  # the move came from the opening book
+    tablebase: Optional[int] = None  # table value when the move came from the endgame tablebase
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        if self.book:
+            return "book move"
+        if self.tablebase is not None:
+            return tablebase_summary(self.tablebase)
+        return f"depth {self.depth}, {self.nodes} nodes, {self.nodes_per_second:.0f} nodes/s"
+
+
+def tablebase_summary(value: int) -> str:
+    if value == 0:
+        return "tablebase: draw"
+    return f"tablebase: {'wins' if value > 0 else 'loses'} in {plies_to_end(value)} plies"
+
+
+def _score_to_table(score: int, ply: int) -> int:
+    # Win scores are stored relative to the node so they stay valid at any ply
+    if score >= WIN_SCORE - MAX_DEPTH:
+        return score + ply
+    if score <= -WIN_SCORE + MAX_DEPTH:
+        return score - ply
+    return score
+
+
+def _score_from_table(score: int, ply: int) -> int:
+    if score >= WIN_SCORE - MAX_DEPTH:
+        return score - ply
+    if score <= -WIN_SCORE + MAX_DEPTH:
+        return score + ply
+    return score
+
+
+def greedy_action(board: Board, player_id: int) -> Action:
+    """Step along the shortest path; the fallback when there is no time to search.
+
+    A boxed-in pawn's only move is its own cell, so this passes.
+    """
+    moves = board.legal_pawn_moves(player_id)
+    best = min(moves, key=lambda t: board.distance_to_goal(player_id, t))
+    return Action.move(best)
+
+
+def make_action(board: Board, player_id: int, action: Action) -> Optional[Position]:
+    """Apply an already validated action; returns the pawn's previous square for moves."""
+    player = board.players[player_id]
+    if action.kind == "m":
+        previous = player.position
+        board.move_player(player_id, action.target)
+        return previous
+    board.add_wall(action.to_wall())
+    player.walls_remaining -= 1
+    return None
+
+
+def unmake_action(board: Board, player_id: int, action: Action, previous: Optional[Position]) -> None:
+    if action.kind == "m":
+        board.set_position(player_id, previous)
+    else:
+        board.remove_wall(action.to_wall())
+        board.players[player_id].walls_remaining += 1
+
+
+class AlphaBetaBot:
+    """Negamax alpha-beta searcher with iterative deepening and a per-move time budget.
+
+    Positions are scored from the side to move by the opponents' shortest-path
+    distance minus its own, plus a small bonus per wall in hand. Wall moves are
+    limited to grooves that cut the opponent's current shortest path. Games
+    with more players use the ``multiplayer`` strategy (paranoid or max^n)
+    under the same time budget.
+    """
+
+    kind = "bot"
+
+    def __init__(
+        self,
+        time_budget_ms: int = 1000,
+        max_depth: int = MAX_DEPTH,
+        table: Optional[TranspositionTable] = None,
+        book: Optional[OpeningBook] = None,
+        tablebase: Optional[Tablebase] = None,
+        multiplayer: str = "paranoid",
+    ) -> None:
+        if multiplayer not in MULTIPLAYER_STRATEGIES:
+            raise ValueError(f"unknown multiplayer strategy {multiplayer!r}")
+        self.time_budget_ms = time_budget_ms
+        self.book = book
+        self.tablebase = tablebase
+        self.multiplayer = multiplayer
+        self.max_depth = max_depth
+        # May be shared between bots; its size bounds the search's memory
+        self.table = table if table is not None else TranspositionTable()
+        self.last_stats = SearchStats()
+        self._deadline = 0.0
+        self._nodes = 0
+        self._history: Dict[Action, int] = {}
+        self._killers: List[List[Action]] = []
+
+    # --------- Public API ---------
+    def choose_action(self, board: Board, player_id: int) -> Action:
+        if self.book is not None:
+            action = self.book.move(board, player_id)
+            if action is not None:
+                self.last_stats = SearchStats(book=True)
+                return action
+        start = time.perf_counter()
+        # Keep a margin so unwinding the search still lands inside the budget
+        self._deadline = start + self.time_budget_ms * (1.0 - DEADLINE_MARGIN) / 1000.0
+        if self.tablebase is not None:
+            # A table that cannot be built within the budget is skipped: search instead
+            hit = self.tablebase.probe(board, player_id, self._deadline)
+            if hit is not None:
+                self.last_stats = SearchStats(tablebase=hit[1], elapsed=time.perf_counter() - start)
+                return hit[0]
+        self._nodes = 0
+        self._history.clear()
+        self._killers = [[] for _ in range(self.max_depth + 2)]
+        self.table.new_search()
+        probes, hits = self.table.stats.probes, self.table.stats.hits
+        stats = SearchStats()
+
+        best = greedy_action(board, player_id)
+        opponents = [pid for pid in board.players if pid != player_id]
+        if len(opponents) == 1:
+            opponent = opponents[0]
+            search_root = partial(self._search_root, board, player_id, opponent)
+        else:
+            # Turn order starting with the bot; the same for every iteration
+            order = sorted(board.players)
+            i = order.index(player_id)
+            order = order[i:] + order[:i]
+            if self.multiplayer == "paranoid":
+                search_root = partial(self._paranoid_root, board, order)
+            else:
+                search_root = partial(self._maxn_root, board, order)
+        try:
+            for depth in range(1, self.max_depth + 1):
+                score, action = search_root(depth, best)
+                best = action
+                stats.depth = depth
+                stats.score = score
+                if abs(score) >= WIN_SCORE - MAX_DEPTH:
+                    break
+                # The next iteration costs several times this one; stop early
+                # rather than start an iteration that cannot finish.
+                if (time.perf_counter() - start) * 3 > self.time_budget_ms / 1000.0:
+                    break
+        except _Timeout:
+            pass
+        stats.nodes = self._nodes
+        stats.elapsed = time.perf_counter() - start
+        stats.tt_probes = self.table.stats.probes - probes
+        stats.tt_hits = self.table.stats.hits - hits
+        self.last_stats = stats
+        if telemetry.ENABLED:
+            telemetry.get().record_span(
+                "search.choose_action",
+                int(stats.elapsed * 1e9),
+                {"depth": stats.depth, "nodes": stats.nodes, "tt_hits": stats.tt_hits},
+            )
+        return best
+
+    # --------- Search ---------
+    def _search_root(
+        self, board: Board, me: int, opponent: int, depth: int, pv: Action
+    ) -> Tuple[int, Action]:
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best_action = pv
+        for action in self._ordered_actions(board, me, opponent, 0, pv):
+            previous = make_action(board, me, action)
+            try:
+                if action.kind == "w" and not self._paths_open(board, me, opponent):
+                    continue
+                score = -self._negamax(board, opponent, me, depth - 1, -beta, -alpha, 1)
+            finally:
+                unmake_action(board, me, action, previous)
+            if score > alpha:
+                alpha, best_action = score, action
+        return alpha, best_action
+
+    def _negamax(
+        self, board: Board, me: int, opponent: int, depth: int, alpha: int, beta: int, ply: int
+    ) -> int:
+        self._nodes += 1
+        if time.perf_counter() > self._deadline:
+            raise _Timeout
+
+        # The opponent just moved; if it reached its goal the game is over
+        if board.at_goal(opponent):
+            return -WIN_SCORE + ply
+        if depth <= 0:
+            return self._evaluate(board, me, opponent)
+
+        key = board.position_key(me)
+        entry = self.table.probe(key)
+        tt_move = None
+        if entry is not None:
+            tt_move = entry.move
+            if entry.depth >= depth:
+                score = _score_from_table(entry.score, ply)
+                if entry.flag == EXACT:
+                    return score
+                if entry.flag == LOWER and score >= beta:
+                    return score
+                if entry.flag == UPPER and score <= alpha:
+                    return score
+
+        alpha_orig = alpha
+        best = -WIN_SCORE - 1
+        best_action: Optional[Action] = None
+        for action in self._ordered_actions(board, me, opponent, ply, tt_move):
+            previous = make_action(board, me, action)
+            try:
+                if action.kind == "w" and not self._paths_open(board, me, opponent):
+                    continue
+                score = -self._negamax(board, opponent, me, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                unmake_action(board, me, action, previous)
+            if score > best:
+                best, best_action = score, action
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self._history[action] = self._history.get(action, 0) + depth * depth
+                killers = self._killers[ply]
+                if action not in killers:
+                    killers.insert(0, action)
+                    del killers[2:]
+                break
+
+        if best <= alpha_orig:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.store(key, depth, _score_to_table(best, ply), flag, best_action)
+        return best
+
+    @staticmethod
+    def _paths_open(board: Board, me: int, opponent: int) -> bool:
+        # Wall candidates skip the connectivity check; the distance maps
+        # updated by make_action tell us whether the wall was legal.
+        return (
+            board.distance_to_goal(me) < UNREACHABLE
+            and board.distance_to_goal(opponent) < UNREACHABLE
+        )
+
+    def _evaluate(self, board: Board, me: int, opponent: int) -> int:
+        my_dist = board.distance_to_goal(me)
+        opp_dist = board.distance_to_goal(opponent)
+        walls = board.players[me].walls_remaining - board.players[opponent].walls_remaining
+        return DISTANCE_WEIGHT * (opp_dist - my_dist) + WALL_WEIGHT * walls
+
+    # --------- Multiplayer search ---------
+    # Neither search uses the transposition table: scores are relative to
+    # the bot at the root, while the table is shared with the other seats.
+    @staticmethod
+    def _all_paths_open(board: Board, order: List[int]) -> bool:
+        return all(board.distance_to_goal(pid) < UNREACHABLE for pid in order)
+
+    @staticmethod
+    def _leader(board: Board, me: int, order: List[int]) -> int:
+        """The opponent of ``me`` closest to its goal: the one worth walling."""
+        return min((pid for pid in order if pid != me), key=board.distance_to_goal)
+
+    def _multiplayer_actions(
+        self, board: Board, order: List[int], turn: int, ply: int, pv: Optional[Action]
+    ) -> List[Action]:
+        me = order[turn]
+        return self._ordered_actions(board, me, self._leader(board, me, order), ply, pv)
+
+    def _score_for(self, board: Board, me: int, order: List[int]) -> int:
+        """``_evaluate`` against the leading opponent."""
+        return self._evaluate(board, me, self._leader(board, me, order))
+
+    def _paranoid_root(self, board: Board, order: List[int], depth: int, pv: Action) -> Tuple[int, Action]:
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best_action = pv
+        for action in self._multiplayer_actions(board, order, 0, 0, pv):
+            previous = make_action(board, order[0], action)
+            try:
+                if action.kind == "w" and not self._all_paths_open(board, order):
+                    continue
+                score = self._paranoid(board, order, 1, depth - 1, alpha, beta, 1)
+            finally:
+                unmake_action(board, order[0], action, previous)
+            if score > alpha:
+                alpha, best_action = score, action
+        return alpha, best_action
+
+    def _paranoid(
+        self, board: Board, order: List[int], turn: int, depth: int, alpha: int, beta: int, ply: int
+    ) -> int:
+        """Minimax from the root player (``order[0]``) against a coalition of the others."""
+        self._nodes += 1
+        if time.perf_counter() > self._deadline:
+            raise _Timeout
+        mover = order[turn - 1]
+        if board.at_goal(mover):
+            return WIN_SCORE - ply if turn == 1 else -WIN_SCORE + ply
+        if depth <= 0:
+            return self._score_for(board, order[0], order)
+
+        me = order[turn]
+        maximizing = turn == 0
+        # Opponents of the root wall the root player, not each other
+        target = self._leader(board, me, order) if maximizing else order[0]
+        best: Optional[int] = None
+        for action in self._ordered_actions(board, me, target, ply, None):
+            previous = make_action(board, me, action)
+            try:
+                if action.kind == "w" and not self._all_paths_open(board, order):
+                    continue
+                score = self._paranoid(board, order, (turn + 1) % len(order), depth - 1, alpha, beta, ply + 1)
+            finally:
+                unmake_action(board, me, action, previous)
+            if maximizing:
+                best = score if best is None else max(best, score)
+                alpha = max(alpha, score)
+            else:
+                best = score if best is None else min(best, score)
+                beta = min(beta, score)
+            if alpha >= beta:
+                break
+        return best
+
+    def _maxn_root(self, board: Board, order: List[int], depth: int, pv: Action) -> Tuple[int, Action]:
+        best_action, best = pv, -WIN_SCORE - 1
+        for action in self._multiplayer_actions(board, order, 0, 0, pv):
+            previous = make_action(board, order[0], action)
+            try:
+                if action.kind == "w" and not self._all_paths_open(board, order):
+                    continue
+                score = self._maxn(board, order, 1, depth - 1, 1)[0]
+            finally:
+                unmake_action(board, order[0], action, previous)
+            if score > best:
+                best, best_action = score, action
+        return best, best_action
+
+    def _maxn(self, board: Board, order: List[int], turn: int, depth: int, ply: int) -> List[int]:
+        """Score of every player (indexed like ``order``); each mover maximises its own."""
+        self._nodes += 1
+        if time.perf_counter() > self._deadline:
+            raise _Timeout
+        mover = (turn - 1) % len(order)
+        if board.at_goal(order[mover]):
+            return [WIN_SCORE - ply if i == mover else -WIN_SCORE + ply for i in range(len(order))]
+        if depth <= 0:
+            return [self._score_for(board, pid, order) for pid in order]
+
+        me = order[turn]
+        best: Optional[List[int]] = None
+        for action in self._multiplayer_actions(board, order, turn, ply, None):
+            previous = make_action(board, me, action)
+            try:
+                if action.kind == "w" and not self._all_paths_open(board, order):
+                    continue
+                scores = self._maxn(board, order, (turn + 1) % len(order), depth - 1, ply + 1)
+            finally:
+                unmake_action(board, me, action, previous)
+            if best is None or scores[turn] > best[turn]:
+                best = scores
+        if best is None:
+            return [self._score_for(board, pid, order) for pid in order]
+        return best
+
+    # --------- Move ordering ---------
+    def _ordered_actions(
+        self, board: Board, me: int, opponent: int, ply: int, pv: Optional[Action]
+    ) -> List[Action]:
+        """PV move, then pawn moves closest to goal, then killer and history-ranked walls."""
+        moves = sorted(board.legal_pawn_moves(me), key=lambda t: board.distance_to_goal(me, t))
+        actions = [Action.move(t) for t in moves]
+
+        if board.players[me].walls_remaining > 0:
+            free_h, free_v = board.free_groove_masks()
+            path_h, path_v = board.path_grooves(opponent)
+            g = board.size - 1
+            walls: List[Action] = []
+            for horizontal, mask in ((True, path_h & free_h), (False, path_v & free_v)):
+                while mask:
+                    low = mask & -mask
+                    mask ^= low
+                    row, col = divmod(low.bit_length() - 1, g)
+                    walls.append(Action("w", row, col, horizontal))
+            killers = self._killers[ply] if ply < len(self._killers) else []
+            history = self._history
+            walls.sort(key=lambda a: (a not in killers, -history.get(a, 0)))
+            # Walls are tried after the best pawn step but before the rest
+            actions[1:1] = walls
+        if pv is not None and pv in actions:
+            actions.remove(pv)
+            actions.insert(0, pv)
+        return actions
+
+
+def _benchmark() -> None:
+    """Report search throughput on a few fixed positions."""
+    center = BOARD_SIZE // 2
+    scenarios = [
+        ("opening", []),
+        ("midgame", [Wall(6, 3, True), Wall(6, 5, True), Wall(2, 3, True), Wall(2, 5, True)]),
+        ("maze", [Wall(r, c, r % 2 == 0) for r, c in ((1, 1), (3, 5), (5, 2), (6, 6), (2, 7), (4, 0))]),
+    ]
+    for budget in (200, 1000):
+        for name, walls in scenarios:
+            players = [
+                Player(1, "P1", (BOARD_SIZE - 1, center), 10, row_goal(0)),
+                Player(2, "P2", (0, center), 10, row_goal(BOARD_SIZE - 1)),
+            ]
+            board = Board(players)
+            for w in walls:
+                board.place_wall(w)
+            bot = AlphaBetaBot(time_budget_ms=budget)
+            action = bot.choose_action(board, 1)
+            s = bot.last_stats
+            print(
+                f"{name:8} budget={budget:5}ms depth={s.depth:2} nodes={s.nodes:7} "
+                f"elapsed={s.elapsed * 1000:7.1f}ms nps={s.nodes_per_second:9.0f} "
+                f"tt={s.tt_hits}/{s.tt_probes} best={action}"
+            )
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -1,59 +1,79 @@
-import json
+import atexit
+import os
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Iterable, List
+
+from storage import CacheStats, GameResult, JsonBackend, LeaderboardRow
 
 
 DATA_DIR = Path(__file__).parent
 USERS_FILE = DATA_DIR / "users.json"
 LEADERBOARD_FILE = DATA_DIR / "leaderboard.json"
+DB_FILE = DATA_DIR / "quoridor.db"
+BACKEND_ENV = "QUORIDOR_STORAGE"  # "sqlite" (default) or "json"
 
 
-def _load_json(path: Path, default: Any) -> Any:
-    if not path.exists():
-        return default
-    try:
-        with path.open("r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, OSError):
-        return default
+def open_backend(kind: Optional[str] = None):
+    """Open the storage backend named by ``kind`` or the QUORIDOR_STORAGE variable.
 
+    The first time the SQLite database is created, existing JSON data is
+    migrated into it.
+    """
+    kind = (kind or os.environ.get(BACKEND_ENV) or "sqlite").lower()
+    if kind == "json":
+        return JsonBackend(USERS_FILE, LEADERBOARD_FILE)
+    if kind == "sqlite":
+        from sqlite_store import SqliteBackend, migrate_json
 
-def _save_json(path: Path, data: Any) -> None:
-    try:
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-    except OSError:
-        pass
+        fresh = not DB_FILE.exists()
+        backend = SqliteBackend(DB_FILE)
+        if fresh and (USERS_FILE.exists() or LEADERBOARD_FILE.exists()):
+            migrate_json(USERS_FILE, LEADERBOARD_FILE, backend)
+        return backend
+    raise ValueError(f"unknown storage backend '{kind}'")
 
 
 class AuthManager:
-    """Handles user registration, login and persistent storage."""
+    """Handles user registration, login and persistent storage.
 
-    def __init__(self) -> None:
-        self.users: Dict[str, Dict[str, Any]] = _load_json(USERS_FILE, {})
-        self.leaderboard: Dict[str, Dict[str, int]] = _load_json(LEADERBOARD_FILE, {})
+    Create one per process and share it (main, UI and the terminal client all
+    use the same instance) so every view reads the same cached data.
+    """
 
-    # --------- User management ---------
-    def _ensure_leaderboard_entry(self, username: str) -> None:
-        if username not in self.leaderboard:
-            self.leaderboard[username] = {"wins": 0, "games": 0}
-            _save_json(LEADERBOARD_FILE, self.leaderboard)
+    def __init__(self, backend=None) -> None:
+        self.backend = backend if backend is not None else open_backend()
+        atexit.register(self.backend.close)
+
+    # --------- Persistence ---------
+    @property
+    def cache_stats(self) -> CacheStats:
+        """Cache hits and reloads of the backend, to see how much I/O menus cause."""
+        return self.backend.cache_stats
+
+    def flush(self) -> None:
+        """Write any buffered changes to disk now."""
+        self.backend.flush()
 
+    def close(self) -> None:
+        """Flush buffered changes and release the backend."""
+        self.backend.close()
+
+    # --------- User management ---------
     def signup(self, ui) -> Optional[str]:
         ui.print_title("Sign Up")
         username = ui.prompt("Choose a username (blank to cancel): ").strip()
         if not username:
             return None
-        if username in self.users:
+        if self.backend.get_user(username) is not None:
             ui.print_message("Username already exists.", error=True)
             return None
         password = ui.prompt_password("Choose a password: ")
         if not password:
             ui.print_message("Password cannot be empty.", error=True)
             return None
-        self.users[username] = {"password": password}
-        _save_json(USERS_FILE, self.users)
-        self._ensure_leaderboard_entry(username)
+        if not self.register(username, password):
+            ui.print_message("Username already exists.", error=True)
+            return None
         ui.print_message(f"Account created for '{username}'.")
         return username
 
@@ -63,13 +83,27 @@ class AuthManager:
         if not username:
             return None
         password = ui.prompt_password("Password: ")
-        if username not in self.users or self.users[username].get("password") != password:
+        if not self.authenticate(username, password):
             ui.print_message("Invalid username or password.", error=True)
             return None
-        self._ensure_leaderboard_entry(username)
         ui.print_message(f"Welcome back, {username}!")
         return username
 
+    def register(self, username: str, password: str) -> bool:
+        """Create an account without prompting; False if the name is taken."""
+        if not self.backend.add_user(username, password):
+            return False
+        self.backend.ensure_player(username)
+        return True
+
+    def authenticate(self, username: str, password: str) -> bool:
+        """Check credentials without prompting."""
+        user = self.backend.get_user(username)
+        if user is None or user.get("password") != password:
+            return False
+        self.backend.ensure_player(username)
+        return True
+
     # --------- Leaderboard ---------
     def record_game_result(self, winner: Optional[str], players: Dict[int, str]) -> None:
         """Update leaderboard after a game.
@@ -77,17 +111,24 @@ class AuthManager:
         :param winner: username of winning player (or None for draw/abort)
         :param players: mapping seat index -> username
         """
-        for _, username in players.items():
-            if not username:
-                continue
-            self._ensure_leaderboard_entry(username)
-            self.leaderboard[username]["games"] += 1
-        if winner:
-            self._ensure_leaderboard_entry(winner)
-            self.leaderboard[winner]["wins"] += 1
-        _save_json(LEADERBOARD_FILE, self.leaderboard)
+        self.backend.record_results([(winner, players)])
 
-    def get_leaderboard(self) -> Dict[str, Dict[str, int]]:
-        return dict(self.leaderboard)
+    def record_game_results(self, results: Iterable[GameResult]) -> None:
+        """Record many finished games in one batch (one transaction on SQLite)."""
+        self.backend.record_results(results)
 
+    def top_players(self, limit: int, offset: int = 0) -> List[LeaderboardRow]:
+        """One page of the leaderboard, ordered by wins then username."""
+        return self.backend.top(limit, offset)
 
+    def player_count(self) -> int:
+        return self.backend.player_count()
+
+    def rank_of(self, username: str) -> Optional[int]:
+        """1-based leaderboard position of ``username``, or None if unranked."""
+        return self.backend.rank(username)
+
+    def get_leaderboard(self) -> Dict[str, Dict[str, int]]:
+        """Whole leaderboard as a dict; prefer ``top_players`` for display."""
+        rows = self.backend.top(self.backend.player_count())
+        return {row.username: {"wins": row.wins, "games": row.games} for row in rows}
@@ -0,0 +1,267 @@
+"""Vectorised distance-to-goal for many boards at once (requires NumPy).
+
+Usage::
+
+    python batchdist.py                          # NumPy vs scalar BFS, batches of 1..100k
+    python batchdist.py --sizes 1 1000 --repeat 5
+
+``Board`` keeps one incrementally repaired distance map per goal, which is
+ideal while one game is being searched but means every fresh position costs a
+Python BFS. Here N positions are packed into arrays (each board's wall grooves
+as two little-endian bitmasks) and every goal's distance map is computed for
+all of them together, one vectorised frontier layer per step::
+
+    batch = encode_boards(boards)
+    maps = distance_maps(batch)        # (N, goals, size, size), UNREACHABLE if cut off
+    dists = player_distances(batch)    # (N, players), in batch.player_ids order
+
+NumPy is optional: without it, importing this module still works and
+``HAVE_NUMPY`` is False; the functions raise ImportError when called.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from board import Board, UNREACHABLE
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+HAVE_NUMPY = np is not None
+
+DEFAULT_BATCH_SIZES = (1, 10, 100, 1_000, 10_000, 100_000)
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("batch distance evaluation needs NumPy (pip install numpy)")
+
+
+def _row_dtype(size: int) -> Any:
+    """Unsigned dtype holding one board row as a bitmask: uint16 up to 16x16, uint32 up to 32x32."""
+    if size <= 16:
+        return np.uint16
+    if size <= 32:
+        return np.uint32
+    raise ValueError("batched distances support boards up to 32x32")
+
+
+def groove_bytes(size: int) -> int:
+    """Bytes needed for one groove bitmask on a ``size`` x ``size`` board."""
+    g = size - 1
+    return (g * g + 7) // 8
+
+
+@dataclass
+class EncodedBatch:
+    """N positions sharing one board size and player layout.
+
+    ``grooves[i, 0]`` / ``grooves[i, 1]`` hold board i's ``h_grooves`` /
+    ``v_grooves`` as little-endian bytes (16 bytes per position on 9x9);
+    ``pawns[i, k]`` is the cell index of player ``player_ids[k]``'s pawn and
+    ``goals[k]`` that player's goal cell bitmask.
+    """
+
+    size: int
+    grooves: Any  # np.ndarray, uint8, (N, 2, groove_bytes(size))
+    pawns: Any  # np.ndarray, int32, (N, players)
+    player_ids: List[int]
+    goals: List[int]
+
+    def __len__(self) -> int:
+        return len(self.grooves)
+
+
+def encode_grooves(
+    size: int,
+    grooves: Sequence[Tuple[int, int]],
+    pawns: Sequence[Sequence[int]],
+    player_ids: Sequence[int],
+    goals: Sequence[int],
+) -> EncodedBatch:
+    """Build a batch from raw ``(h_grooves, v_grooves)`` masks and pawn cell indices."""
+    _require_numpy()
+    width = groove_bytes(size)
+    raw = b"".join(h.to_bytes(width, "little") + v.to_bytes(width, "little") for h, v in grooves)
+    packed = np.frombuffer(raw, dtype=np.uint8).reshape(len(grooves), 2, width)
+    cells = np.asarray(pawns, dtype=np.int32).reshape(len(grooves), len(player_ids))
+    return EncodedBatch(size, packed, cells, list(player_ids), list(goals))
+
+
+def encode_boards(boards: Sequence[Board]) -> EncodedBatch:
+    """Pack boards of one size and player layout; raises ValueError otherwise."""
+    if not boards:
+        raise ValueError("no boards to encode")
+    first = boards[0]
+    player_ids = sorted(first.players)
+    goals = [first.goal_masks[pid] for pid in player_ids]
+    for board in boards:
+        if board.size != first.size or sorted(board.players) != player_ids:
+            raise ValueError("every board in a batch needs the same size and players")
+    return encode_grooves(
+        first.size,
+        [(board.h_grooves, board.v_grooves) for board in boards],
+        [[board.cell_index(board.players[pid].position) for pid in player_ids] for board in boards],
+        player_ids,
+        goals,
+    )
+
+
+def _open_rows(batch: EncodedBatch) -> Tuple[Any, Any]:
+    """Open edges as one bitmask per board row (bit c = column c, see ``_row_dtype``).
+
+    ``open_down[i, r]`` marks columns whose cell in row r connects to row r+1;
+    ``open_right[i, r]`` columns whose cell connects to the cell on its right.
+    """
+    n, g = batch.size, batch.size - 1
+    row = _row_dtype(n)
+    bits = np.unpackbits(batch.grooves, axis=-1, bitorder="little")[..., : g * g]
+    bits = bits.reshape(len(batch), 2, g, g).astype(row)
+    weights = np.left_shift(row(1), np.arange(g, dtype=row))
+    h = (bits[:, 0] * weights).sum(axis=-1, dtype=row)  # (N, g) grooves per groove row
+    v = (bits[:, 1] * weights).sum(axis=-1, dtype=row)
+    # A horizontal wall at groove (r, c) cuts the down edges under (r, c) and
+    # (r, c+1); a vertical one the right edges of (r, c) and (r+1, c).
+    full = row((1 << n) - 1)
+    open_down = full & ~(h | (h << row(1)))
+    blocked_right = np.zeros((len(batch), n), dtype=row)
+    blocked_right[:, :-1] |= v
+    blocked_right[:, 1:] |= v
+    open_right = (full >> row(1)) & ~blocked_right
+    return open_down, open_right
+
+
+def _layers(batch: EncodedBatch, goals: List[int]) -> Iterator[Any]:
+    """Yield the (N, goals, n) row-packed set of cells reached, one BFS layer at a time.
+
+    Starts with the goal cells themselves; stops once no board gains a cell.
+    """
+    n = batch.size
+    row = _row_dtype(n)
+    open_down, open_right = _open_rows(batch)
+    open_down, open_right = open_down[:, None, :], open_right[:, None, :]
+    row_bits = [[(goal >> (r * n)) & ((1 << n) - 1) for r in range(n)] for goal in goals]
+    reached = np.broadcast_to(np.array(row_bits, dtype=row), (len(batch), len(goals), n)).copy()
+    frontier = reached.copy()
+    one = row(1)
+    while True:
+        yield reached
+        step = (frontier & open_right) << one
+        step |= (frontier >> one) & open_right
+        step[..., 1:] |= frontier[..., :-1] & open_down
+        step[..., :-1] |= frontier[..., 1:] & open_down
+        frontier = step & ~reached
+        if not frontier.any():
+            return
+        reached |= frontier
+
+
+def distance_maps(batch: EncodedBatch) -> Tuple[Any, List[int]]:
+    """Distance from every cell to each distinct goal, for every board.
+
+    Returns ``(maps, goals)``: an int32 array of shape (N, len(goals), n, n)
+    and the goal bitmasks its second axis follows.
+    """
+    _require_numpy()
+    n = batch.size
+    goals = list(dict.fromkeys(batch.goals))
+    # A cell's distance is the number of layers that had not reached it yet
+    dist = np.zeros((len(batch), len(goals), n, n), dtype=np.int32)
+    for reached in _layers(batch, goals):
+        cells = np.unpackbits(reached.view(np.uint8), axis=-1, bitorder="little")
+        cells = cells.reshape(len(batch), len(goals), n, reached.itemsize * 8)[..., :n]
+        dist += 1 - cells
+    dist[cells == 0] = UNREACHABLE
+    return dist, goals
+
+
+def player_distances(batch: EncodedBatch) -> Any:
+    """(N, players) int32 distance of each pawn to its goal, UNREACHABLE if cut off.
+
+    Only the pawn cells are tracked, so the search stops as soon as every
+    pawn has been reached instead of filling whole distance maps.
+    """
+    _require_numpy()
+    n = batch.size
+    goals = list(dict.fromkeys(batch.goals))
+    goal_index = np.array([goals.index(goal) for goal in batch.goals])[None, :]
+    boards = np.arange(len(batch))[:, None]
+    rows, cols = np.divmod(batch.pawns, n)
+    cols = cols.astype(_row_dtype(n))
+    dist = np.zeros(batch.pawns.shape, dtype=np.int32)
+    for reached in _layers(batch, goals):
+        hit = (reached[boards, goal_index, rows] >> cols) & 1
+        if hit.all():
+            return dist
+        dist += 1 - hit
+    dist[hit == 0] = UNREACHABLE
+    return dist
+
+
+def scalar_player_distances(boards: Sequence[Board]) -> List[List[int]]:
+    """Reference: one full Python BFS per board and goal, as ``Board`` does from scratch."""
+    result = []
+    for board in boards:
+        maps = {goal: board._goal_distances(goal) for goal in set(board.goal_masks.values())}
+        result.append([
+            maps[board.goal_masks[pid]][board.cell_index(board.players[pid].position)]
+            for pid in sorted(board.players)
+        ])
+    return result
+
+
+# --------- Benchmark ---------
+def _corpus(count: int, seed: int = 0) -> List[Board]:
+    from bench import CORPUS_SPECS, build_position
+
+    rng = random.Random(seed)
+    specs = [spec for spec in CORPUS_SPECS if spec[1] == 2]
+    return [
+        build_position(players, walls, moves, seed=rng.randrange(1 << 30)).board
+        for _, players, walls, moves in (specs[i % len(specs)] for i in range(count))
+    ]
+
+
+def _benchmark(sizes: Sequence[int], repeat: int, scalar_limit: int) -> None:
+    pool = _corpus(64)
+    print(f"{'batch':>8} {'scalar ms':>11} {'numpy ms':>10} {'speedup':>8} {'boards/s (numpy)':>17}")
+    for size in sizes:
+        boards = [pool[i % len(pool)] for i in range(size)]
+        # The scalar BFS is linear in the batch; time a slice and scale it up
+        sample = boards[: min(size, scalar_limit)]
+        t0 = time.perf_counter()
+        expected = scalar_player_distances(sample)
+        scalar_ms = (time.perf_counter() - t0) * 1000 * size / len(sample)
+        if not HAVE_NUMPY:
+            print(f"{size:>8} {scalar_ms:>11.2f} {'n/a':>10}")
+            continue
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            got = player_distances(encode_boards(boards))
+            best = min(best, time.perf_counter() - t0)
+        if got[: len(sample)].tolist() != expected:
+            raise AssertionError("batched distances disagree with the scalar BFS")
+        print(f"{size:>8} {scalar_ms:>11.2f} {best * 1000:>10.2f} {scalar_ms / (best * 1000):>7.1f}x {size / best:>17.0f}")
+    if not HAVE_NUMPY:
+        print("NumPy is not installed: only the scalar BFS was timed.", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark batched vs scalar distance-to-goal")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument("--repeat", type=int, default=3, help="NumPy timing rounds (best is reported)")
+    parser.add_argument("--scalar-limit", type=int, default=10_000, help="boards timed with the scalar BFS")
+    args = parser.parse_args(argv)
+    _benchmark(args.sizes, args.repeat, args.scalar_limit)
+
+
+if __name__ == "__main__":
+    main()
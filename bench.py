@@ -0,0 +1,472 @@
+"""Benchmark suite for Board / GameController hot paths.
+
+Usage::
+
+    python bench.py                              # run, print a table
+    python bench.py --out results.json           # also write machine-readable results
+    python bench.py --save-baseline base.json    # store a baseline
+    python bench.py --compare base.json          # flag regressions (exit code 1)
+    python bench.py --scaling 9 11 13 17         # per-ply latency and memory by board size
+
+Every micro benchmark runs over the same deterministic corpus of mid-game
+positions: sparse and wall-dense boards, in 2- and 4-player games.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import io
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ai import AlphaBetaBot
+from entities import Action, Player, Wall
+from game import GameController
+from renderer import BoardRenderer, RenderStats
+from selfplay import play_game
+from ui import PLAYER_COLORS, Theme
+
+
+Call = Callable[[], Any]
+
+# (label, players, walls to place, pawn moves to make)
+CORPUS_SPECS: List[Tuple[str, int, int, int]] = [
+    ("2p-sparse", 2, 4, 6),
+    ("2p-maze", 2, 18, 10),
+    ("4p-sparse", 4, 4, 8),
+    ("4p-maze", 4, 16, 12),
+]
+DEFAULT_THRESHOLD = 0.15  # relative slowdown that counts as a regression
+SCALING_SIZES = (9, 11, 13, 17)
+
+
+# --------- Corpus ---------
+def build_position(players: int, walls: int, moves: int, seed: int) -> GameController:
+    """Play random legal walls and pawn moves from the opening to reach a mid-game position."""
+    rng = random.Random(seed)
+    controller = GameController(players)
+    actions = ["w"] * walls + ["m"] * moves
+    rng.shuffle(actions)
+    for kind in actions:
+        p = controller.current_player()
+        board = controller.board
+        action: Optional[Action] = None
+        if kind == "w" and p.walls_remaining > 0:
+            candidates = list(board.legal_walls())
+            if candidates:
+                action = Action.wall(rng.choice(candidates))
+        if action is None:
+            action = Action.move(rng.choice(board.legal_pawn_moves(p.id)))
+        controller.play(action)
+    return controller
+
+
+def build_corpus(per_spec: int) -> List[Tuple[str, GameController]]:
+    corpus = []
+    for n, (label, players, walls, moves) in enumerate(CORPUS_SPECS):
+        for i in range(per_spec):
+            corpus.append((label, build_position(players, walls, moves, seed=n * 1000 + i)))
+    return corpus
+
+
+# --------- Workloads ---------
+def _neighbors_calls(corpus) -> List[Call]:
+    calls = []
+    for _, controller in corpus:
+        board = controller.board
+        calls.extend(partial(board.neighbors, (r, c)) for r in range(board.size) for c in range(board.size))
+    return calls
+
+
+def _is_blocked_calls(corpus) -> List[Call]:
+    calls = []
+    for _, controller in corpus:
+        board = controller.board
+        for r in range(board.size):
+            for c in range(board.size):
+                if r + 1 < board.size:
+                    calls.append(partial(board.is_blocked, (r, c), (r + 1, c)))
+                if c + 1 < board.size:
+                    calls.append(partial(board.is_blocked, (r, c), (r, c + 1)))
+    return calls
+
+
+def _can_move_calls(corpus) -> List[Call]:
+    calls = []
+    for _, controller in corpus:
+        board = controller.board
+        for pid, p in board.players.items():
+            r, c = p.position
+            for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1), (-2, 0), (2, 0), (0, -2), (0, 2), (1, 1)):
+                calls.append(partial(board.can_move, pid, (r + dr, c + dc)))
+    return calls
+
+
+def _legal_pawn_moves_calls(corpus) -> List[Call]:
+    return [
+        partial(controller.board.legal_pawn_moves, pid)
+        for _, controller in corpus
+        for pid in controller.board.players
+    ]
+
+
+def _can_place_wall_calls(corpus) -> List[Call]:
+    calls = []
+    for _, controller in corpus:
+        board = controller.board
+        g = board.size - 1
+        calls.extend(
+            partial(board.can_place_wall, Wall(r, c, h))
+            for r in range(g) for c in range(g) for h in (True, False)
+        )
+    return calls
+
+
+def _legal_walls_calls(corpus) -> List[Call]:
+    return [partial(lambda b: list(b.legal_walls()), controller.board) for _, controller in corpus]
+
+
+def _wall_make_unmake_calls(corpus) -> List[Call]:
+    """Place and take back one legal wall: the incremental distance-map update path."""
+    calls = []
+    for _, controller in corpus:
+        board = controller.board
+        for wall in list(board.legal_walls())[:16]:
+            def make_unmake(board=board, wall=wall) -> None:
+                board.place_wall(wall)
+                board.remove_wall(wall)
+            calls.append(make_unmake)
+    return calls
+
+
+def _undo_redo_calls(corpus) -> List[Call]:
+    """Take back and replay the last ply: the delta-log undo path."""
+    calls = []
+    for _, controller in corpus:
+        def undo_redo(controller=controller) -> None:
+            controller.undo()
+            controller.redo()
+        calls.extend([undo_redo] * max(1, len(controller.moves)))
+    return calls
+
+
+def _restore_calls(corpus) -> List[Call]:
+    """Load every position of each game's history into a copy (``_restore`` clears the move log)."""
+    calls = []
+    for _, controller in corpus:
+        copy = GameController(controller.mode, size=controller.size)
+        states = [copy._snapshot()]
+        for delta in controller.moves:
+            copy.replay(delta)
+            states.append(copy._snapshot())
+        calls.extend(partial(copy._restore, state) for state in states)
+    return calls
+
+
+def _render_calls(corpus, full: bool, stats: RenderStats) -> List[Call]:
+    """Draw each position, alternating with a copy where the side to move stepped one square."""
+    calls = []
+    for _, controller in corpus:
+        board = controller.board
+        renderer = BoardRenderer(Theme, PLAYER_COLORS, io.StringIO())
+        renderer.render(board, controller.players, controller.current_player())
+        renderer.stats = stats  # count from here so the first full frame is left out
+        current = controller.current_player()
+        moved = dict(controller.players)
+        moved[current.id] = Player(
+            current.id, current.name, board.legal_pawn_moves(current.id)[0], current.walls_remaining, current.goal
+        )
+
+        def draw(players, renderer=renderer, board=board, current=current) -> None:
+            if full:
+                renderer.invalidate()
+            renderer.out.seek(0)
+            renderer.out.truncate()
+            renderer.render(board, players, current)
+        calls.extend([partial(draw, controller.players), partial(draw, moved)])
+    return calls
+
+
+def _search_calls(corpus) -> List[Call]:
+    calls = []
+    for label, controller in corpus:
+        if not label.startswith("2p"):
+            continue
+        pid = controller.current_player().id
+
+        def search(board=controller.board, pid=pid) -> None:
+            # Fresh bot per call so transposition-table hits do not carry over
+            AlphaBetaBot(time_budget_ms=60_000, max_depth=2).choose_action(board, pid)
+        calls.append(search)
+    return calls
+
+
+def _game_calls(count: int) -> List[Call]:
+    specs = {1: "greedy", 2: "random"}
+    return [partial(play_game, i, specs, 2, 0, 400) for i in range(count)]
+
+
+# --------- Measurement ---------
+def measure(calls: List[Call], repeat: int, alloc_samples: int) -> Dict[str, Any]:
+    """Time every call individually; report throughput, latency percentiles and allocations."""
+    for call in calls[: min(len(calls), 50)]:
+        call()  # warm caches
+    samples: List[int] = []
+    best_round = 0
+    timer = time.perf_counter_ns
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = len(samples)
+            for call in calls:
+                t0 = timer()
+                call()
+                samples.append(timer() - t0)
+            round_ns = sum(samples[start:])
+            best_round = round_ns if not best_round else min(best_round, round_ns)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    # Allocation pass, separate so tracing overhead does not skew timings
+    peaks: List[int] = []
+    step = max(1, len(calls) // max(1, alloc_samples))
+    tracemalloc.start()
+    try:
+        for call in calls[::step][:alloc_samples]:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            call()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - base)
+    finally:
+        tracemalloc.stop()
+
+    samples.sort()
+    # Throughput from the fastest round (as timeit does): slower rounds
+    # measure interference from the rest of the machine, not the code.
+    best_s = best_round / 1e9
+    return {
+        "ops": len(samples),
+        "ops_per_sec": round(len(calls) / best_s, 1) if best_s else 0.0,
+        "p50_us": round(samples[len(samples) // 2] / 1000, 3),
+        "p99_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1000, 3),
+        "alloc_peak_bytes": int(statistics.mean(peaks)) if peaks else 0,
+    }
+
+
+def run_suite(quick: bool = False, only: Optional[List[str]] = None) -> Dict[str, Any]:
+    corpus = build_corpus(per_spec=2 if quick else 6)
+    repeat = 2 if quick else 5
+    render_stats = {"render.full_frame": RenderStats(), "render.diff_frame": RenderStats()}
+    workloads: Dict[str, Callable[[], List[Call]]] = {
+        "board.neighbors": lambda: _neighbors_calls(corpus),
+        "board.is_blocked": lambda: _is_blocked_calls(corpus),
+        "board.can_move": lambda: _can_move_calls(corpus),
+        "board.legal_pawn_moves": lambda: _legal_pawn_moves_calls(corpus),
+        "board.can_place_wall": lambda: _can_place_wall_calls(corpus),
+        "board.legal_walls": lambda: _legal_walls_calls(corpus),
+        "board.wall_make_unmake": lambda: _wall_make_unmake_calls(corpus),
+        "game.undo_redo": lambda: _undo_redo_calls(corpus),
+        "game._restore": lambda: _restore_calls(corpus),
+        "render.full_frame": lambda: _render_calls(corpus, True, render_stats["render.full_frame"]),
+        "render.diff_frame": lambda: _render_calls(corpus, False, render_stats["render.diff_frame"]),
+        "search.depth2": lambda: _search_calls(corpus),
+        "game.full_greedy_vs_random": lambda: _game_calls(10 if quick else 50),
+    }
+    results: Dict[str, Any] = {}
+    for name, build in workloads.items():
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        calls = build()
+        if not calls:
+            continue
+        heavy = name.startswith(("search.", "game.full"))
+        results[name] = measure(calls, 2 if heavy else repeat, alloc_samples=5 if heavy else 200)
+        if name in render_stats:
+            results[name]["bytes_per_frame"] = round(render_stats[name].bytes_per_frame, 1)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "timestamp": time.time(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+# --------- Board-size scaling ---------
+def _percentile(samples: List[int], q: float) -> float:
+    """``q`` quantile of nanosecond samples, in microseconds."""
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] / 1000 if samples else 0.0
+
+
+def measure_size(size: int, games: int = 3, seed: int = 0) -> Dict[str, Any]:
+    """Per-ply engine costs over random 2-player games on a ``size`` x ``size`` board.
+
+    Each ply is a wall (while any are left, half the time) or a pawn step
+    along the shortest path, so games run to a finish. Only engine work is
+    timed; picking the action is not.
+    """
+    rng = random.Random(seed)
+    timings: Dict[str, List[int]] = {"move": [], "wall": [], "undo_redo": [], "render": [], "legal_walls": []}
+    timer = time.perf_counter_ns
+    plies = 0
+    for _ in range(games):
+        controller = GameController(2, size=size)
+        board = controller.board
+        renderer = BoardRenderer(Theme, PLAYER_COLORS, io.StringIO())
+        renderer.render(board, controller.players, controller.current_player())
+        while not controller.is_terminal() and plies < games * size * size:
+            p = controller.current_player()
+            t0 = timer()
+            walls = list(board.legal_walls()) if p.walls_remaining > 0 else []
+            timings["legal_walls"].append(timer() - t0)
+            if walls and rng.random() < 0.5:
+                kind, action = "wall", Action.wall(rng.choice(walls))
+            else:
+                target = min(board.legal_pawn_moves(p.id), key=lambda t: board.distance_to_goal(p.id, t))
+                kind, action = "move", Action.move(target)
+            t0 = timer()
+            controller.play(action)
+            timings[kind].append(timer() - t0)
+            t0 = timer()
+            controller.undo()
+            controller.redo()
+            timings["undo_redo"].append(timer() - t0)
+            renderer.out.seek(0)
+            renderer.out.truncate()
+            t0 = timer()
+            renderer.render(board, controller.players, controller.current_player())
+            timings["render"].append(timer() - t0)
+            plies += 1
+
+    # Memory held by one fresh game: board bitmasks, distance maps, logs
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        controller = GameController(2, size=size)
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    result: Dict[str, Any] = {"size": size, "cells": size * size, "plies": plies, "game_bytes": held - base}
+    for name, samples in timings.items():
+        result[f"{name}_p50_us"] = round(_percentile(samples, 0.5), 2)
+        result[f"{name}_p99_us"] = round(_percentile(samples, 0.99), 2)
+    return result
+
+
+def run_scaling(sizes: List[int], games: int = 3) -> List[Dict[str, Any]]:
+    return [measure_size(size, games) for size in sizes]
+
+
+def _print_scaling(rows: List[Dict[str, Any]]) -> None:
+    columns = ("move", "wall", "undo_redo", "render", "legal_walls")
+    header = f"{'size':>5} {'cells':>6} " + " ".join(f"{c + ' p50':>15}" for c in columns) + f" {'game KiB':>9}"
+    print(header)
+    print("═" * len(header))
+    for row in rows:
+        cells = " ".join(f"{row[c + '_p50_us']:>13.1f}us" for c in columns)
+        print(f"{row['size']:>5} {row['cells']:>6} {cells} {row['game_bytes'] / 1024:>9.1f}")
+    if len(rows) > 1:
+        # Growth exponent against board area: 1.0 is linear, 2.0 quadratic
+        first, last = rows[0], rows[-1]
+        area = math.log(last["cells"] / first["cells"])
+        exponents = []
+        for c in columns + ("game_bytes",):
+            key = c if c == "game_bytes" else c + "_p50_us"
+            if first[key] > 0 and last[key] > 0:
+                exponents.append(f"{c} {math.log(last[key] / first[key]) / area:.2f}")
+        print(f"\nGrowth with area, {first['size']}x{first['size']} -> {last['size']}x{last['size']}: " + ", ".join(exponents))
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return a description of every benchmark that got slower than ``threshold`` allows."""
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        now = current["results"].get(name)
+        if now is None:
+            continue
+        # Require throughput and median latency to agree, so one noisy
+        # outlier burst on a shared machine does not flag a regression.
+        slower = now["ops_per_sec"] < base["ops_per_sec"] * (1 - threshold)
+        if slower and now["p50_us"] > base["p50_us"] * (1 + threshold):
+            regressions.append(
+                f"{name}: {now['ops_per_sec']:.0f} ops/s (p50 {now['p50_us']}us) vs baseline "
+                f"{base['ops_per_sec']:.0f} ops/s (p50 {base['p50_us']}us)"
+            )
+    return regressions
+
+
+def _print_table(report: Dict[str, Any]) -> None:
+    header = f"{'benchmark':28} {'ops':>8} {'ops/sec':>12} {'p50 us':>10} {'p99 us':>10} {'alloc B':>9}"
+    print(header)
+    print("═" * len(header))
+    for name, r in report["results"].items():
+        print(
+            f"{name:28} {r['ops']:>8} {r['ops_per_sec']:>12.1f} {r['p50_us']:>10.3f} "
+            f"{r['p99_us']:>10.3f} {r['alloc_peak_bytes']:>9}"
+        )
+    frames = {name: r["bytes_per_frame"] for name, r in report["results"].items() if "bytes_per_frame" in r}
+    if frames:
+        print()
+        for name, size in frames.items():
+            print(f"{name:28} {size:>8.0f} bytes/frame")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Quoridor engine benchmarks")
+    parser.add_argument("--quick", action="store_true", help="smaller corpus, two repetitions")
+    parser.add_argument("--only", nargs="*", help="benchmark name prefixes to run")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--save-baseline", help="write results JSON as a baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument(
+        "--scaling", type=int, nargs="*", metavar="SIZE",
+        help="instead of the suite, time per-ply costs and memory on these board sizes (default 9 11 13 17)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.scaling is not None:
+        rows = run_scaling(args.scaling or list(SCALING_SIZES), games=1 if args.quick else 3)
+        _print_scaling(rows)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump({"scaling": rows}, f, indent=2)
+        return 0
+
+    report = run_suite(quick=args.quick, only=args.only)
+    _print_table(report)
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,148 +1,694 @@
 from __future__ import annotations
 
+import heapq
 from collections import deque
-from typing import List, Tuple, Dict, Set
+from typing import FrozenSet, List, Dict, Iterable, Iterator, Optional, Tuple
 
 from entities import Player, Position, Wall
+from telemetry import traced
+from zobrist import ZobristKeys
 
 
 BOARD_SIZE = 9
+UNREACHABLE = 1 << 30  # distance-map value for cells cut off from the goal
+# Pawn step directions (up, down, left, right) and, for a jump in each
+# direction, the two side-step directions tried when it is blocked
+DIRECTIONS = (0, 1, 2, 3)
+SIDE_STEPS = ((2, 3), (2, 3), (0, 1), (0, 1))
+
+
+class Geometry:
+    """Static bitmasks for a square board of a given size.
+
+    Cells are numbered row-major (``index = row * size + col``) and each cell
+    owns one bit of a Python int. Wall grooves are numbered the same way on
+    the ``(size - 1) x (size - 1)`` groove grid.
+    """
+
+    _cache: Dict[int, "Geometry"] = {}
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.cells = size * size
+        self.full = (1 << self.cells) - 1
+        self.row_masks: List[int] = [((1 << size) - 1) << (r * size) for r in range(size)]
+        col = 0
+        for r in range(size):
+            col |= 1 << (r * size)
+        self.col_masks: List[int] = [col << c for c in range(size)]
+        self.first_row = self.row_masks[0]
+        self.last_row = self.row_masks[-1]
+        self.first_col = self.col_masks[0]
+        self.last_col = self.col_masks[-1]
+        # Groove grid and the grooves each wall would overlap or cross:
+        # conflicts_h[g] / conflicts_v[g] = (horizontal mask, vertical mask)
+        g = size - 1
+        self.groove_size = g
+        self.groove_full = (1 << (g * g)) - 1
+        self.conflicts_h: List[Tuple[int, int]] = []
+        self.conflicts_v: List[Tuple[int, int]] = []
+        for r in range(g):
+            for c in range(g):
+                bit = 1 << (r * g + c)
+                h_mask = v_mask = bit
+                if c > 0:
+                    h_mask |= bit >> 1
+                if c < g - 1:
+                    h_mask |= bit << 1
+                if r > 0:
+                    v_mask |= bit >> g
+                if r < g - 1:
+                    v_mask |= bit << g
+                self.conflicts_h.append((h_mask, bit))
+                self.conflicts_v.append((bit, v_mask))
+        # Corner points each wall runs through, as union-find nodes: the
+        # interior corner below-right of groove k is node k + 1 (the wall's
+        # midpoint), every point on the board edge is node 0.
+        # wall_points_h[g] / wall_points_v[g] = (end, middle, end)
+        self.wall_points_h: List[Tuple[int, int, int]] = []
+        self.wall_points_v: List[Tuple[int, int, int]] = []
+        for r in range(g):
+            for c in range(g):
+                k = r * g + c + 1
+                self.wall_points_h.append((k - 1 if c > 0 else 0, k, k + 1 if c < g - 1 else 0))
+                self.wall_points_v.append((k - g if r > 0 else 0, k, k + g if r < g - 1 else 0))
+        # Pawn move tables: steps[i][d] is the cell one step from i in
+        # direction d (see DIRECTIONS), -1 off the board
+        self.positions: List[Position] = [divmod(i, size) for i in range(self.cells)]
+        self.steps: List[Tuple[int, int, int, int]] = [
+            (
+                i - size if i >= size else -1,
+                i + size if i < self.cells - size else -1,
+                i - 1 if i % size else -1,
+                i + 1 if i % size < size - 1 else -1,
+            )
+            for i in range(self.cells)
+        ]
+
+    @classmethod
+    def for_size(cls, size: int) -> "Geometry":
+        geo = cls._cache.get(size)
+        if geo is None:
+            geo = cls._cache[size] = cls(size)
+        return geo
+
+    def cells_mask(self, cells: Iterable[Position]) -> int:
+        mask = 0
+        for r, c in cells:
+            if 0 <= r < self.size and 0 <= c < self.size:
+                mask |= 1 << (r * self.size + c)
+        return mask
+
+
+def row_goal(row: int, size: int = BOARD_SIZE) -> FrozenSet[Position]:
+    """Goal cells of a player racing to ``row``."""
+    return frozenset((row, c) for c in range(size))
+
+
+def col_goal(col: int, size: int = BOARD_SIZE) -> FrozenSet[Position]:
+    """Goal cells of a player racing to ``col`` (side starts in 4-player games)."""
+    return frozenset((r, col) for r in range(size))
 
 
 class Board:
-    """Represents the 9x9 grid, players and walls, and validates moves."""
+    """Represents a size x size grid (9x9 by default), players and walls, and validates moves.
+
+    Walls, pawns and goals are kept as integer bitmasks so that neighbour
+    expansion and path searches work on whole frontiers at once instead of
+    allocating tuples per cell.
+    """
 
-    def __init__(self, players: List[Player]) -> None:
+    def __init__(self, players: List[Player], size: int = BOARD_SIZE) -> None:
+        self.size = size
+        self.geometry = Geometry.for_size(size)
         self.players: Dict[int, Player] = {p.id: p for p in players}
-        # Walls are represented as set of blocked edges between cells
-        self.blocked_edges: Set[Tuple[Position, Position]] = set()
         self.walls: List[Wall] = []
+        # Occupied wall grooves, one bit per groove origin (row * (size - 1) + col)
+        self.h_grooves = 0
+        self.v_grooves = 0
+        # Blocked edges: bit i of blocked_down means cell i and the cell below
+        # are separated; blocked_right likewise for the cell to the right.
+        self.blocked_down = 0
+        self.blocked_right = 0
+        self._refresh_open_masks()
+        self.occupied = 0
+        self._sync_occupancy()
+        # Zobrist hash of pawn squares and wall grooves, updated incrementally
+        self.zobrist = ZobristKeys.for_size(size)
+        self.hash = self._pawn_hash()
+        # Goal cells as bitmasks; every goal test and distance search runs
+        # against these, so any cell set works as a goal
+        self.goal_masks: Dict[int, int] = {
+            p.id: self.geometry.cells_mask(p.goal) for p in players
+        }
+        # Distance-to-goal maps, shared by players with the same goal and kept
+        # up to date incrementally as walls come and go.
+        self._distances: Dict[int, List[int]] = {}
+        self._rebuild_distances()
+
+    def copy(self) -> "Board":
+        """Independent board with the same pawns, walls in hand and placed walls."""
+        players = [Player(p.id, p.name, p.position, p.walls_remaining, p.goal) for p in self.players.values()]
+        board = Board(players, self.size)
+        for w in self.walls:
+            board.add_wall(Wall(w.row, w.col, w.horizontal))
+        return board
 
     # --------- Helpers ---------
-    @staticmethod
-    def in_bounds(pos: Position) -> bool:
+    def in_bounds(self, pos: Position) -> bool:
         r, c = pos
-        return 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE
+        return 0 <= r < self.size and 0 <= c < self.size
+
+    def cell_index(self, pos: Position) -> int:
+        return pos[0] * self.size + pos[1]
+
+    def cell_position(self, index: int) -> Position:
+        return divmod(index, self.size)
+
+    def cell_bit(self, pos: Position) -> int:
+        return 1 << (pos[0] * self.size + pos[1])
+
+    def groove_index(self, wall: Wall) -> int:
+        return wall.row * (self.size - 1) + wall.col
+
+    def _sync_occupancy(self) -> None:
+        occupied = 0
+        for p in self.players.values():
+            occupied |= self.cell_bit(p.position)
+        self.occupied = occupied
+
+    def at_goal(self, player_id: int) -> bool:
+        """True once the player's pawn stands on one of its goal cells."""
+        return bool(self.goal_masks[player_id] & self.cell_bit(self.players[player_id].position))
+
+    def set_position(self, player_id: int, pos: Position) -> None:
+        """Place a pawn without rule checks (used by undo and state loading)."""
+        player = self.players[player_id]
+        keys = self.zobrist.pawn[player_id]
+        self.hash ^= keys[self.cell_index(player.position)] ^ keys[self.cell_index(pos)]
+        player.position = pos
+        self._sync_occupancy()
+
+    def _pawn_hash(self) -> int:
+        h = 0
+        for p in self.players.values():
+            h ^= self.zobrist.pawn[p.id][self.cell_index(p.position)]
+        return h
+
+    def position_key(self, side_to_move: int) -> int:
+        """Zobrist key of the full position: pawns, walls, walls in hand and side to move."""
+        keys = self.zobrist
+        h = self.hash ^ keys.side[side_to_move]
+        for p in self.players.values():
+            h ^= keys.walls_left[p.id][p.walls_remaining]
+        return h
 
     def is_occupied(self, pos: Position) -> bool:
-        return any(p.position == pos for p in self.players.values())
+        return bool(self.occupied >> (pos[0] * self.size + pos[1]) & 1)
+
+    def _refresh_open_masks(self) -> None:
+        geo = self.geometry
+        n = self.size
+        self.open_down = geo.full & ~geo.last_row & ~self.blocked_down
+        self.open_up = self.open_down << n
+        self.open_right = geo.full & ~geo.last_col & ~self.blocked_right
+        self.open_left = self.open_right << 1
+
+    def expand(self, frontier: int) -> int:
+        """Return every cell one unblocked step away from any cell in ``frontier``."""
+        n = self.size
+        return (
+            ((frontier & self.open_down) << n)
+            | ((frontier & self.open_up) >> n)
+            | ((frontier & self.open_right) << 1)
+            | ((frontier & self.open_left) >> 1)
+        )
 
     def neighbors(self, pos: Position) -> List[Position]:
         r, c = pos
-        candidates = [(r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)]
+        i = r * self.size + c
         results: List[Position] = []
-        for nr, nc in candidates:
-            npos = (nr, nc)
-            if self.in_bounds(npos) and not self.is_blocked(pos, npos):
-                results.append(npos)
+        if self.open_up >> i & 1:
+            results.append((r - 1, c))
+        if self.open_down >> i & 1:
+            results.append((r + 1, c))
+        if self.open_left >> i & 1:
+            results.append((r, c - 1))
+        if self.open_right >> i & 1:
+            results.append((r, c + 1))
         return results
 
     def is_blocked(self, a: Position, b: Position) -> bool:
-        return (a, b) in self.blocked_edges or (b, a) in self.blocked_edges
+        (ar, ac), (br, bc) = a, b
+        if not (self.in_bounds(a) and self.in_bounds(b)):
+            return False
+        if ac == bc and abs(ar - br) == 1:
+            top = min(ar, br)
+            return bool(self.blocked_down >> (top * self.size + ac) & 1)
+        if ar == br and abs(ac - bc) == 1:
+            left = min(ac, bc)
+            return bool(self.blocked_right >> (ar * self.size + left) & 1)
+        return False
 
     # --------- Movement ---------
-    def can_move(self, player_id: int, target: Position) -> bool:
-        player = self.players[player_id]
-        r, c = player.position
-        tr, tc = target
+    def legal_pawn_cells(self, player_id: int) -> List[int]:
+        """Cell indices the player's pawn may move to, jumps included.
 
-        if not self.in_bounds(target):
-            return False
+        A pawn steps to a free neighbouring cell. Facing an adjacent pawn it
+        jumps straight over it; if the cell behind that pawn is walled off,
+        off the board or occupied, it may instead step diagonally to either
+        side of it (the official side-step jump). A pawn boxed in by other
+        pawns and walls has no such cell; its only move is then its own cell,
+        which passes the turn (the player may still place a wall instead).
+        """
+        steps = self.geometry.steps
+        opens = (self.open_up, self.open_down, self.open_left, self.open_right)
+        occupied = self.occupied
+        i = self.cell_index(self.players[player_id].position)
+        cells: List[int] = []
+        side_steps = 0  # two adjacent pawns can offer the same diagonal cell
+        for d in DIRECTIONS:
+            if not opens[d] >> i & 1:
+                continue
+            j = steps[i][d]
+            if not occupied >> j & 1:
+                cells.append(j)
+                continue
+            # Pawn on j: straight jump, else side-steps around it
+            if opens[d] >> j & 1 and not occupied >> steps[j][d] & 1:
+                cells.append(steps[j][d])
+                continue
+            for side in SIDE_STEPS[d]:
+                k = steps[j][side]
+                if opens[side] >> j & 1 and not (occupied | side_steps) >> k & 1:
+                    side_steps |= 1 << k
+                    cells.append(k)
+        return cells or [i]
 
-        # Adjacent move
-        dr, dc = tr - r, tc - c
-        if abs(dr) + abs(dc) == 1:
-            return not self.is_blocked(player.position, target) and not self.is_occupied(target)
-
-        # Jump over opponent
-        if abs(dr) + abs(dc) == 2 and (abs(dr) == 2 or abs(dc) == 2):
-            mid = (r + dr // 2, c + dc // 2)
-            if not self.in_bounds(mid):
-                return False
-            if not self.is_occupied(mid):
-                return False
-            if self.is_blocked(player.position, mid) or self.is_blocked(mid, target):
-                return False
-            return True
+    def legal_pawn_moves(self, player_id: int) -> List[Position]:
+        """Every legal destination of the player's pawn (see ``legal_pawn_cells``)."""
+        positions = self.geometry.positions
+        return [positions[j] for j in self.legal_pawn_cells(player_id)]
 
-        return False
+    def can_move(self, player_id: int, target: Position) -> bool:
+        if not self.in_bounds(target):
+            return False
+        return self.cell_index(target) in self.legal_pawn_cells(player_id)
 
+    @traced("board.move_player")
     def move_player(self, player_id: int, target: Position) -> bool:
         if not self.can_move(player_id, target):
             return False
-        self.players[player_id].position = target
+        player = self.players[player_id]
+        old, new = self.cell_index(player.position), self.cell_index(target)
+        self.occupied ^= (1 << old) ^ (1 << new)  # a pass leaves it set
+        keys = self.zobrist.pawn[player_id]
+        self.hash ^= keys[old] ^ keys[new]
+        player.position = target
         return True
 
     # --------- Walls ---------
-    def _add_wall_edges(self, wall: Wall) -> None:
-        r, c = wall.row, wall.col
+    def _wall_edges(self, wall: Wall) -> Tuple[int, int]:
+        """Return the (blocked_down, blocked_right) bits a wall adds."""
+        i = wall.row * self.size + wall.col
         if wall.horizontal:
             # Block between (r, c)-(r+1, c) and (r, c+1)-(r+1, c+1)
-            a1, b1 = (r, c), (r + 1, c)
-            a2, b2 = (r, c + 1), (r + 1, c + 1)
+            return (1 << i) | (1 << (i + 1)), 0
+        # Vertical: block (r, c)-(r, c+1) and (r+1, c)-(r+1, c+1)
+        return 0, (1 << i) | (1 << (i + self.size))
+
+    def _has_groove(self, horizontal: bool, row: int, col: int) -> bool:
+        g = self.size - 1
+        if not (0 <= row < g and 0 <= col < g):
+            return False
+        grooves = self.h_grooves if horizontal else self.v_grooves
+        return bool(grooves >> (row * g + col) & 1)
+
+    def _edge_cells(self, down: int, right: int) -> List[Tuple[int, int]]:
+        """Expand blocked_down/blocked_right bits into (cell, cell) index pairs."""
+        pairs: List[Tuple[int, int]] = []
+        while down:
+            low = down & -down
+            i = low.bit_length() - 1
+            pairs.append((i, i + self.size))
+            down ^= low
+        while right:
+            low = right & -right
+            i = low.bit_length() - 1
+            pairs.append((i, i + 1))
+            right ^= low
+        return pairs
+
+    def _add_wall_edges(self, wall: Wall) -> None:
+        down, right = self._wall_edges(wall)
+        g = self.groove_index(wall)
+        bit = 1 << g
+        if wall.horizontal:
+            if not self.h_grooves & bit:
+                self.hash ^= self.zobrist.h_groove[g]
+            self.h_grooves |= bit
         else:
-            # Vertical: block (r, c)-(r, c+1) and (r+1, c)-(r+1, c+1)
-            a1, b1 = (r, c), (r, c + 1)
-            a2, b2 = (r + 1, c), (r + 1, c + 1)
-        self.blocked_edges.update({(a1, b1), (b1, a1), (a2, b2), (b2, a2)})
+            if not self.v_grooves & bit:
+                self.hash ^= self.zobrist.v_groove[g]
+            self.v_grooves |= bit
+        cut = self._edge_cells(down & ~self.blocked_down, right & ~self.blocked_right)
+        self.blocked_down |= down
+        self.blocked_right |= right
+        self._refresh_open_masks()
+        for dist in self._distances.values():
+            self._raise_distances(dist, cut)
 
     def _remove_wall_edges(self, wall: Wall) -> None:
         r, c = wall.row, wall.col
+        i = r * self.size + c
+        g = self.groove_index(wall)
+        bit = 1 << g
+        down = right = 0
+        if (self.h_grooves if wall.horizontal else self.v_grooves) & bit:
+            keys = self.zobrist.h_groove if wall.horizontal else self.zobrist.v_groove
+            self.hash ^= keys[g]
+        # An edge stays blocked while an overlapping wall still covers it
         if wall.horizontal:
-            a1, b1 = (r, c), (r + 1, c)
-            a2, b2 = (r, c + 1), (r + 1, c + 1)
+            self.h_grooves &= ~bit
+            if not self._has_groove(True, r, c - 1):
+                down |= 1 << i
+            if not self._has_groove(True, r, c + 1):
+                down |= 1 << (i + 1)
         else:
-            a1, b1 = (r, c), (r, c + 1)
-            a2, b2 = (r + 1, c), (r + 1, c + 1)
-        for edge in ((a1, b1), (b1, a1), (a2, b2), (b2, a2)):
-            self.blocked_edges.discard(edge)
+            self.v_grooves &= ~bit
+            if not self._has_groove(False, r - 1, c):
+                right |= 1 << i
+            if not self._has_groove(False, r + 1, c):
+                right |= 1 << (i + self.size)
+        self.blocked_down &= ~down
+        self.blocked_right &= ~right
+        self._refresh_open_masks()
+        reopened = self._edge_cells(down, right)
+        for dist in self._distances.values():
+            self._lower_distances(dist, reopened)
+
+    def clear_walls(self) -> None:
+        self.walls = []
+        self.h_grooves = self.v_grooves = 0
+        self.blocked_down = self.blocked_right = 0
+        self._refresh_open_masks()
+        self._rebuild_distances()
+        self.hash = self._pawn_hash()
 
+    @traced("board.can_place_wall")
     def can_place_wall(self, wall: Wall) -> bool:
         # Check within groove limits (0..7) for starting cell
-        if not (0 <= wall.row < BOARD_SIZE - 1 and 0 <= wall.col < BOARD_SIZE - 1):
+        if not (0 <= wall.row < self.size - 1 and 0 <= wall.col < self.size - 1):
             return False
 
-        # Avoid overlapping same wall
-        for existing in self.walls:
-            if (existing.row, existing.col, existing.horizontal) == (
-                wall.row,
-                wall.col,
-                wall.horizontal,
-            ):
-                return False
+        # Reject walls that overlap or cross an existing one
+        table = self.geometry.conflicts_h if wall.horizontal else self.geometry.conflicts_v
+        h_mask, v_mask = table[self.groove_index(wall)]
+        if self.h_grooves & h_mask or self.v_grooves & v_mask:
+            return False
 
-        # Temporarily place wall and check path connectivity
-        self._add_wall_edges(wall)
+        return self._keeps_paths(wall)
+
+    def _keeps_paths(self, wall: Wall, player_ids: Optional[Iterable[int]] = None) -> bool:
+        """True if every pawn (or each of ``player_ids``) can still reach its goal with ``wall`` added."""
+        # Cut the wall's edges in the distance maps, look up every pawn and
+        # roll back only the cells whose distance changed.
+        down, right = self._wall_edges(wall)
+        cut = self._edge_cells(down & ~self.blocked_down, right & ~self.blocked_right)
+        if not cut:
+            return True
+        saved = (self.blocked_down, self.blocked_right)
+        self.blocked_down |= down
+        self.blocked_right |= right
+        self._refresh_open_masks()
+        changes: List[Tuple[List[int], int, int]] = []
         try:
-            for player in self.players.values():
-                if not self._has_path_to_goal(player):
+            players = self.players.values() if player_ids is None else [self.players[p] for p in player_ids]
+            for player in players:
+                dist = self._distances[self.goal_masks[player.id]]
+                for cell, old in self._raise_distances(dist, cut):
+                    changes.append((dist, cell, old))
+                if dist[self.cell_index(player.position)] >= UNREACHABLE:
                     return False
+            return True
         finally:
-            self._remove_wall_edges(wall)
-        return True
+            for dist, cell, old in reversed(changes):
+                dist[cell] = old
+            self.blocked_down, self.blocked_right = saved
+            self._refresh_open_masks()
+
+    @traced("board.legal_wall_masks")
+    def legal_wall_masks(self, candidates: Optional[Tuple[int, int]] = None) -> Tuple[int, int]:
+        """Return (horizontal, vertical) groove bitmasks of every legal wall.
+
+        Grooves conflicting with placed walls are masked out via the
+        precomputed conflict table. A wall can only cut a pawn off if it
+        closes a region, i.e. joins two points of the same wall component
+        (the board edge counts as one); a union-find over the placed walls'
+        corner points answers that without touching the distance maps. A
+        wall that does close a region gets a connectivity check only for the
+        players whose current shortest path it cuts. ``candidates``
+        optionally limits the enumeration to the given groove masks.
+        """
+        geo = self.geometry
+        g = geo.groove_size
+        legal_h, legal_v = self.free_groove_masks()
+        if candidates is not None:
+            legal_h &= candidates[0]
+            legal_v &= candidates[1]
+
+        paths = {pid: self.path_grooves(pid) for pid in self.players}
+        path_h = path_v = 0
+        for h, v in paths.values():
+            path_h |= h
+            path_v |= v
+
+        parent = list(range(g * g + 1))
+
+        def find(x: int) -> int:
+            while parent[x] != x:
+                parent[x] = x = parent[parent[x]]
+            return x
+
+        for w in self.walls:
+            points = (geo.wall_points_h if w.horizontal else geo.wall_points_v)[w.row * g + w.col]
+            mid = find(points[1])
+            for p in (points[0], points[2]):
+                parent[find(p)] = mid
 
+        for horizontal, todo in ((True, legal_h & path_h), (False, legal_v & path_v)):
+            table = geo.wall_points_h if horizontal else geo.wall_points_v
+            side = 0 if horizontal else 1
+            while todo:
+                low = todo & -todo
+                todo ^= low
+                k = low.bit_length() - 1
+                a, m, b = (find(p) for p in table[k])
+                if a != m and m != b and a != b:
+                    continue
+                cut_by = [pid for pid, masks in paths.items() if masks[side] & low]
+                if not self._keeps_paths(Wall(*divmod(k, g), horizontal), cut_by):
+                    if horizontal:
+                        legal_h ^= low
+                    else:
+                        legal_v ^= low
+        return legal_h, legal_v
+
+    def free_groove_masks(self) -> Tuple[int, int]:
+        """Grooves whose wall would not overlap or cross a placed wall (paths unchecked)."""
+        geo = self.geometry
+        g = geo.groove_size
+        taken_h = taken_v = 0
+        for w in self.walls:
+            table = geo.conflicts_h if w.horizontal else geo.conflicts_v
+            h_mask, v_mask = table[w.row * g + w.col]
+            taken_h |= h_mask
+            taken_v |= v_mask
+        return geo.groove_full & ~taken_h, geo.groove_full & ~taken_v
+
+    def legal_walls(self, candidates: Optional[Tuple[int, int]] = None) -> Iterator[Wall]:
+        """Yield every wall that may legally be placed right now (within ``candidates``)."""
+        g = self.geometry.groove_size
+        legal_h, legal_v = self.legal_wall_masks(candidates)
+        for horizontal, mask in ((True, legal_h), (False, legal_v)):
+            while mask:
+                low = mask & -mask
+                mask ^= low
+                row, col = divmod(low.bit_length() - 1, g)
+                yield Wall(row, col, horizontal)
+
+    def path_grooves(self, player_id: Optional[int] = None) -> Tuple[int, int]:
+        """Grooves whose wall would cut a current shortest path.
+
+        Covers one shortest path of ``player_id``, or of every player when omitted.
+        """
+        n = self.size
+        g = n - 1
+        path_h = path_v = 0
+        players = self.players.values() if player_id is None else [self.players[player_id]]
+        for player in players:
+            dist = self._distances[self.goal_masks[player.id]]
+            u = self.cell_index(player.position)
+            while 0 < dist[u] < UNREACHABLE:
+                for v in self._adjacent(u):
+                    if dist[v] == dist[u] - 1:
+                        break
+                r, c = divmod(min(u, v), n)
+                if v - u in (n, -n):
+                    # Edge below (r, c): horizontal grooves (r, c-1) and (r, c)
+                    if c > 0:
+                        path_h |= 1 << (r * g + c - 1)
+                    if c < g:
+                        path_h |= 1 << (r * g + c)
+                else:
+                    # Edge right of (r, c): vertical grooves (r-1, c) and (r, c)
+                    if r > 0:
+                        path_v |= 1 << ((r - 1) * g + c)
+                    if r < g:
+                        path_v |= 1 << (r * g + c)
+                u = v
+        return path_h, path_v
+
+    @traced("board.place_wall")
     def place_wall(self, wall: Wall) -> bool:
         if not self.can_place_wall(wall):
             return False
+        self.add_wall(wall)
+        return True
+
+    def add_wall(self, wall: Wall) -> None:
+        """Place a wall without legality checks (make/unmake and state loading)."""
         self.walls.append(wall)
         self._add_wall_edges(wall)
-        return True
 
-    # --------- Pathfinding ---------
-    def _has_path_to_goal(self, player: Player) -> bool:
-        start = player.position
-        queue: deque[Position] = deque([start])
-        visited: Set[Position] = {start}
+    @traced("board.remove_wall")
+    def remove_wall(self, wall: Wall) -> None:
+        """Take back a previously placed wall (undo)."""
+        for idx in range(len(self.walls) - 1, -1, -1):
+            w = self.walls[idx]
+            if (w.row, w.col, w.horizontal) == (wall.row, wall.col, wall.horizontal):
+                del self.walls[idx]
+                self._remove_wall_edges(w)
+                return
+        raise ValueError(f"wall {wall} is not on the board")
 
-        while queue:
-            pos = queue.popleft()
-            r, _ = pos
-            if r in player.goal_rows:
-                return True
-            for n in self.neighbors(pos):
-                if n not in visited:
-                    visited.add(n)
-                    queue.append(n)
-        return False
+    # --------- Distance maps ---------
+    def distance_to_goal(self, player_id: int, pos: Optional[Position] = None) -> int:
+        """Shortest path length to the player's goal (UNREACHABLE if cut off).
 
+        Measured from the player's pawn, or from ``pos`` when given.
+        """
+        if pos is None:
+            pos = self.players[player_id].position
+        return self._distances[self.goal_masks[player_id]][pos[0] * self.size + pos[1]]
 
+    def distance_map(self, player_id: int) -> List[int]:
+        """Distance to the player's goal for every cell, indexed by ``cell_index``."""
+        return list(self._distances[self.goal_masks[player_id]])
+
+    def _adjacent(self, i: int) -> List[int]:
+        n = self.size
+        result: List[int] = []
+        if self.open_up >> i & 1:
+            result.append(i - n)
+        if self.open_down >> i & 1:
+            result.append(i + n)
+        if self.open_left >> i & 1:
+            result.append(i - 1)
+        if self.open_right >> i & 1:
+            result.append(i + 1)
+        return result
+
+    def _rebuild_distances(self) -> None:
+        self._distances = {}
+        for goal in self.goal_masks.values():
+            if goal not in self._distances:
+                self._distances[goal] = self._goal_distances(goal)
+
+    def _goal_distances(self, goal: int) -> List[int]:
+        """Full multi-source BFS outward from the goal cells, one bitmask layer at a time."""
+        dist = [UNREACHABLE] * self.geometry.cells
+        reached = layer = goal
+        d = 0
+        while layer:
+            bits = layer
+            while bits:
+                low = bits & -bits
+                dist[low.bit_length() - 1] = d
+                bits ^= low
+            layer = self.expand(layer) & ~reached
+            reached |= layer
+            d += 1
+        return dist
+
+    def _raise_distances(self, dist: List[int], cut: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Repair ``dist`` after edges in ``cut`` were blocked.
+
+        Distances can only grow. Cells that lost their last neighbour one step
+        closer to the goal are invalidated (transitively), then re-settled from
+        the surrounding valid cells. Returns the (cell, old distance) changes.
+        """
+        stack: List[int] = []
+        for a, b in cut:
+            if dist[a] == dist[b] + 1:
+                stack.append(a)
+            elif dist[b] == dist[a] + 1:
+                stack.append(b)
+        if not stack:
+            return []
+
+        invalid: Dict[int, int] = {}
+        while stack:
+            u = stack.pop()
+            if u in invalid:
+                continue
+            du = dist[u]
+            if du == 0 or du >= UNREACHABLE:
+                continue
+            neighbours = self._adjacent(u)
+            if any(dist[v] == du - 1 and v not in invalid for v in neighbours):
+                continue
+            invalid[u] = du
+            for v in neighbours:
+                if dist[v] == du + 1:
+                    stack.append(v)
+        if not invalid:
+            return []
+
+        heap: List[Tuple[int, int]] = []
+        for u in invalid:
+            best = UNREACHABLE
+            for v in self._adjacent(u):
+                if v not in invalid and dist[v] + 1 < best:
+                    best = dist[v] + 1
+            dist[u] = best
+            if best < UNREACHABLE:
+                heap.append((best, u))
+        heapq.heapify(heap)
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d != dist[u]:
+                continue
+            for v in self._adjacent(u):
+                if v in invalid and d + 1 < dist[v]:
+                    dist[v] = d + 1
+                    heapq.heappush(heap, (d + 1, v))
+        return list(invalid.items())
+
+    def _lower_distances(self, dist: List[int], reopened: List[Tuple[int, int]]) -> None:
+        """Repair ``dist`` after edges in ``reopened`` were unblocked (distances only shrink)."""
+        queue: deque[int] = deque()
+        for a, b in reopened:
+            if dist[a] + 1 < dist[b]:
+                dist[b] = dist[a] + 1
+                queue.append(b)
+            elif dist[b] + 1 < dist[a]:
+                dist[a] = dist[b] + 1
+                queue.append(a)
+        while queue:
+            u = queue.popleft()
+            d = dist[u] + 1
+            for v in self._adjacent(u):
+                if d < dist[v]:
+                    dist[v] = d
+                    queue.append(v)
@@ -0,0 +1,231 @@
+"""Opening book: best moves for early 2-player positions, looked up by Zobrist key.
+
+Usage::
+
+    python book.py build --plies 6 --width 2 --budget 200    # writes opening.book
+    python book.py show                                      # size and the book move at the start
+    python book.py bench --entries 2000000                   # lookup latency on a synthetic book
+
+The file is a 16-byte header followed by fixed-size entries sorted by key::
+
+    header  "QBOK"  u16 version  u16 board size  u64 entry count
+    entry   u64 Board.position_key(side to move)  u16 packed action  i16 search score
+
+``OpeningBook`` memory-maps the file and binary-searches it in place, so
+opening a book costs nothing however large it is. Bots and the in-game hint
+consult ``default_book()`` (``opening.book`` next to this file, or the path in
+``QUORIDOR_BOOK``) before searching.
+"""
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from board import Board, BOARD_SIZE
+from entities import Action, Wall
+
+
+MAGIC = b"QBOK"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")
+ENTRY = struct.Struct("<QHh")
+KEY = struct.Struct("<Q")
+BOOK_ENV = "QUORIDOR_BOOK"
+DEFAULT_BOOK_FILE = Path(__file__).parent / "opening.book"
+
+
+# Packed action, one u16: bit 0 kind (1 = wall), bit 1 horizontal,
+# bits 2-8 row, bits 9-15 col
+def pack_action(action: Action) -> int:
+    return (action.kind == "w") | (action.horizontal << 1) | (action.row << 2) | (action.col << 9)
+
+
+def unpack_action(code: int) -> Action:
+    kind = "w" if code & 1 else "m"
+    return Action(kind, (code >> 2) & 0x7F, (code >> 9) & 0x7F, bool(code >> 1 & 1) if kind == "w" else False)
+
+
+class OpeningBook:
+    """Read-only, memory-mapped view of a book file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            raise ValueError(f"{self.path}: not an opening book")
+        magic, version, self.size, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path}: not an opening book (version {VERSION})")
+        if len(self._map) != HEADER.size + self.count * ENTRY.size:
+            raise ValueError(f"{self.path}: truncated opening book")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def lookup(self, key: int) -> Optional[Tuple[Action, int]]:
+        """(action, score) stored for ``key``, or None."""
+        data, unpack_key = self._map, KEY.unpack_from
+        base, width = HEADER.size, ENTRY.size
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            probe = unpack_key(data, base + mid * width)[0]
+            if probe < key:
+                lo = mid + 1
+            elif probe > key:
+                hi = mid
+            else:
+                _, code, score = ENTRY.unpack_from(data, base + mid * width)
+                return unpack_action(code), score
+        return None
+
+    def move(self, board: Board, player_id: int) -> Optional[Action]:
+        """The book move for ``player_id`` on ``board`` if there is one and it is legal."""
+        if board.size != self.size:
+            return None
+        hit = self.lookup(board.position_key(player_id))
+        if hit is None:
+            return None
+        action = hit[0]
+        if action.kind == "m":
+            return action if board.can_move(player_id, action.target) else None
+        if board.players[player_id].walls_remaining <= 0 or not board.can_place_wall(action.to_wall()):
+            return None
+        return action
+
+    def close(self) -> None:
+        self._map.close()
+
+
+_default: Optional[OpeningBook] = None
+_default_loaded = False
+
+
+def default_book() -> Optional[OpeningBook]:
+    """The process-wide book from QUORIDOR_BOOK or ``opening.book``; None if there is none."""
+    global _default, _default_loaded
+    if not _default_loaded:
+        _default_loaded = True
+        path = Path(os.environ.get(BOOK_ENV) or DEFAULT_BOOK_FILE)
+        if path.exists():
+            try:
+                _default = OpeningBook(path)
+            except (OSError, ValueError):
+                _default = None
+    return _default
+
+
+def write_book(path: Path, size: int, entries: Dict[int, Tuple[int, int]]) -> None:
+    """Write ``{key: (packed action, score)}`` sorted by key, replacing ``path`` atomically."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, size, len(entries)))
+        pack = ENTRY.pack
+        f.write(b"".join(pack(key, code, score) for key, (code, score) in sorted(entries.items())))
+    os.replace(tmp, path)
+
+
+# --------- Building ---------
+def build(plies: int, width: int, budget_ms: int, progress: bool = True) -> Dict[int, Tuple[int, int]]:
+    """Search every position reachable in ``plies`` plies along the ``width`` most likely moves.
+
+    At each position the searched best move is stored and followed, along
+    with the next ``width - 1`` pawn steps toward the goal, so the book also
+    covers players who leave the main line.
+    """
+    from ai import AlphaBetaBot, make_action, unmake_action
+    from game import create_players
+
+    board = Board(list(create_players(2).values()))
+    bot = AlphaBetaBot(time_budget_ms=budget_ms)
+    entries: Dict[int, Tuple[int, int]] = {}
+    start = time.perf_counter()
+
+    def visit(pid: int, depth: int) -> None:
+        key = board.position_key(pid)
+        if depth >= plies or key in entries:
+            return
+        best = bot.choose_action(board, pid)
+        score = max(-32767, min(32767, bot.last_stats.score))  # wins saturate
+        entries[key] = (pack_action(best), score)
+        if progress and len(entries) % 50 == 0:
+            print(f"{len(entries)} positions, {time.perf_counter() - start:.0f}s", file=sys.stderr)
+
+        steps = sorted(board.legal_pawn_moves(pid), key=lambda t: board.distance_to_goal(pid, t))
+        lines = [best] + [a for a in (Action.move(t) for t in steps) if a != best][: width - 1]
+        other = 2 if pid == 1 else 1
+        for action in lines:
+            previous = make_action(board, pid, action)
+            try:
+                if not board.at_goal(pid):
+                    visit(other, depth + 1)
+            finally:
+                unmake_action(board, pid, action, previous)
+
+    visit(1, 0)
+    return entries
+
+
+def _bench(entries: int, lookups: int) -> None:
+    rng = random.Random(0)
+    keys = [rng.getrandbits(64) for _ in range(entries)]
+    path = Path(f"bench-{os.getpid()}.book")
+    code = pack_action(Action.wall(Wall(3, 4, True)))
+    write_book(path, BOARD_SIZE, {key: (code, 0) for key in keys})
+    try:
+        t0 = time.perf_counter()
+        book = OpeningBook(path)
+        open_us = (time.perf_counter() - t0) * 1e6
+        probes = [rng.choice(keys) if i % 2 else rng.getrandbits(64) for i in range(lookups)]
+        t0 = time.perf_counter()
+        hits = sum(book.lookup(key) is not None for key in probes)
+        per_lookup = (time.perf_counter() - t0) / lookups * 1e6
+        book.close()
+    finally:
+        path.unlink()
+    print(
+        f"{entries} entries ({entries * ENTRY.size / 1e6:.1f} MB): open {open_us:.0f}us, "
+        f"{per_lookup:.2f}us per lookup ({hits}/{lookups} hits)"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Quoridor opening book")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="search the opening and write a book")
+    b.add_argument("--plies", type=int, default=6)
+    b.add_argument("--width", type=int, default=2, help="moves followed per position")
+    b.add_argument("--budget", type=int, default=200, help="search milliseconds per position")
+    b.add_argument("--out", default=str(DEFAULT_BOOK_FILE))
+    s = sub.add_parser("show", help="print size and the book move from the start")
+    s.add_argument("--book", default=None)
+    bench = sub.add_parser("bench", help="time lookups in a synthetic book")
+    bench.add_argument("--entries", type=int, default=1_000_000)
+    bench.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        entries = build(args.plies, args.width, args.budget)
+        write_book(Path(args.out), BOARD_SIZE, entries)
+        print(f"Wrote {len(entries)} positions to {args.out}")
+    elif args.command == "show":
+        from game import create_players
+
+        book = OpeningBook(Path(args.book or os.environ.get(BOOK_ENV) or DEFAULT_BOOK_FILE))
+        board = Board(list(create_players(2).values()))
+        print(f"{book.path}: {len(book)} positions; opening move {book.move(board, 1)}")
+    else:
+        _bench(args.entries, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Tuple
+from typing import FrozenSet, Tuple
 
 
 Position = Tuple[int, int]  # (row, col)
@@ -11,7 +11,7 @@ class Player:
     name: str
     position: Position
     walls_remaining: int
-    goal_rows: range  # rows that count as winning
+    goal: FrozenSet[Position]  # cells that count as winning (see board.row_goal / col_goal)
 
 
 @dataclass
@@ -21,3 +21,45 @@ class Wall:
     horizontal: bool  # True = horizontal, False = vertical
 
 
+@dataclass(frozen=True)
+class Action:
+    kind: str  # "m" = move pawn to (row, col), "w" = wall at groove (row, col)
+    row: int
+    col: int
+    horizontal: bool = False
+
+    @classmethod
+    def move(cls, pos: Position) -> "Action":
+        return cls("m", pos[0], pos[1])
+
+    @classmethod
+    def wall(cls, wall: Wall) -> "Action":
+        return cls("w", wall.row, wall.col, wall.horizontal)
+
+    @property
+    def target(self) -> Position:
+        return (self.row, self.col)
+
+    def to_wall(self) -> Wall:
+        return Wall(self.row, self.col, self.horizontal)
+
+    @classmethod
+    def parse(cls, text: str) -> "Action":
+        """Inverse of ``str()``: ``"m r c"`` or ``"w r c h|v"``. Raises ValueError."""
+        parts = text.split()
+        kind = parts[0].lower() if parts else ""
+        try:
+            if kind == "m" and len(parts) == 3:
+                return cls("m", int(parts[1]), int(parts[2]))
+            if kind == "w" and len(parts) == 4 and parts[3].lower() in ("h", "v"):
+                return cls("w", int(parts[1]), int(parts[2]), parts[3].lower() == "h")
+        except ValueError:
+            pass
+        raise ValueError(f"malformed action '{text.strip()}'")
+
+    def __str__(self) -> str:
+        if self.kind == "w":
+            return f"w {self.row} {self.col} {'h' if self.horizontal else 'v'}"
+        return f"m {self.row} {self.col}"
+
+
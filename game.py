@@ -1,21 +1,39 @@
 from __future__ import annotations
 
-import json
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 
-from auth import AuthManager
-from board import Board, BOARD_SIZE
-from entities import Player, Wall, Position
+from ai import AlphaBetaBot
+from board import Board, BOARD_SIZE, col_goal, row_goal
+from book import default_book
+from entities import Action, Player, Wall, Position
+from mcts import MCTSBot
+from tablebase import default_tablebase
+from transposition import TranspositionTable
+import telemetry
 
-# #region agent log
-LOG_PATH = "/Users/amirali/PycharmProjects/Quoridor G/.cursor/debug.log"
-def _log(session_id, run_id, hypothesis_id, location, message, data):
-    try:
-        with open(LOG_PATH, "a") as f:
-            f.write(json.dumps({"sessionId": session_id, "runId": run_id, "hypothesisId": hypothesis_id, "location": location, "message": message, "data": data, "timestamp": __import__("time").time() * 1000}) + "\n")
-    except: pass
-# #endregion
+
+HINT_TIME_MS = 500  # search budget for a hint when the book has no move
+BOARD_SIZES = (9, 11, 13, 17)  # sizes offered by the menu; any size up to MAX_BOARD_SIZE works
+MAX_BOARD_SIZE = 32  # cell indices must fit the 10-bit fields of a ply delta
+
+
+# Packed per-ply delta, one unsigned 32-bit int:
+#   bit 0      kind (0 = pawn move, 1 = wall)
+#   bits 1-3   turn index of the player who moved
+#   bits 4-13  move: origin cell        wall: groove index
+#   bits 14-23 move: destination cell   wall: 1 if horizontal
+# Wall counters are implied by the kind, so nothing else is stored.
+def encode_delta(turn_index: int, kind: str, a: int, b: int) -> int:
+    return (kind == "w") | (turn_index << 1) | (a << 4) | (b << 14)
+
+
+def decode_delta(delta: int) -> Tuple[int, str, int, int]:
+    kind = "w" if delta & 1 else "m"
+    return (delta >> 1) & 0x7, kind, (delta >> 4) & 0x3FF, (delta >> 14) & 0x3FF
 
 
 @dataclass
@@ -26,81 +44,106 @@ class GameState:
     current_player_id: int
 
 
+def wall_budget(mode: int, size: int = BOARD_SIZE) -> int:
+    """Walls per player: 10 (2 players) or 5 (4 players) on 9x9, scaled with the board side."""
+    return round((20 // mode) * size / BOARD_SIZE)
+
+
+def create_players(mode: int, size: int = BOARD_SIZE) -> Dict[int, Player]:
+    """Build the starting players for a 2- or 4-player game on a ``size`` x ``size`` board.
+
+    P1 and P2 race to the opposite row; in 4-player games P3 starts on the
+    left edge and races to the right-hand column, P4 the other way round.
+    """
+    last = size - 1
+    center = size // 2
+    wall_count = wall_budget(mode, size)
+    players = {
+        1: Player(1, "P1", (last, center), wall_count, row_goal(0, size)),
+        2: Player(2, "P2", (0, center), wall_count, row_goal(last, size)),
+    }
+    if mode != 2:
+        players[3] = Player(3, "P3", (center, 0), wall_count, col_goal(last, size))
+        players[4] = Player(4, "P4", (center, last), wall_count, col_goal(0, size))
+    return players
+
+
+@dataclass
+class StepResult:
+    """Outcome of ``GameController.apply``."""
+
+    ok: bool
+    player_id: int  # who was to move
+    action: Optional[Action] = None
+    error: Optional[str] = None
+    winner: Optional[int] = None  # set once the game is over
+
+
 class GameController:
-    """High-level game controller managing turns, moves, undo and win detection."""
+    """Game engine: turns, moves, undo and win detection, driven one step at a time.
 
-    def __init__(self, ui, auth: AuthManager, current_user: str, mode: int) -> None:
-        self.ui = ui
-        self.auth = auth
+    Nothing here blocks or talks to a terminal: callers feed actions to
+    ``apply`` (or ``play``) and ask ``legal_actions``, ``is_terminal`` and
+    ``winner``. The terminal game (``terminal.TerminalClient``), self-play,
+    benchmarks and the network server are all clients of this API.
+    """
+
+    def __init__(
+        self,
+        mode: int,
+        seats: Optional[Dict[int, str]] = None,
+        bot_time_ms: int = 1000,
+        bot_workers: int = 1,
+        size: int = BOARD_SIZE,
+    ) -> None:
+        if not 3 <= size <= MAX_BOARD_SIZE:
+            raise ValueError(f"board size must be between 3 and {MAX_BOARD_SIZE}")
         self.mode = mode  # 2 or 4 players
-        self.current_user = current_user
+        self.size = size
 
         self.players: Dict[int, Player] = self._create_players()
-        self.board = Board(list(self.players.values()))
+        self.board = Board(list(self.players.values()), size)
         self.turn_order: List[int] = sorted(self.players.keys())
         self.current_turn_index: int = 0
 
-        self.history: List[GameState] = []
-        self._push_state()
+        # Seat types: "human" (actions come from the caller), "bot" (AlphaBetaBot)
+        # or "mcts" (MCTSBot, searching in ``bot_workers`` processes)
+        self.seats: Dict[int, str] = {pid: "human" for pid in self.players}
+        if seats:
+            self.seats.update(seats)
+        # Bot seats share one bounded transposition table; human-only games
+        # (e.g. server sessions, thousands per process) do not allocate one
+        has_bots = any(kind == "bot" for kind in self.seats.values())
+        self.table: Optional[TranspositionTable] = TranspositionTable() if has_bots else None
+        # Memory-mapped and shared by every game in the process; None without a book file
+        self.book = default_book()
+        # Solved pawn races for wall-exhausted 2-player positions, built on first use
+        self.tablebase = default_tablebase()
+        # Seats search one at a time, so MCTS seats share one process pool rather
+        # than each starting ``bot_workers - 1`` processes competing for the same cores
+        mcts_seats = sum(kind == "mcts" for kind in self.seats.values())
+        self.pool: Optional[ProcessPoolExecutor] = (
+            ProcessPoolExecutor(max_workers=bot_workers - 1) if mcts_seats and bot_workers > 1 else None
+        )
+        self.bots: Dict[int, Union[AlphaBetaBot, MCTSBot]] = {}
+        for pid, kind in self.seats.items():
+            if kind == "bot":
+                self.bots[pid] = AlphaBetaBot(
+                    time_budget_ms=bot_time_ms, table=self.table, book=self.book, tablebase=self.tablebase
+                )
+            elif kind == "mcts":
+                self.bots[pid] = MCTSBot(
+                    time_budget_ms=bot_time_ms, workers=bot_workers, book=self.book, tablebase=self.tablebase,
+                    pool=self.pool,
+                )
+
+        # Undo/redo logs of packed per-ply deltas (see encode_delta)
+        self.moves = array("I")
+        self.redo_moves = array("I")
 
     # --------- Setup ---------
     def _create_players(self) -> Dict[int, Player]:
-        # #region agent log
-        _log("debug-session", "run1", "B", "game.py:_create_players", "entry", {"mode": self.mode, "BOARD_SIZE": BOARD_SIZE})
-        # #endregion
-        if self.mode == 2:
-            wall_count = 10
-            center = BOARD_SIZE // 2
-            # #region agent log
-            _log("debug-session", "run1", "B", "game.py:_create_players", "before p1 creation", {"wall_count": wall_count, "center": center, "goal_rows": list(range(0, 1))})
-            # #endregion
-            p1 = Player(1, "P1", (BOARD_SIZE - 1, center), wall_count, range(0, 1))
-            # #region agent log
-            _log("debug-session", "run1", "B", "game.py:_create_players", "after p1 creation", {"p1_walls": p1.walls_remaining, "p1_goal_rows": list(p1.goal_rows)})
-            # #endregion
-            # #region agent log
-            _log("debug-session", "run1", "B", "game.py:_create_players", "before p2 creation", {"goal_rows": list(range(BOARD_SIZE - 1, BOARD_SIZE))})
-            # #endregion
-            p2 = Player(2, "P2", (0, center), wall_count, range(BOARD_SIZE - 1, BOARD_SIZE))
-            # #region agent log
-            _log("debug-session", "run1", "B", "game.py:_create_players", "after p2 creation", {"p2_walls": p2.walls_remaining})
-            # #endregion
-            return {1: p1, 2: p2}
-        else:
-            wall_count = 5
-            center = BOARD_SIZE // 2
-            # #region agent log
-            _log("debug-session", "run1", "B", "game.py:_create_players", "4-player mode", {"wall_count": wall_count, "center": center})
-            # #endregion
-            # #region agent log
-            _log("debug-session", "run1", "B", "game.py:_create_players", "before Player(1)", {"args": {"id": 1, "name": "P1", "pos": (BOARD_SIZE - 1, center), "walls": wall_count, "goal_rows": list(range(0, 1))}})
-            # #endregion
-            p1 = Player(1, "P1", (BOARD_SIZE - 1, center), wall_count, range(0, 1))
-            # #region agent log
-            _log("debug-session", "run1", "B", "game.py:_create_players", "after Player(1)", {"success": True})
-            # #endregion
-            # #region agent log
-            _log("debug-session", "run1", "B", "game.py:_create_players", "before Player(2)", {"args": {"id": 2, "name": "P2", "pos": (0, center), "walls": wall_count, "goal_rows": list(range(BOARD_SIZE - 1, BOARD_SIZE))}})
-            # #endregion
-            p2 = Player(2, "P2", (0, center), wall_count, range(BOARD_SIZE - 1, BOARD_SIZE))
-            # #region agent log
-            _log("debug-session", "run1", "B", "game.py:_create_players", "after Player(2)", {"success": True})
-            # #endregion
-            # #region agent log
-            _log("debug-session", "run1", "B", "game.py:_create_players", "before Player(3)", {"args": {"id": 3, "name": "P3", "pos": (center, 0), "walls": wall_count, "goal_rows": list(range(0, BOARD_SIZE))}})
-            # #endregion
-            p3 = Player(3, "P3", (center, 0), wall_count, range(0, BOARD_SIZE))
-            # #region agent log
-            _log("debug-session", "run1", "B", "game.py:_create_players", "after Player(3)", {"success": True})
-            # #endregion
-            # #region agent log
-            _log("debug-session", "run1", "B", "game.py:_create_players", "before Player(4)", {"args": {"id": 4, "name": "P4", "pos": (center, BOARD_SIZE - 1), "walls": wall_count, "goal_rows": list(range(0, BOARD_SIZE))}})
-            # #endregion
-            p4 = Player(4, "P4", (center, BOARD_SIZE - 1), wall_count, range(0, BOARD_SIZE))
-            # #region agent log
-            _log("debug-session", "run1", "B", "game.py:_create_players", "after Player(4)", {"success": True})
-            # #endregion
-            return {1: p1, 2: p2, 3: p3, 4: p4}
+        return create_players(self.mode, self.size)
 
     # --------- State history / undo ---------
     def _snapshot(self) -> GameState:
@@ -110,30 +153,76 @@ class GameController:
         current_player_id = self.turn_order[self.current_turn_index]
         return GameState(positions, walls, walls_remaining, current_player_id)
 
+    @telemetry.traced("game.restore")
     def _restore(self, state: GameState) -> None:
+        """Load a full snapshot (state loading; undo/redo use the delta log instead)."""
         for pid, pos in state.positions.items():
-            self.players[pid].position = pos
+            self.board.set_position(pid, pos)
         for pid, count in state.walls_remaining.items():
             self.players[pid].walls_remaining = count
-        self.board.walls = list(state.walls)
-        self.board.blocked_edges.clear()
-        for w in self.board.walls:
-            self.board._add_wall_edges(w)
+        self.board.clear_walls()
+        for w in state.walls:
+            self.board.add_wall(w)
         self.current_turn_index = self.turn_order.index(state.current_player_id)
+        self.moves = array("I")
+        self.redo_moves = array("I")
+
+    def _record(self, delta: int) -> None:
+        self.moves.append(delta)
+        del self.redo_moves[:]
+
+    def _unmake(self, delta: int) -> None:
+        turn_index, kind, a, b = decode_delta(delta)
+        pid = self.turn_order[turn_index]
+        if kind == "m":
+            self.board.set_position(pid, self.board.cell_position(a))
+        else:
+            self.board.remove_wall(self._groove_wall(a, b))
+            self.players[pid].walls_remaining += 1
+        self.current_turn_index = turn_index
+
+    def _remake(self, delta: int) -> None:
+        turn_index, kind, a, b = decode_delta(delta)
+        pid = self.turn_order[turn_index]
+        if kind == "m":
+            self.board.set_position(pid, self.board.cell_position(b))
+        else:
+            self.board.add_wall(self._groove_wall(a, b))
+            self.players[pid].walls_remaining -= 1
+        self.current_turn_index = (turn_index + 1) % len(self.turn_order)
 
-    def _push_state(self) -> None:
-        self.history.append(self._snapshot())
+    def _groove_wall(self, groove: int, horizontal: int) -> Wall:
+        row, col = divmod(groove, self.board.size - 1)
+        return Wall(row, col, bool(horizontal))
 
+    @telemetry.traced("game.undo")
     def undo(self) -> bool:
-        # Need at least two states: current and previous
-        if len(self.history) < 2:
+        """Take back the last ply; the player who made it is to move again."""
+        if not self.moves:
             return False
-        # pop current
-        self.history.pop()
-        prev = self.history[-1]
-        self._restore(prev)
+        delta = self.moves.pop()
+        self._unmake(delta)
+        self.redo_moves.append(delta)
         return True
 
+    @telemetry.traced("game.redo")
+    def redo(self) -> bool:
+        if not self.redo_moves:
+            return False
+        delta = self.redo_moves.pop()
+        self._remake(delta)
+        self.moves.append(delta)
+        return True
+
+    def replay(self, delta: int) -> None:
+        """Play a ply taken from this game's delta log (e.g. a variation tree's node) again.
+
+        ``delta`` must have been recorded from the current position; it is not
+        re-validated. Like any new ply, it clears the redo log.
+        """
+        self._remake(delta)
+        self._record(delta)
+
     # --------- Turn helpers ---------
     def current_player(self) -> Player:
         pid = self.turn_order[self.current_turn_index]
@@ -142,64 +231,109 @@ class GameController:
     def _advance_turn(self) -> None:
         self.current_turn_index = (self.current_turn_index + 1) % len(self.turn_order)
 
-    def _check_winner(self) -> Optional[Player]:
+    # --------- Step API ---------
+    def winner(self) -> Optional[Player]:
         for p in self.players.values():
-            if p.position[0] in p.goal_rows:
+            if self.board.at_goal(p.id):
                 return p
         return None
 
-    # --------- Game loop ---------
-    def run(self) -> None:
-        self.ui.print_title("Quoridor")
-
-        # Player mapping for leaderboard: for simplicity, all seats use current_user
-        leaderboard_players = {pid: self.current_user for pid in self.players.keys()}
-
-        while True:
-            self.ui.render_board(self.board, self.players, self.current_player())
-            winner = self._check_winner()
-            if winner:
-                self.ui.print_message(f"{winner.name} wins!", highlight=True)
-                self.auth.record_game_result(self.current_user, leaderboard_players)
-                break
-
-            action = self.ui.prompt_turn_action(self.current_player())
-
-            if action == "m":
-                self._handle_move()
-            elif action == "w":
-                self._handle_wall()
-            elif action == "u":
-                if not self.undo():
-                    self.ui.print_message("Nothing to undo.", error=True)
-                continue  # same player turn after undo
-            elif action == "q":
-                self.auth.record_game_result(None, leaderboard_players)
-                break
-            else:
-                self.ui.print_message("Invalid action.", error=True)
-                continue
-
-            self._push_state()
-            self._advance_turn()
+    def is_terminal(self) -> bool:
+        return self.winner() is not None
 
-    # --------- Actions ---------
-    def _handle_move(self) -> None:
+    def legal_actions(self) -> List[Action]:
+        """Every legal action for the player to move (none once the game is over)."""
+        if self.is_terminal():
+            return []
         p = self.current_player()
-        row, col = self.ui.prompt_move()
-        if not self.board.move_player(p.id, (row, col)):
-            self.ui.print_message("Illegal move.", error=True)
+        actions = [Action.move(pos) for pos in self.board.legal_pawn_moves(p.id)]
+        if p.walls_remaining > 0:
+            actions.extend(Action.wall(w) for w in self.board.legal_walls())
+        return actions
 
-    def _handle_wall(self) -> None:
+    def apply(self, action: Union[Action, str]) -> StepResult:
+        """Validate and play ``action`` (an Action or its text form, e.g. ``"w 3 4 h"``)."""
         p = self.current_player()
-        if p.walls_remaining <= 0:
-            self.ui.print_message("No walls remaining.", error=True)
-            return
-        row, col, orient = self.ui.prompt_wall()
-        wall = Wall(row=row, col=col, horizontal=(orient == "h"))
-        if self.board.place_wall(wall):
-            p.walls_remaining -= 1
-        else:
-            self.ui.print_message("Invalid wall placement.", error=True)
+        if isinstance(action, str):
+            try:
+                action = Action.parse(action)
+            except ValueError as exc:
+                return StepResult(False, p.id, error=str(exc))
+        if self.is_terminal():
+            return StepResult(False, p.id, action, error="game is over")
+        if action.kind == "w" and p.walls_remaining <= 0:
+            return StepResult(False, p.id, action, error="no walls remaining")
+        if not self.play(action):
+            return StepResult(False, p.id, action, error="illegal move" if action.kind == "m" else "illegal wall")
+        winner = self.winner()
+        return StepResult(True, p.id, action, winner=winner.id if winner else None)
+
+    def bot_to_move(self) -> Optional[Union[AlphaBetaBot, MCTSBot]]:
+        """The bot seated for the player to move, if that seat is a bot."""
+        return self.bots.get(self.current_player().id)
 
+    def step_bot(self) -> Optional[StepResult]:
+        """Let the bot to move choose and play; None if a human is to move."""
+        bot = self.bot_to_move()
+        if bot is None or self.is_terminal():
+            return None
+        p = self.current_player()
+        return self.apply(bot.choose_action(self.board, p.id))
 
+    def hint(self, time_ms: int = HINT_TIME_MS) -> Tuple[Action, str]:
+        """Suggest a move for the player to move: the book or tablebase move, else a short search.
+
+        Returns the action and where it came from (``"book"``, ``"tablebase"`` or ``"search"``).
+        """
+        p = self.current_player()
+        if self.book is not None:
+            action = self.book.move(self.board, p.id)
+            if action is not None:
+                return action, "book"
+        hit = self.tablebase.probe(self.board, p.id, time.perf_counter() + time_ms / 1000.0)
+        if hit is not None:
+            return hit[0], "tablebase"
+        bot = AlphaBetaBot(time_budget_ms=time_ms, table=self.table)
+        return bot.choose_action(self.board, p.id), "search"
+
+    def close(self) -> None:
+        """Shut down the process pool shared by parallel MCTS seats."""
+        for bot in self.bots.values():
+            if isinstance(bot, MCTSBot):
+                bot.close()
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    # --------- Actions ---------
+    def _place_wall(self, p: Player, wall: Wall) -> bool:
+        if p.walls_remaining <= 0 or not self.board.place_wall(wall):
+            return False
+        p.walls_remaining -= 1
+        return True
+
+    @telemetry.traced("game.play")
+    def play(self, action: Action) -> bool:
+        """Apply an action for the current player and pass the turn; False if illegal.
+
+        The primitive behind ``apply``; hot loops (self-play, benchmarks) call
+        it directly to skip building a StepResult.
+        """
+        p = self.current_player()
+        if action.kind == "w":
+            wall = action.to_wall()
+            if not self._place_wall(p, wall):
+                return False
+            delta = encode_delta(
+                self.current_turn_index, "w", self.board.groove_index(wall), int(wall.horizontal)
+            )
+        else:
+            origin = self.board.cell_index(p.position)
+            if not self.board.move_player(p.id, action.target):
+                return False
+            delta = encode_delta(
+                self.current_turn_index, "m", origin, self.board.cell_index(action.target)
+            )
+        self._record(delta)
+        self._advance_turn()
+        return True
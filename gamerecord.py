@@ -0,0 +1,437 @@
+"""Compact binary game records, an append-only segmented log and a streaming reader.
+
+Usage::
+
+    python gamerecord.py stats records/              # games, plies, results, bytes per ply
+    python gamerecord.py show records/ --game 0      # one game in text notation
+    python gamerecord.py export records/ > games.txt
+    python gamerecord.py import games.txt records/
+    python gamerecord.py bench --games 1000000       # write and scan throughput
+
+A log is a directory of segment files (``00000001.qrec``, ...), each a 6-byte
+header followed by records::
+
+    segment  "QREC"  u16 version
+    record   u8 board size  u8 players  u8 winner (0: none)  u8 reason  u16 plies
+             then one code per ply, 1 byte on boards up to 9x9, else 2 (little-endian)
+
+A ply code is a pawn move's destination cell index, or for a wall
+``WALL | horizontal << bits | groove index`` with ``bits`` the width of a
+groove index. On 9x9 that is one byte per ply: cells 0-80, walls 128 + the
+7-bit (orientation, groove) index. Starting squares and wall budgets follow
+from the size and player count (``game.create_players``), so nothing else is
+stored.
+
+``RecordLog`` appends records and rolls to a new segment past
+``segment_bytes``; ``iter_records`` memory-maps one segment at a time and
+yields records lazily, so scanning millions of games needs memory for one
+game only. A record cut short by a crash ends its segment: readers skip it
+and the next ``RecordLog`` on that directory truncates it away.
+"""
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from board import BOARD_SIZE
+from entities import Action, Wall
+from game import GameController, decode_delta
+
+
+MAGIC = b"QREC"
+VERSION = 1
+SEGMENT_HEADER = struct.Struct("<4sH")
+RECORD_HEADER = struct.Struct("<BBBBH")
+SEGMENT_SUFFIX = ".qrec"
+DEFAULT_SEGMENT_BYTES = 64 << 20
+MAX_PLIES = 0xFFFF
+REASONS = ("none", "goal", "resign", "timeout", "disconnect", "quit", "max-plies")
+RECORDS_ENV = "QUORIDOR_RECORDS"  # directory the terminal game appends finished games to
+
+
+# --------- Ply codes ---------
+def groove_bits(size: int) -> int:
+    """Bits of a groove index on a ``size`` x ``size`` board."""
+    return max(1, ((size - 1) * (size - 1) - 1).bit_length())
+
+
+def code_width(size: int) -> int:
+    """Bytes per ply code: 1 while cells and (orientation, groove) pairs fit in 7 bits."""
+    return 1 if size * size <= 128 and groove_bits(size) <= 6 else 2
+
+
+def encode_ply(size: int, action: Action) -> int:
+    if action.kind == "m":
+        return action.row * size + action.col
+    bits = groove_bits(size)
+    wall_flag = 0x80 if code_width(size) == 1 else 0x8000
+    return wall_flag | action.horizontal << bits | (action.row * (size - 1) + action.col)
+
+
+def decode_ply(size: int, code: int) -> Action:
+    wall_flag = 0x80 if code_width(size) == 1 else 0x8000
+    if not code & wall_flag:
+        return Action.move(divmod(code, size))
+    bits = groove_bits(size)
+    row, col = divmod(code & ((1 << bits) - 1), size - 1)
+    return Action.wall(Wall(row, col, bool(code >> bits & 1)))
+
+
+# --------- Records ---------
+@dataclass
+class GameRecord:
+    """One finished (or abandoned) game; ``plies`` holds the raw ply codes."""
+
+    size: int
+    players: int
+    winner: Optional[int]
+    reason: str
+    plies: bytes
+
+    def __len__(self) -> int:
+        """Number of plies."""
+        return len(self.plies) // code_width(self.size)
+
+    @classmethod
+    def from_actions(
+        cls, size: int, players: int, actions: Iterable[Action], winner: Optional[int] = None, reason: str = "none"
+    ) -> "GameRecord":
+        codes = [encode_ply(size, action) for action in actions]
+        fmt = "B" if code_width(size) == 1 else "H"
+        return cls(size, players, winner, reason, struct.pack(f"<{len(codes)}{fmt}", *codes))
+
+    @classmethod
+    def from_controller(
+        cls, controller: GameController, reason: Optional[str] = None, winner: Optional[int] = None
+    ) -> "GameRecord":
+        """Record a game played from the opening (its undo log holds every ply).
+
+        ``winner`` defaults to whoever reached their goal and ``reason`` to
+        "goal" if someone did, else "none"; pass both for games decided
+        another way (resignation, timeout).
+        """
+        size = controller.board.size
+        actions = []
+        for delta in controller.moves:
+            _, kind, a, b = decode_delta(delta)
+            if kind == "m":
+                actions.append(Action.move(divmod(b, size)))
+            else:
+                row, col = divmod(a, size - 1)
+                actions.append(Action.wall(Wall(row, col, bool(b))))
+        if winner is None:
+            at_goal = controller.winner()
+            winner = at_goal.id if at_goal else None
+        if reason is None:
+            reason = "goal" if winner is not None else "none"
+        return cls.from_actions(size, controller.mode, actions, winner, reason)
+
+    def actions(self) -> List[Action]:
+        fmt = "B" if code_width(self.size) == 1 else "H"
+        return [decode_ply(self.size, code) for code in struct.unpack(f"<{len(self)}{fmt}", self.plies)]
+
+    def replay(self) -> GameController:
+        """A headless controller with every ply played; ValueError if one is illegal."""
+        controller = GameController(self.players, size=self.size)
+        for ply, action in enumerate(self.actions()):
+            if not controller.play(action):
+                raise ValueError(f"illegal ply {ply}: {action}")
+        return controller
+
+    def encode(self) -> bytes:
+        if len(self) > MAX_PLIES:
+            raise ValueError(f"games longer than {MAX_PLIES} plies cannot be recorded")
+        header = RECORD_HEADER.pack(self.size, self.players, self.winner or 0, REASONS.index(self.reason), len(self))
+        return header + self.plies
+
+
+def decode_record(data: Union[bytes, mmap.mmap], offset: int) -> Optional[Tuple[GameRecord, int]]:
+    """The record at ``offset`` and the offset after it; None if the data ends first."""
+    end = offset + RECORD_HEADER.size
+    if end > len(data):
+        return None
+    size, players, winner, reason, plies = RECORD_HEADER.unpack_from(data, offset)
+    stop = end + plies * code_width(size)
+    if stop > len(data) or reason >= len(REASONS):
+        return None
+    return GameRecord(size, players, winner or None, REASONS[reason], bytes(data[end:stop])), stop
+
+
+# --------- Segmented log ---------
+def segment_paths(directory: Union[str, Path]) -> List[Path]:
+    """Segments of a log, oldest first."""
+    return sorted(Path(directory).glob(f"*{SEGMENT_SUFFIX}"))
+
+
+class RecordLog:
+    """Append-only writer for a segmented record log.
+
+    Each append is a single buffered write of the whole record; ``flush()``
+    (or ``close()``) hands it to the OS. A new segment starts once the
+    current one would grow past ``segment_bytes``.
+    """
+
+    def __init__(self, directory: Union[str, Path], segment_bytes: int = DEFAULT_SEGMENT_BYTES) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        segments = segment_paths(self.directory)
+        self._index = int(segments[-1].stem) if segments else 0
+        self._file = None
+        self._size = 0
+        if segments:
+            self._open(segments[-1])
+
+    def _open(self, path: Path) -> None:
+        if path.exists():
+            # Drop a record left half-written by a crash, or later appends would be unreachable
+            end = _valid_length(path)
+            if end < path.stat().st_size:
+                os.truncate(path, end)
+        self._file = open(path, "ab")
+        self._size = self._file.tell()
+        if self._size == 0:
+            self._file.write(SEGMENT_HEADER.pack(MAGIC, VERSION))
+            self._size = SEGMENT_HEADER.size
+
+    def _roll(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._index += 1
+        self._open(self.directory / f"{self._index:08d}{SEGMENT_SUFFIX}")
+
+    def append(self, record: GameRecord) -> None:
+        self.append_raw(record.encode())
+
+    def append_raw(self, data: bytes) -> None:
+        """Append an already encoded record (e.g. one sent back by a worker process)."""
+        if self._file is None or (self._size + len(data) > self.segment_bytes and self._size > SEGMENT_HEADER.size):
+            self._roll()
+        self._file.write(data)
+        self._size += len(data)
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "RecordLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _valid_length(path: Path) -> int:
+    """Bytes of ``path`` up to the end of its last complete record."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < SEGMENT_HEADER.size:
+        return 0
+    offset = SEGMENT_HEADER.size
+    while True:
+        decoded = decode_record(data, offset)
+        if decoded is None:
+            return offset
+        offset = decoded[1]
+
+
+def iter_segment(path: Union[str, Path]) -> Iterator[GameRecord]:
+    """Yield the records of one segment file, stopping at a truncated tail."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= SEGMENT_HEADER.size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, version = SEGMENT_HEADER.unpack_from(data, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path}: not a game record segment (version {VERSION})")
+            offset = SEGMENT_HEADER.size
+            while True:
+                decoded = decode_record(data, offset)
+                if decoded is None:
+                    return
+                record, offset = decoded
+                yield record
+
+
+def iter_records(source: Union[str, Path]) -> Iterator[GameRecord]:
+    """Stream every record of a log directory (or of one segment file), in append order."""
+    path = Path(source)
+    for segment in segment_paths(path) if path.is_dir() else [path]:
+        yield from iter_segment(segment)
+
+
+# --------- Text notation ---------
+# One game per line: "size=9 players=2 winner=1 reason=goal | e2 e8 d3h ...".
+# Columns are letters from a, rows count up from 1 at P1's starting edge; a
+# wall is named by the square above and left of its centre plus h or v.
+def square_name(size: int, row: int, col: int) -> str:
+    if size > 26:
+        raise ValueError("text notation covers boards up to 26x26")
+    return f"{chr(ord('a') + col)}{size - row}"
+
+
+def parse_square(size: int, name: str) -> Tuple[int, int]:
+    col = ord(name[0]) - ord("a")
+    row = size - int(name[1:])
+    if not (0 <= row < size and 0 <= col < size):
+        raise ValueError(f"square {name!r} is off a {size}x{size} board")
+    return row, col
+
+
+def action_notation(size: int, action: Action) -> str:
+    name = square_name(size, action.row, action.col)
+    if action.kind == "m":
+        return name
+    return name + ("h" if action.horizontal else "v")
+
+
+def parse_action_notation(size: int, token: str) -> Action:
+    if token[-1] in "hv":
+        row, col = parse_square(size, token[:-1])
+        if row >= size - 1 or col >= size - 1:
+            raise ValueError(f"wall {token!r} is off a {size}x{size} board")
+        return Action.wall(Wall(row, col, token[-1] == "h"))
+    return Action.move(parse_square(size, token))
+
+
+def to_notation(record: GameRecord) -> str:
+    header = (
+        f"size={record.size} players={record.players} "
+        f"winner={record.winner if record.winner is not None else '-'} reason={record.reason}"
+    )
+    return header + " | " + " ".join(action_notation(record.size, a) for a in record.actions())
+
+
+def from_notation(line: str) -> GameRecord:
+    """Parse one line written by ``to_notation``; ValueError if it is malformed."""
+    try:
+        head, _, moves = line.partition("|")
+        fields = dict(item.split("=", 1) for item in head.split())
+        size = int(fields.get("size", BOARD_SIZE))
+        winner = None if fields.get("winner", "-") == "-" else int(fields["winner"])
+        reason = fields.get("reason", "none")
+        if reason not in REASONS:
+            raise ValueError(f"unknown reason {reason!r}")
+        actions = [parse_action_notation(size, token) for token in moves.split()]
+        return GameRecord.from_actions(size, int(fields.get("players", 2)), actions, winner, reason)
+    except (KeyError, IndexError) as exc:
+        raise ValueError(f"malformed game line: {line.strip()!r}") from exc
+
+
+# --------- CLI ---------
+def _stats(source: str) -> None:
+    games = plies = 0
+    wins: Dict[str, int] = {}
+    start = time.perf_counter()
+    for record in iter_records(source):
+        games += 1
+        plies += len(record)
+        key = str(record.winner) if record.winner is not None else record.reason
+        wins[key] = wins.get(key, 0) + 1
+    elapsed = time.perf_counter() - start
+    stored = sum(p.stat().st_size for p in segment_paths(source)) if Path(source).is_dir() else Path(source).stat().st_size
+    print(f"{games} games, {plies} plies, {stored} bytes ({stored / max(1, plies):.2f} bytes/ply)")
+    print("results: " + ", ".join(f"{k}: {v}" for k, v in sorted(wins.items())))
+    print(f"scanned in {elapsed:.2f}s ({games / elapsed if elapsed else 0:.0f} games/s)")
+
+
+def _random_game(rng: random.Random, size: int, max_plies: int = 400) -> GameRecord:
+    controller = GameController(2, size=size)
+    while not controller.is_terminal() and len(controller.moves) < max_plies:
+        p = controller.current_player()
+        board = controller.board
+        if p.walls_remaining and rng.random() < 0.3:
+            walls = list(board.legal_walls())
+            if walls:
+                controller.play(Action.wall(rng.choice(walls)))
+                continue
+        moves = board.legal_pawn_moves(p.id)
+        target = min(moves, key=lambda t: board.distance_to_goal(p.id, t)) if rng.random() < 0.7 else rng.choice(moves)
+        controller.play(Action.move(target))
+    return GameRecord.from_controller(controller, None if controller.is_terminal() else "max-plies")
+
+
+def _bench(games: int, size: int) -> None:
+    import tempfile
+
+    rng = random.Random(0)
+    samples = [_random_game(rng, size).encode() for _ in range(50)]
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        with RecordLog(directory, segment_bytes=16 << 20) as log:
+            for i in range(games):
+                log.append_raw(samples[i % len(samples)])
+        write_s = time.perf_counter() - start
+        segments = segment_paths(directory)
+        stored = sum(p.stat().st_size for p in segments)
+        start = time.perf_counter()
+        plies = sum(len(record) for record in iter_records(directory))
+        scan_s = time.perf_counter() - start
+        start = time.perf_counter()
+        decoded = sum(len(record.actions()) for _, record in zip(range(10_000), iter_records(directory)))
+        decode_s = time.perf_counter() - start
+    print(
+        f"{games} games, {plies} plies in {len(segments)} segments, "
+        f"{stored / 1e6:.1f} MB ({stored / plies:.2f} bytes/ply)"
+    )
+    print(f"write {games / write_s:.0f} games/s, scan {games / scan_s:.0f} games/s, "
+          f"decode {decoded / decode_s:.0f} plies/s")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Quoridor game records")
+    sub = parser.add_subparsers(dest="command", required=True)
+    s = sub.add_parser("stats", help="count games, plies and results in a log")
+    s.add_argument("source")
+    show = sub.add_parser("show", help="print one game in text notation")
+    show.add_argument("source")
+    show.add_argument("--game", type=int, default=0)
+    e = sub.add_parser("export", help="write every game as text notation to stdout")
+    e.add_argument("source")
+    i = sub.add_parser("import", help="append games in text notation to a log")
+    i.add_argument("text")
+    i.add_argument("directory")
+    b = sub.add_parser("bench", help="time appending and scanning a synthetic log")
+    b.add_argument("--games", type=int, default=100_000)
+    b.add_argument("--size", type=int, default=BOARD_SIZE)
+    args = parser.parse_args(argv)
+
+    if args.command == "stats":
+        _stats(args.source)
+    elif args.command == "show":
+        for n, record in enumerate(iter_records(args.source)):
+            if n == args.game:
+                print(to_notation(record))
+                break
+        else:
+            sys.exit(f"no game {args.game} in {args.source}")
+    elif args.command == "export":
+        for record in iter_records(args.source):
+            print(to_notation(record))
+    elif args.command == "import":
+        count = 0
+        with open(args.text, "r", encoding="utf-8") as f, RecordLog(args.directory) as log:
+            for line in f:
+                if line.strip():
+                    log.append(from_notation(line))
+                    count += 1
+        print(f"Imported {count} games into {args.directory}")
+    else:
+        _bench(args.games, args.size)
+
+
+if __name__ == "__main__":
+    main()
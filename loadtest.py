@@ -0,0 +1,182 @@
+"""Load-test client for server.py: N bot connections playing concurrently.
+
+Usage::
+
+    python loadtest.py --spawn --bots 500            # in-process server, throwaway database
+    python loadtest.py --port 7878 --bots 200 --players 4 --games 3
+
+Each bot logs in (signing up on first use), queues, mirrors the game locally
+to pick legal actions, and measures the time from sending an action until
+the server echoes it back.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ai import greedy_action
+from auth import AuthManager
+from entities import Action
+from game import GameController
+from server import DEFAULT_PORT, GameServer
+
+
+class LoadStats:
+    def __init__(self) -> None:
+        self.connected = 0
+        self.games = 0
+        self.moves = 0
+        self.errors = 0
+        self.latencies_ns: List[int] = []
+
+    def to_dict(self, elapsed: float) -> Dict[str, Any]:
+        samples = sorted(self.latencies_ns)
+
+        def pct(q: float) -> float:
+            return round(samples[min(len(samples) - 1, int(len(samples) * q))] / 1000, 1) if samples else 0.0
+
+        return {
+            "connected": self.connected,
+            "games": self.games,
+            "moves": self.moves,
+            "errors": self.errors,
+            "seconds": round(elapsed, 3),
+            "moves_per_sec": round(self.moves / elapsed, 1) if elapsed else 0.0,
+            "rtt_p50_us": pct(0.5),
+            "rtt_p99_us": pct(0.99),
+        }
+
+
+async def run_bot(
+    index: int, host: str, port: int, players: int, games: int, wall_rate: float, stats: LoadStats
+) -> None:
+    rng = random.Random(index)
+    reader, writer = await asyncio.open_connection(host, port)
+    stats.connected += 1
+
+    async def send(line: str) -> None:
+        writer.write(line.encode("utf-8") + b"\n")
+        await writer.drain()
+
+    async def receive() -> str:
+        raw = await reader.readline()
+        if not raw:
+            raise ConnectionError("server closed the connection")
+        return raw.decode("utf-8").strip()
+
+    try:
+        await receive()  # HELLO
+        name = f"loadbot{index}"
+        await send(f"LOGIN {name} pw")
+        if (await receive()).startswith("ERR"):
+            await send(f"SIGNUP {name} pw")
+            if (await receive()).startswith("ERR"):
+                stats.errors += 1
+                return
+
+        for _ in range(games):
+            await send(f"PLAY {players}")
+            controller: Optional[GameController] = None
+            me = 0
+            sent_at = 0
+            while True:
+                line = await receive()
+                kind, _, rest = line.partition(" ")
+                if kind == "START":
+                    _, pid, count, _ = rest.split()
+                    me, controller = int(pid), GameController(int(count))
+                elif kind == "TURN" and controller is not None and int(rest) == me:
+                    action = _choose(controller, me, rng, wall_rate)
+                    sent_at = time.perf_counter_ns()
+                    await send(str(action))
+                elif kind == "PLAYED" and controller is not None:
+                    pid, _, text = rest.partition(" ")
+                    controller.play(Action.parse(text))
+                    if int(pid) == me:
+                        stats.latencies_ns.append(time.perf_counter_ns() - sent_at)
+                        stats.moves += 1
+                elif kind == "END":
+                    stats.games += 1
+                    break
+                elif kind == "ERR":
+                    stats.errors += 1
+        await send("QUIT")
+    except (ConnectionError, OSError):
+        stats.errors += 1
+    finally:
+        writer.close()
+
+
+def _choose(controller: GameController, me: int, rng: random.Random, wall_rate: float) -> Action:
+    board = controller.board
+    if board.players[me].walls_remaining and rng.random() < wall_rate:
+        walls = list(board.legal_walls())
+        if walls:
+            return Action.wall(rng.choice(walls))
+    return greedy_action(board, me)
+
+
+async def _server_stats(host: str, port: int) -> Dict[str, Any]:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        await reader.readline()
+        writer.write(b"STATS\n")
+        line = (await reader.readline()).decode("utf-8")
+        return json.loads(line.partition(" ")[2])
+    finally:
+        writer.close()
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    server: Optional[GameServer] = None
+    tmp: Optional[tempfile.TemporaryDirectory] = None
+    port = args.port
+    if args.spawn:
+        from sqlite_store import SqliteBackend
+
+        tmp = tempfile.TemporaryDirectory()
+        server = GameServer(AuthManager(SqliteBackend(Path(tmp.name) / "load.db")))
+        await server.start(args.host, 0)
+        port = server.port
+
+    stats = LoadStats()
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            run_bot(i, args.host, port, args.players, args.games, args.wall_rate, stats)
+            for i in range(args.bots)
+        ))
+        elapsed = time.perf_counter() - start
+        report = {"client": stats.to_dict(elapsed), "server": await _server_stats(args.host, port)}
+    finally:
+        if server is not None:
+            await server.stop()
+            server.auth.close()
+        if tmp is not None:
+            tmp.cleanup()
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Quoridor server load test")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--spawn", action="store_true", help="run a server in this process")
+    parser.add_argument("--bots", type=int, default=100)
+    parser.add_argument("--players", type=int, choices=(2, 4), default=2)
+    parser.add_argument("--games", type=int, default=1, help="games per bot")
+    parser.add_argument("--wall-rate", type=float, default=0.1)
+    args = parser.parse_args(argv)
+    json.dump(asyncio.run(run(args)), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
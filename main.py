@@ -1,85 +1,71 @@
-import json
+import argparse
+import os
+from typing import List, Optional
+
+import telemetry
 from auth import AuthManager
-from game import GameController
+from game import BOARD_SIZES, GameController
+from gamerecord import RECORDS_ENV, RecordLog
+from profiler import Profiler
+from terminal import TerminalClient
 from ui import UI, Theme
 
-# #region agent log
-LOG_PATH = "/Users/amirali/PycharmProjects/Quoridor G/.cursor/debug.log"
-def _log(session_id, run_id, hypothesis_id, location, message, data):
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Quoridor in the terminal")
+    parser.add_argument(
+        "--profile", nargs="?", const="profile", default=None, metavar="PREFIX",
+        help="profile engine, UI and storage; writes PREFIX.json and PREFIX.folded at exit",
+    )
+    args = parser.parse_args(argv)
+    profiler = Profiler().install() if args.profile else None
     try:
-        with open(LOG_PATH, "a") as f:
-            f.write(json.dumps({"sessionId": session_id, "runId": run_id, "hypothesisId": hypothesis_id, "location": location, "message": message, "data": data, "timestamp": __import__("time").time() * 1000}) + "\n")
-    except: pass
-# #endregion
+        run_menu()
+    finally:
+        if profiler is not None:
+            profiler.finish(args.profile)
 
-def main() -> None:
-    # #region agent log
-    _log("debug-session", "run1", "A", "main.py:main", "main() entry", {})
-    # #endregion
-    ui = UI()
+
+def run_menu() -> None:
     auth = AuthManager()
+    ui = UI(auth)
+    # Set QUORIDOR_RECORDS to a directory to keep every game as a binary record
+    records_dir = os.environ.get(RECORDS_ENV)
+    records = RecordLog(records_dir) if records_dir else None
 
     current_user = None
 
     while True:
-        # #region agent log
-        _log("debug-session", "run1", "A", "main.py:main_loop", "before main_menu()", {"current_user": current_user})
-        # #endregion
         choice = ui.main_menu()
-        # #region agent log
-        _log("debug-session", "run1", "A", "main.py:main_loop", "after main_menu()", {"choice": choice})
-        # #endregion
+        telemetry.event("menu.choice", choice=choice, logged_in=current_user is not None)
 
         if choice == "1":
             if current_user is None:
                 ui.print_message("Please log in or sign up first.", error=True)
                 continue
-            # #region agent log
-            _log("debug-session", "run1", "B", "main.py:choice_1", "before choose_game_mode()", {"current_user": current_user})
-            # #endregion
-            mode = ui.choose_game_mode()
-            # #region agent log
-            _log("debug-session", "run1", "B", "main.py:choice_1", "after choose_game_mode()", {"mode": mode})
-            # #endregion
-            if mode is None:
+            setup = ui.choose_game_mode()
+            if setup is None:
                 continue
-            # #region agent log
-            _log("debug-session", "run1", "B", "main.py:choice_1", "before GameController()", {"mode": mode, "current_user": current_user})
-            # #endregion
-            controller = GameController(ui, auth, current_user, mode)
-            # #region agent log
-            _log("debug-session", "run1", "B", "main.py:choice_1", "after GameController()", {})
-            # #endregion
-            controller.run()
+            mode, seats = setup
+            size = ui.choose_board_size(BOARD_SIZES)
+            controller = GameController(mode, seats, bot_workers=os.cpu_count() or 1, size=size)
+            try:
+                TerminalClient(controller, ui, auth, current_user, records).run()
+            finally:
+                controller.close()
         elif choice == "2":
-            # #region agent log
-            _log("debug-session", "run1", "A", "main.py:choice_2", "before show_how_to_play()", {})
-            # #endregion
             ui.show_how_to_play()
-            # #region agent log
-            _log("debug-session", "run1", "A", "main.py:choice_2", "after show_how_to_play()", {})
-            # #endregion
-            # #region agent log
-            _log("debug-session", "run1", "A", "main.py:choice_2", "waiting for input before loop continues", {})
-            # #endregion
             input(f"{Theme.FG_CYAN}Press Enter to return to menu...{Theme.RESET}")
         elif choice == "3":
-            # #region agent log
-            _log("debug-session", "run1", "A", "main.py:choice_3", "before show_leaderboard()", {})
-            # #endregion
             ui.show_leaderboard()
-            # #region agent log
-            _log("debug-session", "run1", "A", "main.py:choice_3", "after show_leaderboard()", {})
-            # #endregion
-            # #region agent log
-            _log("debug-session", "run1", "A", "main.py:choice_3", "waiting for input before loop continues", {})
-            # #endregion
-            input(f"{Theme.FG_CYAN}Press Enter to return to menu...{Theme.RESET}")
         elif choice == "4":
             current_user = auth.signup(ui)
         elif choice == "5":
             current_user = auth.login(ui)
         elif choice == "6":
+            auth.close()
+            if records is not None:
+                records.close()
             ui.print_message("Goodbye!")
             break
         else:
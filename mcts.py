@@ -0,0 +1,458 @@
+"""Monte Carlo tree search bot with tree reuse and process-pool root parallelism.
+
+Usage::
+
+    python mcts.py                       # playouts/sec on the opening, 1 and all cores
+    python mcts.py --budget 2000 --workers 4
+
+Each iteration walks the tree with UCT, expands one action, plays a fast
+rollout biased toward shortest-path steps and credits the winner up the
+path. With ``workers > 1`` the same position is searched independently in
+that many processes (the bot's own reused tree being one of them) and the
+root visit counts are summed before the most visited action is played.
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from ai import greedy_action, make_action, tablebase_summary, unmake_action
+from board import Board
+from book import OpeningBook
+from entities import Action, Player, Wall
+from tablebase import Tablebase
+import telemetry
+
+
+EXPLORATION = 1.4  # UCT exploration constant
+ROLLOUT_PLIES = 4  # rollouts still running after this are scored by race_rewards
+RACE_SCALE = 0.7  # logistic slope of a cut-off rollout's reward per ply of lead
+WALL_VALUE = 0.3  # plies of lead credited per wall in hand
+ROLLOUT_RANDOM = 0.15  # chance of a random pawn step instead of the shortest-path one
+ROLLOUT_WALL = 0.05  # chance of a wall on the leader's path when one is in hand
+DEFAULT_MAX_NODES = 250_000  # expansion stops here; rollouts still run from the leaves
+WORKER_MARGIN = 0.1  # fraction of the budget pool workers leave for sending their counts back
+
+# Board snapshot sent to pool workers:
+# (size, [(id, name, position, walls_remaining, goal)], [(row, col, horizontal)])
+Snapshot = Tuple[int, List[Tuple[int, str, Tuple[int, int], int, FrozenSet[Tuple[int, int]]]], List[Tuple[int, int, bool]]]
+
+
+@dataclass
+class MCTSStats:
+    playouts: int = 0
+    elapsed: float = 0.0  # seconds
+    tree_nodes: int = 0  # nodes in the bot's own tree after the search
+    tree_bytes: int = 0  # approximate memory held by that tree
+    reused_visits: int = 0  # visits carried over from the previous turn's tree
+    workers: int = 1
+    late_workers: int = 0  # pool workers whose counts missed the deadline and were dropped
+    depth: int = 0  # deepest node in the bot's own tree
+    book: bool = False  # the move came from the opening book
+    tablebase: Optional[int] = None  # table value when the move came from the endgame tablebase
+
+    @property
+    def playouts_per_second(self) -> float:
+        return self.playouts / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        if self.book:
+            return "book move"
+        if self.tablebase is not None:
+            return tablebase_summary(self.tablebase)
+        late = f", dropped {self.late_workers} late worker{'s' if self.late_workers > 1 else ''}" if self.late_workers else ""
+        return (
+            f"{self.playouts} playouts, {self.playouts_per_second:.0f} playouts/s, "
+            f"tree {self.tree_nodes} nodes / {self.tree_bytes / 1024:.0f} KiB{late}"
+        )
+
+
+class _Node:
+    __slots__ = ("action", "mover", "to_move", "key", "winner", "children", "untried", "visits", "wins")
+
+    def __init__(self, action: Optional[Action], mover: int, to_move: int, key: int, winner: Optional[int]) -> None:
+        self.action = action
+        self.mover = mover  # player who played ``action`` to reach this node
+        self.to_move = to_move
+        self.key = key  # Board.position_key(to_move), for finding the node again next turn
+        self.winner = winner  # set on terminal nodes
+        self.children: List[_Node] = []
+        self.untried: Optional[List[Action]] = None  # generated on first visit
+        self.visits = 0
+        self.wins = 0.0  # playouts won by ``mover``
+
+    def size_bytes(self) -> int:
+        size = sys.getsizeof(self) + sys.getsizeof(self.children)
+        if self.untried is not None:
+            size += sys.getsizeof(self.untried)
+        return size
+
+
+def snapshot(board: Board) -> Snapshot:
+    players = [(p.id, p.name, p.position, p.walls_remaining, p.goal) for p in board.players.values()]
+    return board.size, players, [(w.row, w.col, w.horizontal) for w in board.walls]
+
+
+def board_from_snapshot(snap: Snapshot) -> Board:
+    size, players, walls = snap
+    board = Board([Player(*p) for p in players], size)
+    for row, col, horizontal in walls:
+        board.add_wall(Wall(row, col, horizontal))
+    return board
+
+
+class MCTSBot:
+    """UCT search over ``Board`` make/unmake with shortest-path-biased rollouts.
+
+    Works for any number of players: every node records wins for the player
+    who moved into it. The subtree under the played move is kept and, on the
+    next call, searched for the position the opponents left behind.
+    """
+
+    kind = "mcts"
+
+    def __init__(
+        self,
+        time_budget_ms: int = 1000,
+        workers: int = 1,
+        exploration: float = EXPLORATION,
+        max_nodes: int = DEFAULT_MAX_NODES,
+        seed: Optional[int] = None,
+        book: Optional[OpeningBook] = None,
+        tablebase: Optional[Tablebase] = None,
+        pool: Optional[ProcessPoolExecutor] = None,
+    ) -> None:
+        self.time_budget_ms = time_budget_ms
+        self.book = book
+        self.tablebase = tablebase
+        self.workers = max(1, workers)
+        self.exploration = exploration
+        self.max_nodes = max_nodes
+        self.rng = random.Random(seed)
+        self.last_stats = MCTSStats()
+        self._root: Optional[_Node] = None
+        self._nodes = 0
+        # Seats that never search at the same time can share one pool (of at
+        # least ``workers - 1`` processes); the bot only shuts down a pool it created
+        self._pool: Optional[ProcessPoolExecutor] = pool
+        self._owns_pool = pool is None
+
+    # --------- Public API ---------
+    def choose_action(self, board: Board, player_id: int) -> Action:
+        if self.book is not None:
+            action = self.book.move(board, player_id)
+            if action is not None:
+                self._root = None
+                self.last_stats = MCTSStats(book=True)
+                return action
+        start = time.perf_counter()
+        if self.tablebase is not None:
+            # A table that cannot be built within the budget is skipped: search instead
+            hit = self.tablebase.probe(board, player_id, start + self.time_budget_ms / 1000.0)
+            if hit is not None:
+                self._root = None
+                self.last_stats = MCTSStats(tablebase=hit[1], elapsed=time.perf_counter() - start)
+                return hit[0]
+        stats = MCTSStats(workers=self.workers)
+        order = sorted(board.players)
+        root = self._reuse_root(board, player_id, len(order))
+        stats.reused_visits = root.visits
+
+        budget = self.time_budget_ms / 1000.0
+        deadline = start + budget
+        futures = []
+        if self.workers > 1:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers - 1)
+            snap = snapshot(board)
+            # One absolute deadline for every process (the monotonic clock is
+            # system-wide), so time spent starting a worker comes out of its search
+            worker_deadline = time.monotonic() + budget * (1.0 - WORKER_MARGIN) - (time.perf_counter() - start)
+            futures = [
+                self._pool.submit(
+                    _search_worker, snap, player_id, worker_deadline, self.exploration,
+                    self.max_nodes, self.rng.randrange(1 << 30),
+                )
+                for _ in range(self.workers - 1)
+            ]
+
+        stats.playouts = _search(board, root, order, deadline, self.exploration, self.max_nodes, self.rng, self)
+
+        # Root parallelism: merge every tree's visit counts per root action;
+        # workers that have not reported by the deadline are left out
+        totals: Dict[Action, int] = {child.action: child.visits for child in root.children}
+        if futures:
+            done, late = wait(futures, timeout=max(0.0, deadline - time.perf_counter()))
+            for future in late:
+                future.cancel()
+            stats.late_workers = len(late)
+            for future in done:
+                playouts, visits = future.result()
+                stats.playouts += playouts
+                for action, count in visits:
+                    totals[action] = totals.get(action, 0) + count
+
+        if totals:
+            best = max(totals, key=totals.__getitem__)
+        else:
+            best = greedy_action(board, player_id)
+        chosen = next((c for c in root.children if c.action == best), None)
+        self._root = chosen
+
+        stats.elapsed = time.perf_counter() - start
+        stats.tree_nodes, stats.tree_bytes, stats.depth = _measure(root)
+        self.last_stats = stats
+        if telemetry.ENABLED:
+            telemetry.get().record_span(
+                "search.mcts",
+                int(stats.elapsed * 1e9),
+                {"playouts": stats.playouts, "tree_nodes": stats.tree_nodes, "workers": stats.workers},
+            )
+        return best
+
+    def close(self) -> None:
+        if self._pool is not None and self._owns_pool:
+            self._pool.shutdown()
+        self._pool = None
+
+    # --------- Tree reuse ---------
+    def _reuse_root(self, board: Board, player_id: int, players: int) -> _Node:
+        """Find this position under last turn's chosen move, or start a new tree."""
+        key = board.position_key(player_id)
+        found: Optional[_Node] = None
+        if self._root is not None:
+            # The opponents have moved since: look up to one full round deep
+            layer = [self._root]
+            for _ in range(players):
+                found = next((n for n in layer if n.key == key and n.to_move == player_id), None)
+                if found is not None:
+                    break
+                layer = [child for n in layer for child in n.children]
+        self._root = None
+        if found is None:
+            self._nodes = 1
+            return _Node(None, 0, player_id, key, None)
+        self._nodes, _, _ = _measure(found)
+        return found
+
+
+# --------- Search ---------
+def _next_player(order: List[int], pid: int) -> int:
+    return order[(order.index(pid) + 1) % len(order)]
+
+
+def _candidate_actions(board: Board, pid: int, order: List[int], rng: random.Random) -> List[Action]:
+    """Pawn moves plus legal walls on an opponent's shortest path, best guess last."""
+    actions: List[Action] = []
+    if board.players[pid].walls_remaining > 0:
+        path_h = path_v = 0
+        for other in order:
+            if other != pid:
+                h, v = board.path_grooves(other)
+                path_h |= h
+                path_v |= v
+        actions = [Action.wall(w) for w in board.legal_walls((path_h, path_v))]
+        rng.shuffle(actions)
+    moves = sorted(board.legal_pawn_moves(pid), key=lambda t: -board.distance_to_goal(pid, t))
+    # Pawn steps are expanded first (popped from the end), closest to goal first
+    actions.extend(Action.move(t) for t in moves)
+    return actions
+
+
+def _search(
+    board: Board,
+    root: _Node,
+    order: List[int],
+    deadline: float,
+    exploration: float,
+    max_nodes: int,
+    rng: random.Random,
+    owner: Optional[MCTSBot] = None,
+) -> int:
+    """Run UCT iterations on ``root`` until ``deadline``; returns the playouts made."""
+    playouts = 0
+    nodes = owner._nodes if owner is not None else 1
+    clock = time.perf_counter
+    while True:
+        if clock() >= deadline:
+            break
+        node = root
+        path = [root]
+        applied: List[Tuple[int, Action, Optional[Tuple[int, int]]]] = []
+        try:
+            # Selection
+            while node.winner is None and node.untried is not None and not node.untried and node.children:
+                log_n = math.log(node.visits)
+                node = max(
+                    node.children,
+                    key=lambda c: c.wins / c.visits + exploration * math.sqrt(log_n / c.visits),
+                )
+                applied.append((node.mover, node.action, make_action(board, node.mover, node.action)))
+                path.append(node)
+
+            # Expansion
+            if node.winner is None:
+                if node.untried is None:
+                    node.untried = _candidate_actions(board, node.to_move, order, rng)
+                if node.untried and nodes < max_nodes:
+                    action = node.untried.pop()
+                    mover = node.to_move
+                    applied.append((mover, action, make_action(board, mover, action)))
+                    nxt = _next_player(order, mover)
+                    child = _Node(
+                        action, mover, nxt, board.position_key(nxt),
+                        mover if board.at_goal(mover) else None,
+                    )
+                    node.children.append(child)
+                    nodes += 1
+                    node = child
+                    path.append(node)
+
+            # Simulation
+            if node.winner is not None:
+                rewards = {node.winner: 1.0}
+            else:
+                rewards = _rollout(board, node.to_move, order, rng, applied)
+        finally:
+            for mover, action, previous in reversed(applied):
+                unmake_action(board, mover, action, previous)
+
+        # Backpropagation
+        for n in path:
+            n.visits += 1
+            n.wins += rewards.get(n.mover, 0.0)
+        playouts += 1
+    if owner is not None:
+        owner._nodes = nodes
+    return playouts
+
+
+def _rollout(
+    board: Board,
+    to_move: int,
+    order: List[int],
+    rng: random.Random,
+    applied: List[Tuple[int, Action, Optional[Tuple[int, int]]]],
+) -> Dict[int, float]:
+    """Play up to ROLLOUT_PLIES fast semi-greedy moves; ``applied`` collects them for unmaking.
+
+    Returns each player's reward in [0, 1]: 1 for the winner of a finished
+    rollout, else the ``race_rewards`` estimate.
+    """
+    pid = to_move
+    for _ in range(ROLLOUT_PLIES):
+        action: Optional[Action] = None
+        if board.players[pid].walls_remaining > 0 and rng.random() < ROLLOUT_WALL:
+            action = _rollout_wall(board, pid, order, rng)
+        if action is None:
+            moves = board.legal_pawn_moves(pid)
+            if rng.random() < ROLLOUT_RANDOM:
+                target = rng.choice(moves)
+            else:
+                target = min(moves, key=lambda t: board.distance_to_goal(pid, t))
+            action = Action.move(target)
+        applied.append((pid, action, make_action(board, pid, action)))
+        if action.kind == "m" and board.at_goal(pid):
+            return {pid: 1.0}
+        pid = _next_player(order, pid)
+    return race_rewards(board, order, pid)
+
+
+def race_rewards(board: Board, order: List[int], to_move: int) -> Dict[int, float]:
+    """Estimated win chance of each player from a pure pawn race.
+
+    A player's lead is how many plies earlier than the best opponent it would
+    arrive if nobody placed another wall (walls in hand count a little); the
+    reward is a logistic of that lead.
+    """
+    count = len(order)
+    start = order.index(to_move)
+    arrival = {}
+    for offset in range(count):
+        p = order[(start + offset) % count]
+        player = board.players[p]
+        # Plies until this pawn would arrive, moving in turn order
+        arrival[p] = (board.distance_to_goal(p) - 1) * count + offset - WALL_VALUE * count * player.walls_remaining
+    rewards = {}
+    for p in order:
+        lead = min(arrival[q] for q in order if q != p) - arrival[p]
+        rewards[p] = 1.0 / (1.0 + math.exp(-RACE_SCALE * lead / count))
+    return rewards
+
+
+def _rollout_wall(board: Board, pid: int, order: List[int], rng: random.Random) -> Optional[Action]:
+    """A random legal wall cutting the leading opponent's shortest path, if one is found quickly."""
+    leader = min((p for p in order if p != pid), key=board.distance_to_goal)
+    path_h, path_v = board.path_grooves(leader)
+    free_h, free_v = board.free_groove_masks()
+    candidates = [(True, path_h & free_h), (False, path_v & free_v)]
+    g = board.size - 1
+    for horizontal, mask in rng.sample(candidates, 2):
+        bits = [i for i in range(g * g) if mask >> i & 1]
+        rng.shuffle(bits)
+        for bit in bits[:3]:
+            wall = Wall(bit // g, bit % g, horizontal)
+            if board.can_place_wall(wall):
+                return Action.wall(wall)
+    return None
+
+
+def _measure(root: _Node) -> Tuple[int, int, int]:
+    """(node count, approximate bytes, depth) of a tree."""
+    count = size = depth = 0
+    stack = [(root, 0)]
+    while stack:
+        node, d = stack.pop()
+        count += 1
+        size += node.size_bytes()
+        depth = max(depth, d)
+        stack.extend((child, d + 1) for child in node.children)
+    return count, size, depth
+
+
+def _search_worker(
+    snap: Snapshot, player_id: int, deadline: float, exploration: float, max_nodes: int, seed: int
+) -> Tuple[int, List[Tuple[Action, int]]]:
+    """Pool task: search a fresh tree until ``deadline`` (``time.monotonic()``), return (playouts, root visits)."""
+    board = board_from_snapshot(snap)
+    order = sorted(board.players)
+    root = _Node(None, 0, player_id, board.position_key(player_id), None)
+    # _search compares against perf_counter; convert the shared deadline to this process's clock
+    deadline = time.perf_counter() + (deadline - time.monotonic())
+    playouts = _search(board, root, order, deadline, exploration, max_nodes, random.Random(seed))
+    return playouts, [(child.action, child.visits) for child in root.children]
+
+
+# --------- Benchmark ---------
+def _benchmark(budget_ms: int, worker_counts: List[int]) -> None:
+    from game import create_players
+
+    for mode in (2, 4):
+        for workers in worker_counts:
+            board = Board(list(create_players(mode).values()))
+            bot = MCTSBot(time_budget_ms=budget_ms, workers=workers, seed=0)
+            try:
+                bot.choose_action(board, 1)  # start the pool and warm up
+                action = bot.choose_action(board, 1)
+            finally:
+                bot.close()
+            print(f"{mode}p workers={workers:2} best={action} {bot.last_stats.summary()}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="MCTS bot throughput")
+    parser.add_argument("--budget", type=int, default=1000, help="milliseconds per move")
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, os.cpu_count() or 1])
+    args = parser.parse_args(argv)
+    _benchmark(args.budget, sorted(set(args.workers)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Opt-in profiling: call counts, latency histograms and BFS work per operation.
+
+``python3 main.py --profile`` and ``python3 selfplay.py --profile`` install the
+profiler before anything runs and, at exit, print a summary and write
+``<prefix>.json`` plus ``<prefix>.folded`` (collapsed stacks for
+flamegraph.pl / speedscope). Nothing is patched unless profiling is
+requested, so normal runs pay nothing.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+from board import Board
+
+
+# Upper bounds (microseconds) of the latency histogram buckets; the last bucket is open
+BUCKET_BOUNDS_US: Tuple[float, ...] = (
+    1, 2, 5, 10, 20, 50, 100, 200, 500, 1_000, 2_000, 5_000, 10_000, 50_000, 100_000, 1_000_000,
+)
+BUCKET_LABELS = [f"<={b:g}" for b in BUCKET_BOUNDS_US] + [f">{BUCKET_BOUNDS_US[-1]:g}"]
+
+
+@dataclass
+class OpStats:
+    calls: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+    nodes: int = 0  # BFS / distance-repair cells expanded, including nested calls
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(BUCKET_BOUNDS_US) + 1))
+
+    def add(self, elapsed_ns: int, nodes: int) -> None:
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        self.max_ns = max(self.max_ns, elapsed_ns)
+        self.nodes += nodes
+        us = elapsed_ns / 1000
+        for i, bound in enumerate(BUCKET_BOUNDS_US):
+            if us <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile_us(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        if not self.calls:
+            return 0.0
+        target = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return float(BUCKET_BOUNDS_US[i]) if i < len(BUCKET_BOUNDS_US) else self.max_ns / 1000
+        return self.max_ns / 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total_ns / 1e6, 3),
+            "mean_us": round(self.total_ns / self.calls / 1000, 3) if self.calls else 0.0,
+            "p50_us": self.percentile_us(0.5),
+            "p99_us": self.percentile_us(0.99),
+            "max_us": round(self.max_ns / 1000, 3),
+            "nodes": self.nodes,
+            "nodes_per_call": round(self.nodes / self.calls, 2) if self.calls else 0.0,
+            "histogram_us": {label: n for label, n in zip(BUCKET_LABELS, self.buckets) if n},
+        }
+
+
+class _Frame:
+    __slots__ = ("name", "start", "child_ns", "nodes")
+
+    def __init__(self, name: str, start: int) -> None:
+        self.name = name
+        self.start = start
+        self.child_ns = 0
+        self.nodes = 0
+
+
+class Profiler:
+    """Wraps selected methods to time them and attribute BFS work to the caller.
+
+    Each thread keeps a stack of active operations; a call's self time (its
+    duration minus nested profiled calls) goes into the collapsed-stack
+    table, and node counts flow up to every enclosing operation.
+    """
+
+    def __init__(self) -> None:
+        self.ops: Dict[str, OpStats] = {}
+        self.stacks: Dict[str, int] = {}  # "outer;inner" -> self time in ns
+        self.untracked_nodes = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._patches: List[Tuple[Any, str, Any]] = []
+
+    # --------- Recording ---------
+    def _stack(self) -> List[_Frame]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def count_nodes(self, n: int) -> None:
+        stack = self._stack()
+        if stack:
+            stack[-1].nodes += n
+        else:
+            self.untracked_nodes += n
+
+    def _wrap(self, fn: Callable[..., Any], name: str) -> Callable[..., Any]:
+        clock = time.perf_counter_ns
+
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            stack = self._stack()
+            frame = _Frame(name, clock())
+            stack.append(frame)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = clock() - frame.start
+                stack.pop()
+                key = ";".join(f.name for f in stack) + ";" + name if stack else name
+                if stack:
+                    stack[-1].child_ns += elapsed
+                    stack[-1].nodes += frame.nodes
+                with self._lock:
+                    stats = self.ops.get(name)
+                    if stats is None:
+                        stats = self.ops[name] = OpStats()
+                    stats.add(elapsed, frame.nodes)
+                    self.stacks[key] = self.stacks.get(key, 0) + elapsed - frame.child_ns
+
+        return wrapper
+
+    # --------- Installation ---------
+    def instrument(self, owner: Any, attr: str, name: Optional[str] = None) -> None:
+        original = owner.__dict__[attr]
+        self._patches.append((owner, attr, original))
+        setattr(owner, attr, self._wrap(original, name or f"{owner.__name__}.{attr}"))
+
+    def _patch(self, owner: Any, attr: str, replacement: Callable[..., Any]) -> None:
+        self._patches.append((owner, attr, owner.__dict__[attr]))
+        setattr(owner, attr, replacement)
+
+    def install(self) -> "Profiler":
+        """Instrument the engine, UI and persistence entry points."""
+        from ai import AlphaBetaBot
+        from auth import AuthManager
+        from game import GameController
+        from sqlite_store import SqliteBackend
+        from storage import JsonBackend, WriteBehindStore
+        from ui import UI
+
+        self._count_bfs_work()
+        self.instrument(Board, "can_place_wall")
+        self.instrument(Board, "_keeps_paths")
+        self.instrument(Board, "legal_wall_masks")
+        self.instrument(Board, "neighbors")
+        self.instrument(GameController, "play")
+        self.instrument(GameController, "undo")
+        self.instrument(GameController, "redo")
+        self.instrument(AlphaBetaBot, "choose_action")
+        self.instrument(UI, "render_board")
+        self.instrument(AuthManager, "record_game_result")
+        self.instrument(AuthManager, "signup")
+        for backend in (JsonBackend, SqliteBackend):
+            for attr in ("add_user", "ensure_player", "record_results", "flush"):
+                self.instrument(backend, attr)
+        self.instrument(WriteBehindStore, "_write_pending", "WriteBehindStore.write")
+        return self
+
+    def _count_bfs_work(self) -> None:
+        """Swap Board's search primitives for versions that report cells expanded."""
+        profiler = self
+        adjacent = Board.__dict__["_adjacent"]
+        expand = Board.__dict__["expand"]
+
+        def counting_adjacent(board: Board, i: int) -> List[int]:
+            profiler.count_nodes(1)
+            return adjacent(board, i)
+
+        def counting_expand(board: Board, frontier: int) -> int:
+            profiler.count_nodes(frontier.bit_count())
+            return expand(board, frontier)
+
+        self._patch(Board, "_adjacent", counting_adjacent)
+        self._patch(Board, "expand", counting_expand)
+
+    def uninstall(self) -> None:
+        for owner, attr, original in reversed(self._patches):
+            setattr(owner, attr, original)
+        self._patches.clear()
+
+    # --------- Output ---------
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "operations": {name: s.to_dict() for name, s in sorted(self.ops.items())},
+                "untracked_nodes": self.untracked_nodes,
+            }
+
+    def collapsed(self) -> str:
+        """Collapsed stacks (``a;b;c <microseconds>``) of self time per call path."""
+        with self._lock:
+            lines = [f"{key} {ns // 1000}" for key, ns in sorted(self.stacks.items()) if ns >= 1000]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def report(self) -> str:
+        header = f"{'operation':34} {'calls':>8} {'total ms':>10} {'mean us':>9} {'p50 us':>8} {'p99 us':>8} {'nodes/call':>10}"
+        lines = [header, "═" * len(header)]
+        for name, s in sorted(self.summary()["operations"].items(), key=lambda kv: -kv[1]["total_ms"]):
+            lines.append(
+                f"{name:34} {s['calls']:>8} {s['total_ms']:>10.1f} {s['mean_us']:>9.1f} "
+                f"{s['p50_us']:>8g} {s['p99_us']:>8g} {s['nodes_per_call']:>10}"
+            )
+        return "\n".join(lines)
+
+    def write(self, prefix: str) -> Tuple[str, str]:
+        json_path, folded_path = f"{prefix}.json", f"{prefix}.folded"
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        with open(folded_path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        return json_path, folded_path
+
+    def finish(self, prefix: Optional[str], stream: Optional[TextIO] = None) -> None:
+        """Uninstall, print the summary and export it if ``prefix`` is given."""
+        self.uninstall()
+        print(self.report(), file=stream)
+        if prefix:
+            json_path, folded_path = self.write(prefix)
+            print(f"Profile written to {json_path} and {folded_path}", file=stream)
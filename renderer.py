@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import shutil
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, TextIO, Tuple, Union
+
+from board import Board
+from entities import Player
+
+
+RESET = "\033[0m"
+CLEAR = "\033[2J\033[H"
+CLEAR_BELOW = "\033[J"
+PROMPT_ROWS = 8  # lines kept free below the board for prompts and messages
+
+# A glyph is one dynamic piece of the frame, addressed by its 1-based screen (row, col)
+GlyphKey = Tuple[int, int]
+
+
+@dataclass
+class RenderStats:
+    frames: int = 0
+    full_redraws: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    last_bytes: int = 0
+    last_seconds: float = 0.0
+
+    @property
+    def bytes_per_frame(self) -> float:
+        return self.bytes / self.frames if self.frames else 0.0
+
+    @property
+    def ms_per_frame(self) -> float:
+        return self.seconds / self.frames * 1000 if self.frames else 0.0
+
+    def report(self) -> str:
+        return (
+            f"{self.frames} frames ({self.full_redraws} full), "
+            f"{self.bytes_per_frame:.0f} B/frame, {self.ms_per_frame:.3f} ms/frame"
+        )
+
+
+class BoardRenderer:
+    """Draws the board with cursor-addressed updates against the previous frame.
+
+    The static frame (title, borders, joints) is built once per board size.
+    Each frame recomputes only the glyphs that can have changed (wall slots
+    whose edge bit flipped since the last frame, and the squares pawns left
+    or entered), compares them with what is on screen and writes the ones
+    that differ, all in a single buffered write, so a frame costs the same
+    on any board size. A full redraw happens on the first frame, after
+    ``invalidate()`` (someone else cleared or scrolled the screen) and when
+    the terminal is resized or too short to keep the board in place.
+
+    Every frame clears the screen below the board, so messages meant to be
+    read with the next prompt (errors, the bot's last move, a hint) are
+    passed as ``status`` lines and written under the board after the clear.
+    """
+
+    def __init__(
+        self, theme, colors: List[str], out: Optional[TextIO] = None, stats: Optional[RenderStats] = None
+    ) -> None:
+        self.theme = theme
+        self.colors = colors
+        self.out = out if out is not None else sys.stdout
+        self.stats = stats if stats is not None else RenderStats()
+        self._size = 0
+        self._layout: List[List[Union[str, GlyphKey]]] = []
+        self._screen: Optional[Dict[GlyphKey, str]] = None
+        self._terminal: Optional[Tuple[int, int]] = None
+        # Board state the screen shows: blocked edge masks and pawn glyphs
+        self._down = 0
+        self._right = 0
+        self._pawns: Dict[GlyphKey, str] = {}
+
+    def invalidate(self) -> None:
+        """Forget what is on screen so the next frame is drawn in full."""
+        self._screen = None
+
+    # --------- Layout ---------
+    @staticmethod
+    def cell_key(r: int, c: int) -> GlyphKey:
+        return 6 + 2 * r, 5 + 3 * c
+
+    @staticmethod
+    def right_wall_key(r: int, c: int) -> GlyphKey:
+        return 6 + 2 * r, 7 + 3 * c
+
+    @staticmethod
+    def down_wall_key(r: int, c: int) -> GlyphKey:
+        return 7 + 2 * r, 5 + 3 * c
+
+    def _build_layout(self, size: int) -> None:
+        theme = self.theme
+        border = theme.BORDER
+        lines: List[List[Union[str, GlyphKey]]] = [
+            [""],
+            [f"{theme.HEADER}Board{RESET}"],
+            [f"{border}{'─' * len('Board')}{RESET}"],
+            ["    " + "".join(f"{c:<3}" for c in range(size)).rstrip()],
+            ["   " + border + "╔" + "╦".join(["══"] * size) + "╗" + RESET],
+        ]
+        for r in range(size):
+            row: List[Union[str, GlyphKey]] = [f"{r:2} {border}║{RESET}"]
+            for c in range(size):
+                row.append(self.cell_key(r, c))
+                row.append(self.right_wall_key(r, c) if c < size - 1 else f"{border}║{RESET}")
+            lines.append(row)
+            if r < size - 1:
+                edge: List[Union[str, GlyphKey]] = ["   " + border + "╠" + RESET]
+                for c in range(size):
+                    edge.append(self.down_wall_key(r, c))
+                    edge.append(f"{border}{'╬' if c < size - 1 else '╣'}{RESET}")
+                lines.append(edge)
+        lines.append(["   " + border + "╚" + "╩".join(["══"] * size) + "╝" + RESET])
+        self._layout = lines
+        self._size = size
+
+    @property
+    def height(self) -> int:
+        """Screen lines used by the board frame."""
+        return len(self._layout)
+
+    # --------- Frame state ---------
+    def _wall_styles(self) -> Tuple[str, str, str, str]:
+        """(wall under, open under, wall right, open right) glyphs."""
+        theme = self.theme
+        return (
+            f"{theme.WALL}══{RESET}", f"{theme.BORDER}══{RESET}",
+            f"{theme.WALL}║{RESET}", f"{theme.BORDER}║{RESET}",
+        )
+
+    def _pawn_glyphs(self, players: Dict[int, Player], current: Player) -> Dict[GlyphKey, str]:
+        colors = self.colors
+        glyphs: Dict[GlyphKey, str] = {}
+        for p in players.values():
+            color = colors[(p.id - 1) % len(colors)]
+            char = "@" if p.id == current.id else "P"
+            glyphs[self.cell_key(*p.position)] = f"{color}{char}{RESET} "
+        return glyphs
+
+    def _glyphs(self, board: Board, pawns: Dict[GlyphKey, str]) -> Dict[GlyphKey, str]:
+        """Every glyph of the frame, for a full redraw."""
+        size = board.size
+        wall_h, open_h, wall_v, open_v = self._wall_styles()
+        glyphs: Dict[GlyphKey, str] = {}
+        down, right = board.blocked_down, board.blocked_right
+        for r in range(size):
+            base = r * size
+            for c in range(size):
+                glyphs[self.cell_key(r, c)] = "  "
+                if c < size - 1:
+                    glyphs[self.right_wall_key(r, c)] = wall_v if right >> (base + c) & 1 else open_v
+                if r < size - 1:
+                    glyphs[self.down_wall_key(r, c)] = wall_h if down >> (base + c) & 1 else open_h
+        glyphs.update(pawns)
+        return glyphs
+
+    def _changed_glyphs(self, board: Board, pawns: Dict[GlyphKey, str]) -> Dict[GlyphKey, str]:
+        """Glyphs that may differ from the last frame: flipped wall slots and pawn squares."""
+        size = board.size
+        wall_h, open_h, wall_v, open_v = self._wall_styles()
+        glyphs: Dict[GlyphKey, str] = {}
+        for blocked, changed, key, wall, open_ in (
+            (board.blocked_down, board.blocked_down ^ self._down, self.down_wall_key, wall_h, open_h),
+            (board.blocked_right, board.blocked_right ^ self._right, self.right_wall_key, wall_v, open_v),
+        ):
+            while changed:
+                low = changed & -changed
+                changed ^= low
+                glyphs[key(*divmod(low.bit_length() - 1, size))] = wall if blocked & low else open_
+        for key in self._pawns.keys() - pawns.keys():
+            glyphs[key] = "  "
+        glyphs.update(pawns)
+        return glyphs
+
+    def _needs_full_redraw(self, status_rows: int) -> bool:
+        if not self.out.isatty():
+            return self._screen is None
+        terminal = tuple(shutil.get_terminal_size())
+        resized, self._terminal = terminal != self._terminal, terminal
+        if self._screen is None or resized:
+            return True
+        # A short terminal scrolls once prompts are printed, moving the board
+        return terminal[1] < self.height + PROMPT_ROWS + status_rows
+
+    # --------- Drawing ---------
+    def render(
+        self, board: Board, players: Dict[int, Player], current: Player, status: Sequence[str] = ()
+    ) -> None:
+        start = time.perf_counter()
+        if board.size != self._size:
+            self._build_layout(board.size)
+            self._screen = None
+        pawns = self._pawn_glyphs(players, current)
+        parts: List[str] = []
+        if self._needs_full_redraw(len(status)):
+            glyphs = self._screen = self._glyphs(board, pawns)
+            parts.append(CLEAR)
+            for line in self._layout:
+                parts.append("".join(p if isinstance(p, str) else glyphs[p] for p in line))
+                parts.append("\n")
+            parts.append(CLEAR_BELOW)
+            self.stats.full_redraws += 1
+        else:
+            screen = self._screen
+            for key, glyph in self._changed_glyphs(board, pawns).items():
+                if screen[key] != glyph:
+                    screen[key] = glyph
+                    parts.append(f"\033[{key[0]};{key[1]}H{glyph}")
+            # Park the cursor under the board and wipe the previous turn's prompts
+            parts.append(f"\033[{self.height + 1};1H{CLEAR_BELOW}")
+        for line in status:
+            parts.append(line)
+            parts.append("\n")
+        self._down, self._right, self._pawns = board.blocked_down, board.blocked_right, pawns
+        frame = "".join(parts)
+        self.out.write(frame)
+        self.out.flush()
+
+        elapsed = time.perf_counter() - start
+        self.stats.frames += 1
+        self.stats.last_bytes = len(frame.encode("utf-8"))
+        self.stats.bytes += self.stats.last_bytes
+        self.stats.last_seconds = elapsed
+        self.stats.seconds += elapsed
@@ -0,0 +1,261 @@
+"""Headless self-play: run many bot games in parallel and stream results to JSONL.
+
+Usage::
+
+    python selfplay.py --games 1000 --p1 greedy --p2 random --out results.jsonl
+    python selfplay.py --games 200 --p1 search:100 --p2 greedy --workers 8
+    python selfplay.py --games 20 --p1 mcts:500 --p2 search:500
+    python selfplay.py --games 100 --size 13               # 13x13 board, walls scaled to match
+    python selfplay.py --games 10000 --record records/     # also keep every game (see gamerecord.py)
+    python selfplay.py --games 20 --profile selfplay   # selfplay.json / selfplay.folded
+
+Policy specs: ``random``, ``greedy``, ``search[:ms[:depth]]`` or ``mcts[:ms]``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from ai import AlphaBetaBot, MAX_DEPTH, greedy_action, make_action, unmake_action
+from board import Board, BOARD_SIZE
+from entities import Action
+from game import GameController
+from gamerecord import GameRecord, RecordLog
+from mcts import MCTSBot
+
+
+DEFAULT_MAX_PLIES = 400  # games still running after this are recorded as draws
+
+
+class RandomPolicy:
+    """Uniform random legal pawn move, or a random legal wall with probability ``wall_rate``."""
+
+    def __init__(self, seed: int, wall_rate: float = 0.2) -> None:
+        self.rng = random.Random(seed)
+        self.wall_rate = wall_rate
+
+    def choose_action(self, board: Board, player_id: int) -> Action:
+        if board.players[player_id].walls_remaining > 0 and self.rng.random() < self.wall_rate:
+            walls = list(board.legal_walls())
+            if walls:
+                return Action.wall(self.rng.choice(walls))
+        return Action.move(self.rng.choice(board.legal_pawn_moves(player_id)))
+
+
+class GreedyPolicy:
+    """Step along the shortest path; when behind, place the wall that hurts the leader most."""
+
+    def __init__(self, seed: int) -> None:
+        self.rng = random.Random(seed)
+
+    def choose_action(self, board: Board, player_id: int) -> Action:
+        opponents = [pid for pid in board.players if pid != player_id]
+        leader = min(opponents, key=board.distance_to_goal)
+        mine = board.distance_to_goal(player_id)
+        theirs = board.distance_to_goal(leader)
+        if board.players[player_id].walls_remaining > 0 and theirs < mine:
+            best: Optional[Action] = None
+            best_gain = 0
+            for wall in board.legal_walls(board.path_grooves(leader)):
+                action = Action.wall(wall)
+                make_action(board, player_id, action)
+                gain = (board.distance_to_goal(leader) - theirs) - (board.distance_to_goal(player_id) - mine)
+                unmake_action(board, player_id, action, None)
+                if gain > best_gain or (gain == best_gain and best is not None and self.rng.random() < 0.5):
+                    best, best_gain = action, gain
+            if best is not None:
+                return best
+        return greedy_action(board, player_id)
+
+
+def make_policy(spec: str, seed: int):
+    """Build a policy from a spec string such as ``greedy`` or ``search:200:3``."""
+    name, _, args = spec.partition(":")
+    if name == "random":
+        return RandomPolicy(seed)
+    if name == "greedy":
+        return GreedyPolicy(seed)
+    if name == "search":
+        parts = [int(a) for a in args.split(":") if a]
+        budget = parts[0] if parts else 200
+        depth = parts[1] if len(parts) > 1 else MAX_DEPTH
+        return AlphaBetaBot(time_budget_ms=budget, max_depth=depth)
+    if name == "mcts":
+        # Single process: self-play already runs one game per core
+        budget = int(args) if args else 200
+        return MCTSBot(time_budget_ms=budget, seed=seed)
+    raise ValueError(f"unknown policy '{spec}'")
+
+
+def play_game(
+    index: int,
+    specs: Dict[int, str],
+    mode: int,
+    base_seed: int,
+    max_plies: int,
+    size: int = BOARD_SIZE,
+    record: bool = False,
+) -> Dict[str, Any]:
+    """Play one headless game; seeds depend only on ``base_seed`` and ``index``.
+
+    With ``record`` the result also carries the encoded ``GameRecord`` under "record".
+    """
+    seed = base_seed + index
+    start = time.perf_counter()
+    controller = GameController(mode, size=size)
+    policies = {pid: make_policy(specs[pid], seed * 8 + pid) for pid in controller.players}
+
+    plies = walls = 0
+    winner = controller.winner()
+    while winner is None and plies < max_plies:
+        player = controller.current_player()
+        action = policies[player.id].choose_action(controller.board, player.id)
+        if not controller.play(action):
+            raise RuntimeError(f"policy '{specs[player.id]}' chose illegal action {action}")
+        plies += 1
+        walls += action.kind == "w"
+        winner = controller.winner()
+
+    result = {
+        "game": index,
+        "seed": seed,
+        "mode": mode,
+        "size": size,
+        "policies": {str(pid): specs[pid] for pid in sorted(specs)},
+        "winner": winner.id if winner else None,
+        "plies": plies,
+        "walls": walls,
+        "seconds": round(time.perf_counter() - start, 6),
+    }
+    if record:
+        result["record"] = GameRecord.from_controller(controller, "goal" if winner else "max-plies").encode()
+    return result
+
+
+def _play_batch(
+    indices: List[int], specs: Dict[int, str], mode: int, base_seed: int, max_plies: int, size: int, record: bool
+) -> List[Dict[str, Any]]:
+    return [play_game(i, specs, mode, base_seed, max_plies, size, record) for i in indices]
+
+
+def run(
+    games: int,
+    specs: Dict[int, str],
+    mode: int = 2,
+    workers: Optional[int] = None,
+    seed: int = 0,
+    out: Optional[str] = None,
+    max_plies: int = DEFAULT_MAX_PLIES,
+    chunk_size: Optional[int] = None,
+    size: int = BOARD_SIZE,
+    record_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Play ``games`` games across a process pool, streaming each result to ``out``.
+
+    With ``record_dir`` every game is also appended to that game-record log.
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        # Several chunks per worker keeps cores busy without paying IPC per game
+        chunk_size = max(1, min(64, games // (workers * 8)))
+    chunks = [list(range(i, min(i + chunk_size, games))) for i in range(0, games, chunk_size)]
+
+    totals: Dict[str, Any] = {"games": 0, "plies": 0, "wins": {str(pid): 0 for pid in specs}, "draws": 0}
+    sink = open(out, "w", encoding="utf-8") if out else None
+    log = RecordLog(record_dir) if record_dir else None
+    start = time.perf_counter()
+
+    def record(results: List[Dict[str, Any]]) -> None:
+        for result in results:
+            raw = result.pop("record", None)
+            if log is not None and raw is not None:
+                log.append_raw(raw)
+            totals["games"] += 1
+            totals["plies"] += result["plies"]
+            if result["winner"] is None:
+                totals["draws"] += 1
+            else:
+                totals["wins"][str(result["winner"])] += 1
+            if sink:
+                sink.write(json.dumps(result) + "\n")
+        if sink:
+            sink.flush()
+        if log is not None:
+            log.flush()
+
+    try:
+        if workers == 1:
+            for chunk in chunks:
+                record(_play_batch(chunk, specs, mode, seed, max_plies, size, log is not None))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_play_batch, chunk, specs, mode, seed, max_plies, size, log is not None)
+                    for chunk in chunks
+                ]
+                for future in as_completed(futures):
+                    record(future.result())
+    finally:
+        if sink:
+            sink.close()
+        if log is not None:
+            log.close()
+
+    elapsed = time.perf_counter() - start
+    totals["workers"] = workers
+    totals["seconds"] = round(elapsed, 3)
+    totals["games_per_sec"] = round(totals["games"] / elapsed, 2) if elapsed else 0.0
+    totals["moves_per_sec"] = round(totals["plies"] / elapsed, 2) if elapsed else 0.0
+    return totals
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Headless Quoridor self-play")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--players", type=int, choices=(2, 4), default=2)
+    parser.add_argument("--size", type=int, default=BOARD_SIZE, help="board side (e.g. 9, 11, 13, 17)")
+    for pid in range(1, 5):
+        parser.add_argument(f"--p{pid}", default="greedy", help="policy spec for this seat")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES)
+    parser.add_argument("--out", default=None, help="JSONL file for per-game results")
+    parser.add_argument("--record", default=None, metavar="DIR", help="append every game to this game-record log")
+    parser.add_argument(
+        "--profile", nargs="?", const="profile", default=None, metavar="PREFIX",
+        help="profile in a single process; writes PREFIX.json and PREFIX.folded",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    specs = {pid: getattr(args, f"p{pid}") for pid in range(1, args.players + 1)}
+    workers = args.workers
+    profiler = None
+    if args.profile:
+        # Instrumentation lives in this process, so games must run here too
+        from profiler import Profiler
+
+        profiler = Profiler().install()
+        workers = 1
+    try:
+        summary = run(
+            args.games, specs, args.players, workers, args.seed, args.out, args.max_plies,
+            size=args.size, record_dir=args.record,
+        )
+    finally:
+        if profiler is not None:
+            profiler.finish(args.profile, stream=sys.stderr)
+    json.dump(summary, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
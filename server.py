@@ -0,0 +1,391 @@
+"""Asyncio TCP game server: many concurrent matches in one event loop.
+
+Usage::
+
+    python server.py --port 7878
+    python server.py --port 7878 --records records/    # keep every finished game
+    python loadtest.py --port 7878 --bots 200
+
+Line protocol (one command per line, UTF-8)::
+
+    client                         server
+    ------                         ------
+                                   HELLO quoridor 1
+    LOGIN <user> <password>        OK <user>            | ERR <reason>
+    SIGNUP <user> <password>       OK <user>            | ERR <reason>
+    PLAY [2|4]                     QUEUED <2|4>         | ERR <reason>   (default 2)
+                                   START <game> <your id> <players> <user,user,...>
+                                   TURN <player id>
+    m <row> <col>                  PLAYED <player id> m <row> <col>   (to every seat)
+    w <row> <col> <h|v>            PLAYED <player id> w <row> <col> <h|v>
+                                   END <winner id|-> <goal|timeout|resign|disconnect>
+    RESIGN                         END ...
+    STATS                          STATS <json>
+    PING                           PONG
+    QUIT                           BYE
+
+Illegal or out-of-turn actions get ``ERR <reason>`` and the turn does not pass.
+
+A disconnect, resignation or turn timeout ends the match for every seat. In a
+2-player game the other player wins; in a 4-player game there is no winner
+(``END - <reason>``) and every seat, the leaver included, is recorded as
+having played a game without a result. Turns always rotate through all seats,
+so a 4-player match cannot continue with one seat gone.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Set
+
+from auth import AuthManager
+from game import GameController
+from gamerecord import GameRecord, RecordLog
+from storage import GameResult
+
+
+PROTOCOL_VERSION = 1
+DEFAULT_PORT = 7878
+DEFAULT_TURN_TIMEOUT = 60.0  # seconds a player may think before forfeiting
+DEFAULT_IDLE_TIMEOUT = 300.0  # seconds a connection may sit idle outside a game
+MAX_LINE = 256
+MAX_WRITE_BUFFER = 1 << 20  # drop clients that stop reading
+LATENCY_SAMPLES = 10_000
+
+
+@dataclass
+class ServerStats:
+    connections: int = 0
+    total_connections: int = 0
+    active_games: int = 0
+    finished_games: int = 0
+    moves: int = 0
+    rejected_moves: int = 0
+    timeouts: int = 0
+    # Server-side handling time of recent moves, parse to broadcast, in ns
+    move_latency_ns: Deque[int] = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES))
+
+    def to_dict(self) -> Dict[str, float]:
+        samples = sorted(self.move_latency_ns)
+
+        def pct(q: float) -> float:
+            return round(samples[min(len(samples) - 1, int(len(samples) * q))] / 1000, 1) if samples else 0.0
+
+        return {
+            "connections": self.connections,
+            "total_connections": self.total_connections,
+            "active_games": self.active_games,
+            "finished_games": self.finished_games,
+            "moves": self.moves,
+            "rejected_moves": self.rejected_moves,
+            "timeouts": self.timeouts,
+            "move_p50_us": pct(0.5),
+            "move_p99_us": pct(0.99),
+        }
+
+
+class Session:
+    """One client connection."""
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.username: Optional[str] = None
+        self.match: Optional["Match"] = None
+        self.player_id = 0
+        self.last_seen = time.monotonic()
+
+    def send(self, line: str) -> None:
+        if self.writer.is_closing():
+            return
+        if self.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            self.writer.close()
+            return
+        self.writer.write(line.encode("utf-8") + b"\n")
+
+
+class Match:
+    """A game in progress: a headless GameController plus the seated sessions."""
+
+    def __init__(self, game_id: int, sessions: List[Session]) -> None:
+        self.id = game_id
+        self.controller = GameController(len(sessions))
+        self.seats: Dict[int, Session] = dict(zip(self.controller.turn_order, sessions))
+        self.turn_started = time.monotonic()
+        self.over = False
+
+    def broadcast(self, line: str) -> None:
+        for session in self.seats.values():
+            session.send(line)
+
+    @property
+    def to_move(self) -> int:
+        return self.controller.current_player().id
+
+
+class GameServer:
+    """Accepts connections, pairs queued players and referees their games.
+
+    Every match and session lives in the one event loop; each command is
+    handled synchronously, so game state needs no locking. A once-a-second
+    sweep enforces turn and idle timeouts and records finished games in one
+    batch per sweep.
+    """
+
+    def __init__(
+        self,
+        auth: AuthManager,
+        turn_timeout: float = DEFAULT_TURN_TIMEOUT,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        records: Optional[RecordLog] = None,
+    ) -> None:
+        self.auth = auth
+        self.records = records  # every finished game is appended here when set
+        self.turn_timeout = turn_timeout
+        self.idle_timeout = idle_timeout
+        self.stats = ServerStats()
+        self.queues: Dict[int, List[Session]] = {2: [], 4: []}
+        self.matches: Dict[int, Match] = {}
+        self.sessions: Set[Session] = set()
+        self._game_ids = itertools.count(1)
+        self._results: List[GameResult] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._sweeper: Optional[asyncio.Task] = None
+        self._handlers: Set[asyncio.Task] = set()
+
+    # --------- Lifecycle ---------
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        self._server = await asyncio.start_server(self._handle, host, port, limit=MAX_LINE * 4)
+        self._sweeper = asyncio.create_task(self._sweep())
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1] if self._server else 0
+
+    async def stop(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for session in list(self.sessions):
+            session.writer.close()
+        # Closing the transports ends each handler's read loop
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        self._flush_results()
+
+    # --------- Connections ---------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session = Session(writer)
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        self.sessions.add(session)
+        self.stats.connections += 1
+        self.stats.total_connections += 1
+        session.send(f"HELLO quoridor {PROTOCOL_VERSION}")
+        try:
+            while not writer.is_closing():
+                try:
+                    raw = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    session.send("ERR line too long")
+                    break
+                if not raw:
+                    break
+                session.last_seen = time.monotonic()
+                if not self._dispatch(session, raw.decode("utf-8", "replace").strip()):
+                    break
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._disconnect(session)
+            self.sessions.discard(session)
+            self.stats.connections -= 1
+            self._handlers.discard(task)
+            writer.close()
+
+    def _disconnect(self, session: Session) -> None:
+        for queue in self.queues.values():
+            if session in queue:
+                queue.remove(session)
+        if session.match is not None and not session.match.over:
+            self._end(session.match, None, "disconnect", loser=session.player_id)
+
+    # --------- Commands ---------
+    def _dispatch(self, session: Session, line: str) -> bool:
+        """Handle one command; False closes the connection."""
+        if not line:
+            return True
+        command, *args = line.split()
+        command = command.upper()
+        if command in ("M", "W"):
+            self._play(session, line)
+        elif command in ("LOGIN", "SIGNUP"):
+            self._login(session, command, args)
+        elif command == "PLAY":
+            self._queue(session, args)
+        elif command == "RESIGN":
+            if session.match is None:
+                session.send("ERR not in a game")
+            else:
+                self._end(session.match, None, "resign", loser=session.player_id)
+        elif command == "STATS":
+            session.send("STATS " + json.dumps(self.stats.to_dict()))
+        elif command == "PING":
+            session.send("PONG")
+        elif command == "QUIT":
+            session.send("BYE")
+            return False
+        else:
+            session.send(f"ERR unknown command {command}")
+        return True
+
+    def _login(self, session: Session, command: str, args: List[str]) -> None:
+        if len(args) != 2:
+            session.send(f"ERR usage: {command} <user> <password>")
+            return
+        username, password = args
+        if command == "SIGNUP":
+            ok = self.auth.register(username, password)
+            reason = "username taken"
+        else:
+            ok = self.auth.authenticate(username, password)
+            reason = "invalid username or password"
+        if not ok:
+            session.send(f"ERR {reason}")
+            return
+        session.username = username
+        session.send(f"OK {username}")
+
+    def _queue(self, session: Session, args: List[str]) -> None:
+        if session.username is None:
+            session.send("ERR login first")
+            return
+        if session.match is not None and not session.match.over:
+            session.send("ERR already in a game")
+            return
+        if args and args[0] not in ("2", "4"):
+            session.send("ERR usage: PLAY <2|4>")
+            return
+        size = int(args[0]) if args else 2
+        queue = self.queues[size]
+        if session not in queue:
+            queue.append(session)
+        session.send(f"QUEUED {size}")
+        if len(queue) >= size:
+            seated, self.queues[size] = queue[:size], queue[size:]
+            self._start_match(seated)
+
+    def _start_match(self, sessions: List[Session]) -> None:
+        match = Match(next(self._game_ids), sessions)
+        self.matches[match.id] = match
+        self.stats.active_games += 1
+        names = ",".join(s.username or "?" for s in match.seats.values())
+        for pid, session in match.seats.items():
+            session.match, session.player_id = match, pid
+            session.send(f"START {match.id} {pid} {len(sessions)} {names}")
+        match.broadcast(f"TURN {match.to_move}")
+
+    def _play(self, session: Session, line: str) -> None:
+        start = time.perf_counter_ns()
+        match = session.match
+        if match is None or match.over:
+            session.send("ERR not in a game")
+            return
+        if match.to_move != session.player_id:
+            session.send("ERR not your turn")
+            return
+        result = match.controller.apply(line)
+        if not result.ok:
+            self.stats.rejected_moves += 1
+            session.send(f"ERR {result.error}")
+            return
+        self.stats.moves += 1
+        match.broadcast(f"PLAYED {session.player_id} {result.action}")
+        if result.winner is not None:
+            self._end(match, result.winner, "goal")
+        else:
+            match.turn_started = time.monotonic()
+            match.broadcast(f"TURN {match.to_move}")
+        self.stats.move_latency_ns.append(time.perf_counter_ns() - start)
+
+    def _end(self, match: Match, winner: Optional[int], reason: str, loser: Optional[int] = None) -> None:
+        """Finish ``match`` for every seat; ``loser`` left it, which decides 2-player games only."""
+        if match.over:
+            return
+        match.over = True
+        if winner is None and loser is not None and len(match.seats) == 2:
+            winner = next(pid for pid in match.seats if pid != loser)
+        match.broadcast(f"END {winner if winner is not None else '-'} {reason}")
+        self.matches.pop(match.id, None)
+        self.stats.active_games -= 1
+        self.stats.finished_games += 1
+        players = {pid: s.username or "" for pid, s in match.seats.items()}
+        self._results.append((players.get(winner) if winner is not None else None, players))
+        if self.records is not None:
+            self.records.append(GameRecord.from_controller(match.controller, reason, winner))
+        for session in match.seats.values():
+            session.match = None
+
+    # --------- Housekeeping ---------
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(1.0)
+            now = time.monotonic()
+            for match in list(self.matches.values()):
+                if now - match.turn_started > self.turn_timeout:
+                    self.stats.timeouts += 1
+                    self._end(match, None, "timeout", loser=match.to_move)
+            for session in list(self.sessions):
+                if session.match is None and now - session.last_seen > self.idle_timeout:
+                    session.send("ERR idle timeout")
+                    session.writer.close()
+            self._flush_results()
+
+    def _flush_results(self) -> None:
+        if self._results:
+            results, self._results = self._results, []
+            self.auth.record_game_results(results)
+            if self.records is not None:
+                self.records.flush()
+
+
+async def serve(args: argparse.Namespace) -> None:
+    records = RecordLog(args.records) if args.records else None
+    server = GameServer(AuthManager(), args.turn_timeout, args.idle_timeout, records)
+    await server.start(args.host, args.port)
+    print(f"Listening on {args.host}:{server.port}", file=sys.stderr)
+    try:
+        while True:
+            await asyncio.sleep(args.report_interval)
+            print(json.dumps(server.stats.to_dict()), file=sys.stderr)
+    finally:
+        await server.stop()
+        if records is not None:
+            records.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Quoridor game server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--turn-timeout", type=float, default=DEFAULT_TURN_TIMEOUT)
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT)
+    parser.add_argument("--report-interval", type=float, default=10.0, help="seconds between stats lines")
+    parser.add_argument("--records", default=None, metavar="DIR", help="append every finished game to this log")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""SQLite storage backend for accounts, leaderboard and game records.
+
+Usage::
+
+    python sqlite_store.py migrate                # import users.json / leaderboard.json
+    python sqlite_store.py top --limit 20         # print the top of the leaderboard
+
+The database is a single file next to the game; no server is needed.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from storage import CacheStats, GameResult, LeaderboardRow, load_json
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    created  REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS leaderboard (
+    username TEXT PRIMARY KEY,
+    wins     INTEGER NOT NULL DEFAULT 0,
+    games    INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- Rank order: top-N and rank lookups walk this index instead of sorting
+CREATE INDEX IF NOT EXISTS leaderboard_rank ON leaderboard (wins DESC, username);
+
+CREATE TABLE IF NOT EXISTS games (
+    id        INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    winner    TEXT,
+    players   TEXT NOT NULL  -- JSON object: seat id -> username
+);
+"""
+
+
+class SqliteBackend:
+    """AuthManager backend on a local SQLite database.
+
+    Usernames are primary keys, so logins are index lookups, and the
+    ``leaderboard_rank`` index serves paginated top-N queries without loading
+    or sorting the whole table. Results are recorded in one transaction per
+    batch. Leaderboard reads are cached until this connection writes or
+    ``PRAGMA data_version`` shows another process committed.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.conn = sqlite3.connect(str(path))
+        # WAL lets the leaderboard be read while a batch of results commits
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.cache_stats = CacheStats()
+        self._cache: Dict[tuple, Any] = {}
+        self._data_version = self._current_version()
+
+    # --------- Read cache ---------
+    def _current_version(self) -> int:
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _cached(self, key: tuple, load: Callable[[], Any]) -> Any:
+        version = self._current_version()
+        if version != self._data_version:
+            # Another connection committed since the cache was filled
+            self._data_version = version
+            if self._cache:
+                self.cache_stats.external_changes += 1
+                self._cache.clear()
+        if key in self._cache:
+            self.cache_stats.hits += 1
+            return self._cache[key]
+        self.cache_stats.reloads += 1
+        value = self._cache[key] = load()
+        return value
+
+    def _invalidate(self) -> None:
+        self._cache.clear()
+
+    def get_user(self, username: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()
+        return {"password": row[0]} if row else None
+
+    def add_user(self, username: str, password: str) -> bool:
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO users (username, password, created) VALUES (?, ?, ?)",
+                    (username, password, time.time()),
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def ensure_player(self, username: str) -> None:
+        with self.conn:
+            cursor = self.conn.execute("INSERT OR IGNORE INTO leaderboard (username) VALUES (?)", (username,))
+        if cursor.rowcount:
+            self._invalidate()
+
+    def record_results(self, results: Iterable[GameResult]) -> None:
+        now = time.time()
+        games: List[tuple] = []
+        wins: List[tuple] = []
+        played: List[tuple] = []
+        for winner, players in results:
+            games.append((now, winner, json.dumps({str(seat): name for seat, name in players.items()})))
+            played.extend((name,) for name in players.values() if name)
+            if winner:
+                wins.append((winner,))
+        with self.conn:
+            self.conn.executemany("INSERT INTO games (played_at, winner, players) VALUES (?, ?, ?)", games)
+            self.conn.executemany(
+                "INSERT INTO leaderboard (username, games) VALUES (?, 1) "
+                "ON CONFLICT(username) DO UPDATE SET games = games + 1",
+                played,
+            )
+            self.conn.executemany(
+                "INSERT INTO leaderboard (username, wins) VALUES (?, 1) "
+                "ON CONFLICT(username) DO UPDATE SET wins = wins + 1",
+                wins,
+            )
+        self._invalidate()
+
+    def top(self, limit: int, offset: int = 0) -> List[LeaderboardRow]:
+        def load() -> List[LeaderboardRow]:
+            rows = self.conn.execute(
+                "SELECT username, wins, games FROM leaderboard ORDER BY wins DESC, username LIMIT ? OFFSET ?",
+                (limit, offset),
+            )
+            return [LeaderboardRow(*row) for row in rows]
+
+        return list(self._cached(("top", limit, offset), load))
+
+    def rank(self, username: str) -> Optional[int]:
+        def load() -> Optional[int]:
+            row = self.conn.execute("SELECT wins FROM leaderboard WHERE username = ?", (username,)).fetchone()
+            if row is None:
+                return None
+            ahead = self.conn.execute(
+                "SELECT COUNT(*) FROM leaderboard WHERE wins > ? OR (wins = ? AND username < ?)",
+                (row[0], row[0], username),
+            ).fetchone()[0]
+            return ahead + 1
+
+        return self._cached(("rank", username), load)
+
+    def player_count(self) -> int:
+        return self._cached(("count",), lambda: self.conn.execute("SELECT COUNT(*) FROM leaderboard").fetchone()[0])
+
+    def recent_games(self, limit: int = 20) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT played_at, winner, players FROM games ORDER BY id DESC LIMIT ?", (limit,)
+        )
+        return [{"played_at": t, "winner": w, "players": json.loads(p)} for t, w, p in rows]
+
+    def flush(self) -> None:
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+# --------- Migration ---------
+def migrate_json(users_path: Path, leaderboard_path: Path, backend: SqliteBackend) -> Dict[str, int]:
+    """Copy the JSON users and leaderboard into ``backend`` in one transaction.
+
+    Existing rows are kept; running the migration twice does not double count.
+    """
+    users: Dict[str, Dict[str, Any]] = load_json(users_path, {})
+    leaderboard: Dict[str, Dict[str, int]] = load_json(leaderboard_path, {})
+    now = time.time()
+    with backend.conn:
+        before = backend.conn.total_changes
+        backend.conn.executemany(
+            "INSERT OR IGNORE INTO users (username, password, created) VALUES (?, ?, ?)",
+            ((name, data.get("password", ""), now) for name, data in users.items()),
+        )
+        added_users = backend.conn.total_changes - before
+        before = backend.conn.total_changes
+        backend.conn.executemany(
+            "INSERT OR IGNORE INTO leaderboard (username, wins, games) VALUES (?, ?, ?)",
+            ((name, s.get("wins", 0), s.get("games", 0)) for name, s in leaderboard.items()),
+        )
+        added_players = backend.conn.total_changes - before
+    backend._invalidate()
+    return {"users": added_users, "players": added_players}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from auth import DB_FILE, LEADERBOARD_FILE, USERS_FILE
+
+    parser = argparse.ArgumentParser(description="Quoridor SQLite storage")
+    parser.add_argument("--db", default=str(DB_FILE))
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="import users.json and leaderboard.json")
+    migrate.add_argument("--users", default=str(USERS_FILE))
+    migrate.add_argument("--leaderboard", default=str(LEADERBOARD_FILE))
+    top = sub.add_parser("top", help="print the leaderboard")
+    top.add_argument("--limit", type=int, default=20)
+    top.add_argument("--offset", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    backend = SqliteBackend(Path(args.db))
+    try:
+        if args.command == "migrate":
+            counts = migrate_json(Path(args.users), Path(args.leaderboard), backend)
+            print(f"Imported {counts['users']} users and {counts['players']} leaderboard rows into {args.db}")
+        else:
+            for index, row in enumerate(backend.top(args.limit, args.offset), start=args.offset + 1):
+                print(f"{index:>5} {row.username:15} {row.wins:>6} {row.games:>7}")
+    finally:
+        backend.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+DEFAULT_FLUSH_DELAY = 0.25  # seconds a dirty file waits for more changes before it is written
+
+# (winning username or None, seat id -> username) for one finished game
+GameResult = Tuple[Optional[str], Dict[int, str]]
+
+
+class LeaderboardRow(NamedTuple):
+    username: str
+    wins: int
+    games: int
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0  # reads answered from memory
+    reloads: int = 0  # reads that had to go back to disk / the database
+    external_changes: int = 0  # reloads caused by another process writing the data
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.reloads
+        return self.hits / total if total else 0.0
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of ``path``, or None if it does not exist."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def load_json(path: Path, default: Any) -> Any:
+    if not path.exists():
+        return default
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return default
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write to a temp file in the same directory, then rename it over ``path``."""
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+@dataclass
+class WriteStats:
+    mutations: int = 0  # save() calls
+    writes: int = 0  # files actually written
+    failures: int = 0
+    write_seconds: float = 0.0
+    max_write_seconds: float = 0.0
+
+    @property
+    def coalesced(self) -> int:
+        """Mutations absorbed into another write instead of causing their own."""
+        return max(0, self.mutations - self.writes - self.failures)
+
+    @property
+    def mean_write_ms(self) -> float:
+        return self.write_seconds / self.writes * 1000 if self.writes else 0.0
+
+
+class WriteBehindStore:
+    """Buffers whole-document JSON saves and writes them from a background thread.
+
+    ``save`` only marks a file dirty; the writer thread waits ``delay`` seconds
+    so bursts of mutations collapse into one write, then serialises the latest
+    data under ``lock`` and replaces the file atomically. Callers mutate the
+    saved objects under the same ``lock``.
+    """
+
+    def __init__(self, delay: float = DEFAULT_FLUSH_DELAY) -> None:
+        self.delay = delay
+        self.lock = threading.RLock()
+        self.stats = WriteStats()
+        self._pending: Dict[Path, Any] = {}
+        # Signature of each file right after this store wrote it, so readers
+        # can tell their own writes apart from external changes
+        self.written: Dict[Path, Optional[Tuple[int, int]]] = {}
+        self._wakeup = threading.Condition(self.lock)
+        # Serialises file I/O so an older snapshot can never land after a newer one
+        self._io_lock = threading.Lock()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def save(self, path: Path, data: Any) -> None:
+        with self.lock:
+            if self._closed:
+                # After shutdown there is no writer left; fall back to writing now
+                self._pending[path] = data
+                self.stats.mutations += 1
+                self._write_pending()
+                return
+            self._pending[path] = data
+            self.stats.mutations += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+
+    def is_pending(self, path: Path) -> bool:
+        with self.lock:
+            return path in self._pending
+
+    def flush(self) -> None:
+        """Write every dirty file now, on the calling thread."""
+        with self.lock:
+            self._write_pending()
+
+    def close(self) -> None:
+        """Flush outstanding writes and stop the writer thread."""
+        with self.lock:
+            self._closed = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        with self.lock:
+            while not self._closed:
+                if not self._pending:
+                    self._wakeup.wait()
+                    continue
+                # Let further mutations pile up before writing
+                deadline = time.monotonic() + self.delay
+                while not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wakeup.wait(remaining)
+                self._write_pending()
+
+    def _write_pending(self) -> None:
+        # Called with the lock held; serialising under the lock gives a
+        # consistent snapshot, the file I/O itself happens outside it.
+        pending = [(path, json.dumps(data, indent=2)) for path, data in self._pending.items()]
+        self._pending.clear()
+        if not pending:
+            return
+        self._io_lock.acquire()
+        self.lock.release()
+        try:
+            for path, text in pending:
+                start = time.perf_counter()
+                try:
+                    atomic_write_text(path, text)
+                except OSError:
+                    self.stats.failures += 1
+                    continue
+                elapsed = time.perf_counter() - start
+                self.written[path] = file_signature(path)
+                self.stats.writes += 1
+                self.stats.write_seconds += elapsed
+                self.stats.max_write_seconds = max(self.stats.max_write_seconds, elapsed)
+        finally:
+            self._io_lock.release()
+            self.lock.acquire()
+
+
+# --------- Backends ---------
+# A storage backend for AuthManager provides:
+#   get_user(username) -> Optional[dict]     add_user(username, password) -> bool
+#   ensure_player(username)                  record_results(results)
+#   top(limit, offset) -> List[LeaderboardRow]
+#   rank(username) -> Optional[int]          player_count() -> int
+#   flush()                                  close()
+# JsonBackend below keeps the original file format; SqliteBackend lives in
+# sqlite_store.py.
+
+
+class JsonBackend:
+    """``users.json`` / ``leaderboard.json`` held in memory and written behind.
+
+    Every lookup is a dict access, but startup parses both files whole and the
+    ranking is a full sort, cached until the next result is recorded. Before
+    a read the file's mtime/size is checked, and a file changed by another
+    process is parsed again; the store's own writes do not count as changes.
+    """
+
+    def __init__(
+        self, users_path: Path, leaderboard_path: Path, store: Optional[WriteBehindStore] = None
+    ) -> None:
+        self.users_path = users_path
+        self.leaderboard_path = leaderboard_path
+        self.store = store if store is not None else WriteBehindStore()
+        self.cache_stats = CacheStats()
+        self._signatures: Dict[Path, Optional[Tuple[int, int]]] = {}
+        self.users: Dict[str, Dict[str, Any]] = self._load(users_path)
+        self.leaderboard: Dict[str, Dict[str, int]] = self._load(leaderboard_path)
+        self._ranking: Optional[List[LeaderboardRow]] = None
+
+    def _load(self, path: Path) -> Dict[str, Any]:
+        # Stat before reading: a write landing in between triggers another reload
+        self._signatures[path] = file_signature(path)
+        return load_json(path, {})
+
+    def _refresh(self, path: Path) -> None:
+        """Reload ``path`` if someone else changed it since we last read or wrote it."""
+        signature = file_signature(path)
+        with self.store.lock:
+            known = self._signatures.get(path)
+            if signature == known or self.store.is_pending(path):
+                # Unsaved local changes win over whatever is on disk
+                self.cache_stats.hits += 1
+                return
+            if signature == self.store.written.get(path):
+                self._signatures[path] = signature
+                self.cache_stats.hits += 1
+                return
+            self.cache_stats.reloads += 1
+            self.cache_stats.external_changes += 1
+            if path == self.users_path:
+                self.users = self._load(path)
+            else:
+                self.leaderboard = self._load(path)
+                self._ranking = None
+
+    def get_user(self, username: str) -> Optional[Dict[str, Any]]:
+        self._refresh(self.users_path)
+        return self.users.get(username)
+
+    def add_user(self, username: str, password: str) -> bool:
+        self._refresh(self.users_path)
+        with self.store.lock:
+            if username in self.users:
+                return False
+            self.users[username] = {"password": password}
+        self.store.save(self.users_path, self.users)
+        return True
+
+    def ensure_player(self, username: str) -> None:
+        self._refresh(self.leaderboard_path)
+        if username in self.leaderboard:
+            return
+        with self.store.lock:
+            self.leaderboard.setdefault(username, {"wins": 0, "games": 0})
+            self._ranking = None
+        self.store.save(self.leaderboard_path, self.leaderboard)
+
+    def record_results(self, results: Iterable[GameResult]) -> None:
+        self._refresh(self.leaderboard_path)
+        with self.store.lock:
+            for winner, players in results:
+                for username in players.values():
+                    if username:
+                        self.leaderboard.setdefault(username, {"wins": 0, "games": 0})["games"] += 1
+                if winner:
+                    self.leaderboard.setdefault(winner, {"wins": 0, "games": 0})["wins"] += 1
+            self._ranking = None
+        self.store.save(self.leaderboard_path, self.leaderboard)
+
+    def _rows(self) -> List[LeaderboardRow]:
+        self._refresh(self.leaderboard_path)
+        with self.store.lock:
+            if self._ranking is None:
+                self._ranking = sorted(
+                    (LeaderboardRow(name, s["wins"], s["games"]) for name, s in self.leaderboard.items()),
+                    key=lambda row: (-row.wins, row.username),
+                )
+            return self._ranking
+
+    def top(self, limit: int, offset: int = 0) -> List[LeaderboardRow]:
+        return self._rows()[offset:offset + limit]
+
+    def rank(self, username: str) -> Optional[int]:
+        for index, row in enumerate(self._rows()):
+            if row.username == username:
+                return index + 1
+        return None
+
+    def player_count(self) -> int:
+        self._refresh(self.leaderboard_path)
+        return len(self.leaderboard)
+
+    def flush(self) -> None:
+        self.store.flush()
+
+    def close(self) -> None:
+        self.store.close()
@@ -0,0 +1,294 @@
+"""Endgame tablebase for 2-player positions where both players are out of walls.
+
+Usage::
+
+    python tablebase.py                  # build time and table size for a few wall layouts
+
+With no walls left to place the game is a pawn race on a fixed layout, so
+every (pawn, pawn, side to move) position can be solved exactly by
+retrograde analysis: positions where the side to move has already lost are
+seeded at distance 0, then wins and losses are propagated backwards one ply
+at a time. Moves come from ``Board.legal_pawn_cells``, so jumps (side-steps
+included) follow the same rules as the game.
+
+Tables are cached per wall layout (the exact groove bitmasks, which also
+serve as its hash) with least-recently-used eviction. Building one costs
+time linear in its 2 * cells^2 states (about 0.05 s on 9x9, 0.6 s on 17x17),
+so bots pass their search deadline to ``probe`` and only build a table the
+estimate says fits; otherwise they search this move.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from array import array
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from board import Board
+from entities import Action, Wall
+
+
+DEFAULT_CAPACITY = 32  # tables kept in memory
+BUILD_SECONDS_PER_STATE = 5e-6  # build cost estimate until a table has been timed (about 4us here)
+DRAW = 0  # neither side can force a win (or unreachable position)
+# Table values, from the side to move: +(n + 1) wins and -(n + 1) loses with
+# the game ending n plies from now (-1: the opponent has just arrived).
+
+TableKey = Tuple[int, int, int, Tuple[int, ...]]
+
+
+def wall_key(board: Board) -> TableKey:
+    """(size, horizontal grooves, vertical grooves, goal masks): identifies a table exactly."""
+    return board.size, board.h_grooves, board.v_grooves, tuple(board.goal_masks[p] for p in sorted(board.players))
+
+
+@dataclass
+class TablebaseStats:
+    hits: int = 0
+    misses: int = 0  # tables built
+    evictions: int = 0
+    skipped: int = 0  # builds declined because they would overrun the caller's deadline
+    build_seconds: float = 0.0
+    states_built: int = 0
+
+    @property
+    def seconds_per_state(self) -> float:
+        """Measured build cost per state, or the default estimate before any build."""
+        return self.build_seconds / self.states_built if self.states_built else BUILD_SECONDS_PER_STATE
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def plies_to_end(value: int) -> int:
+    """Plies until the game ends for a non-DRAW table value."""
+    return abs(value) - 1
+
+
+class EndgameTable:
+    """Solved values for every pawn placement on one wall layout.
+
+    Index of a position: ``(side * cells + a) * cells + b`` with ``a`` / ``b``
+    the cells of the first / second player (by id) and ``side`` 0 when the
+    first player is to move.
+    """
+
+    def __init__(self, board: Board) -> None:
+        self.size = board.size
+        self.player_ids = sorted(board.players)
+        if len(self.player_ids) != 2:
+            raise ValueError("endgame tables cover 2-player games only")
+        self.cells = board.geometry.cells
+        scratch = board.copy()
+        self.moves = self._generate_moves(scratch)
+        self.values = self._solve(scratch)
+
+    def _generate_moves(self, board: Board) -> List[List[int]]:
+        """Successor cell lists, indexed like ``values`` (only the mover's cell changes)."""
+        cells = self.cells
+        first, second = self.player_ids
+        moves: List[List[int]] = [[] for _ in range(2 * cells * cells)]
+        for a in range(cells):
+            for b in range(cells):
+                if a == b:
+                    continue
+                board.set_position(first, board.cell_position(a))
+                board.set_position(second, board.cell_position(b))
+                moves[a * cells + b] = board.legal_pawn_cells(first)
+                moves[(cells + a) * cells + b] = board.legal_pawn_cells(second)
+        return moves
+
+    def _solve(self, board: Board) -> array:
+        cells = self.cells
+        first, second = self.player_ids
+        goal = (board.goal_masks[first], board.goal_masks[second])
+        total = 2 * cells * cells
+        values = array("h", [DRAW]) * total
+        remaining = array("H", [0]) * total  # unresolved moves of each position
+        predecessors: List[List[int]] = [[] for _ in range(total)]
+        queue: deque[int] = deque()
+
+        for index in range(total):
+            side, rest = divmod(index, cells * cells)
+            a, b = divmod(rest, cells)
+            if a == b:
+                continue
+            mover_cell, other_cell = (a, b) if side == 0 else (b, a)
+            if goal[side] >> mover_cell & 1:
+                continue  # unreachable: the game ended when this pawn arrived
+            if goal[1 - side] >> other_cell & 1:
+                values[index] = -1  # the opponent just arrived
+                queue.append(index)
+                continue
+            targets = self.moves[index]
+            remaining[index] = len(targets)
+            for t in targets:
+                nxt = ((1 - side) * cells + t) * cells + b if side == 0 else ((1 - side) * cells + a) * cells + t
+                predecessors[nxt].append(index)
+
+        while queue:
+            index = queue.popleft()
+            value = values[index]
+            for prev in predecessors[index]:
+                if values[prev] != DRAW:
+                    continue
+                if value < 0:
+                    # A move into a lost position wins, at the first (shortest) chance
+                    values[prev] = -value + 1
+                    queue.append(prev)
+                else:
+                    remaining[prev] -= 1
+                    if remaining[prev] == 0:
+                        # Every move wins for the opponent: lose as late as possible
+                        values[prev] = -(value + 1)
+                        queue.append(prev)
+        return values
+
+    def index(self, board: Board, to_move: int) -> int:
+        first, second = self.player_ids
+        side = self.player_ids.index(to_move)
+        a = board.cell_index(board.players[first].position)
+        b = board.cell_index(board.players[second].position)
+        return (side * self.cells + a) * self.cells + b
+
+    def value(self, board: Board, to_move: int) -> int:
+        """Signed value for ``to_move`` (see ``plies_to_end``); DRAW if nobody can force a win."""
+        return self.values[self.index(board, to_move)]
+
+    def best_move(self, board: Board, to_move: int) -> Optional[Action]:
+        """The fastest win, the slowest loss, or the drawing move that gets closest to the goal."""
+        index = self.index(board, to_move)
+        side, rest = divmod(index, self.cells * self.cells)
+        a, b = divmod(rest, self.cells)
+        best: Optional[Tuple[int, int]] = None
+        for t in self.moves[index]:
+            nxt = ((1 - side) * self.cells + t) * self.cells + b if side == 0 else ((1 - side) * self.cells + a) * self.cells + t
+            reply = self.values[nxt]
+            # Rank from our side: opponent losses first (sooner is better), then draws
+            # (closest to the goal, to keep pressing), then slow losses
+            if reply < 0:
+                rank = (0, -reply)
+            elif reply == DRAW:
+                rank = (1, board.distance_to_goal(to_move, board.cell_position(t)))
+            else:
+                rank = (2, -reply)
+            if best is None or rank < best[0]:
+                best = (rank, t)
+        if best is None:
+            return None
+        return Action.move(board.cell_position(best[1]))
+
+
+class Tablebase:
+    """LRU cache of ``EndgameTable``s keyed by wall layout."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.capacity = capacity
+        self.stats = TablebaseStats()
+        self._tables: "OrderedDict[TableKey, EndgameTable]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    @staticmethod
+    def applies(board: Board) -> bool:
+        """True for 2-player positions with no walls left in either hand."""
+        return len(board.players) == 2 and all(p.walls_remaining == 0 for p in board.players.values())
+
+    def table(self, board: Board) -> EndgameTable:
+        key = wall_key(board)
+        table = self._tables.get(key)
+        if table is not None:
+            self._tables.move_to_end(key)
+            self.stats.hits += 1
+            return table
+        start = time.perf_counter()
+        table = EndgameTable(board)
+        self.stats.build_seconds += time.perf_counter() - start
+        self.stats.states_built += len(table.values)
+        self.stats.misses += 1
+        self._tables[key] = table
+        if len(self._tables) > self.capacity:
+            self._tables.popitem(last=False)
+            self.stats.evictions += 1
+        return table
+
+    def estimated_build_seconds(self, board: Board) -> float:
+        cells = board.geometry.cells
+        return 2 * cells * cells * self.stats.seconds_per_state
+
+    def probe(
+        self, board: Board, to_move: int, deadline: Optional[float] = None
+    ) -> Optional[Tuple[Action, int]]:
+        """(best move, value) for a wall-exhausted position, or None if the table does not apply.
+
+        With a ``deadline`` (a ``time.perf_counter()`` value), a table that is
+        not cached yet is only built if its estimated build time fits before
+        it; otherwise None is returned and the caller should search instead.
+        """
+        if not self.applies(board):
+            return None
+        if deadline is not None and wall_key(board) not in self._tables:
+            if time.perf_counter() + self.estimated_build_seconds(board) > deadline:
+                self.stats.skipped += 1
+                return None
+        table = self.table(board)
+        action = table.best_move(board, to_move)
+        if action is None:
+            return None
+        return action, table.value(board, to_move)
+
+
+_default: Optional[Tablebase] = None
+
+
+def default_tablebase() -> Tablebase:
+    """The process-wide cache shared by every game's bots."""
+    global _default
+    if _default is None:
+        _default = Tablebase()
+    return _default
+
+
+def _benchmark() -> None:
+    from game import create_players
+
+    layouts = {
+        "open": [],
+        "corridor": [Wall(r, c, True) for r, c in ((3, 0), (3, 2), (3, 4), (5, 3), (5, 5), (5, 7))],
+        "maze": [Wall(r, c, r % 2 == 0) for r, c in ((1, 1), (3, 5), (5, 2), (6, 6), (2, 7), (4, 0))],
+    }
+    tablebase = Tablebase()
+    for name, walls in layouts.items():
+        board = Board(list(create_players(2).values()))
+        for w in walls:
+            board.add_wall(w)
+        for p in board.players.values():
+            p.walls_remaining = 0
+        start = time.perf_counter()
+        action, value = tablebase.probe(board, 1)
+        built = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(1000):
+            tablebase.probe(board, 1)
+        probe_us = (time.perf_counter() - start) * 1000
+        table = tablebase.table(board)
+        decided = sum(1 for v in table.values if v != DRAW)
+        outcome = "draw" if value == DRAW else f"{'wins' if value > 0 else 'loses'} in {plies_to_end(value)} plies"
+        print(
+            f"{name:9} build {built * 1000:7.1f}ms  probe {probe_us:5.1f}us  "
+            f"decided {decided}/{len(table.values)}  P1 to move {outcome} via {action}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argparse.ArgumentParser(description="Endgame tablebase build and probe timings").parse_args(argv)
+    _benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Structured, low-overhead telemetry: events and timed spans.
+
+Telemetry is switched on by pointing ``QUORIDOR_TELEMETRY`` at a file before
+the game starts::
+
+    QUORIDOR_TELEMETRY=telemetry.jsonl python3 main.py
+    QUORIDOR_TELEMETRY=t.jsonl QUORIDOR_TELEMETRY_SAMPLE=0.01 python3 selfplay.py --games 100
+
+When it is off, ``traced`` returns the decorated function unchanged and
+``span`` returns a shared no-op context, so instrumented code costs nothing.
+When it is on, records go into an in-memory ring buffer and a background
+thread appends them to the file as JSON lines.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+
+PATH_ENV = "QUORIDOR_TELEMETRY"
+SAMPLE_ENV = "QUORIDOR_TELEMETRY_SAMPLE"
+DEFAULT_CAPACITY = 1 << 16  # records held in memory between flushes
+DEFAULT_FLUSH_INTERVAL = 1.0  # seconds
+
+ENABLED = bool(os.environ.get(PATH_ENV))
+
+F = TypeVar("F", bound=Callable[..., Any])
+# (wall-clock ns, "event" | "span", name, duration ns or None, fields or None)
+Record = Tuple[int, str, str, Optional[int], Optional[Dict[str, Any]]]
+
+
+@dataclass
+class SpanTotals:
+    count: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+
+    @property
+    def mean_us(self) -> float:
+        return self.total_ns / self.count / 1000 if self.count else 0.0
+
+
+class Telemetry:
+    """Ring buffer of records plus the thread that drains it to ``path``.
+
+    Appending to the buffer is the only work done on the calling thread. When
+    the buffer is full the oldest records are overwritten and counted in
+    ``dropped``. Span totals are accumulated as records are drained, so they
+    cover every sampled span even if the file cannot be written.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        sample_rate: float = 1.0,
+        capacity: int = DEFAULT_CAPACITY,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ) -> None:
+        self.path = path
+        self.sample_rate = sample_rate
+        self.flush_interval = flush_interval
+        self.buffer: Deque[Record] = deque(maxlen=capacity)
+        self.dropped = 0
+        self.written = 0
+        self.spans: Dict[str, SpanTotals] = {}
+        self._drain_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "Telemetry":
+        rate = float(os.environ.get(SAMPLE_ENV) or 1.0)
+        return cls(os.environ.get(PATH_ENV) or None, sample_rate=min(1.0, max(0.0, rate)))
+
+    # --------- Recording ---------
+    def _append(self, record: Record) -> None:
+        buffer = self.buffer
+        if len(buffer) == buffer.maxlen:
+            self.dropped += 1
+        buffer.append(record)
+        if self._thread is None:
+            self._start()
+
+    def event(self, name: str, **fields: Any) -> None:
+        self._append((time.time_ns(), "event", name, None, fields or None))
+
+    def record_span(self, name: str, duration_ns: int, fields: Optional[Dict[str, Any]] = None) -> None:
+        self._append((time.time_ns(), "span", name, duration_ns, fields))
+
+    def sampled(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    # --------- Flushing ---------
+    def _start(self) -> None:
+        with self._drain_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Drain the buffer to the file and fold spans into ``spans``."""
+        with self._drain_lock:
+            lines = []
+            buffer = self.buffer
+            while buffer:
+                try:
+                    ts, kind, name, duration, fields = buffer.popleft()
+                except IndexError:
+                    break
+                entry: Dict[str, Any] = {"ts": ts, "kind": kind, "name": name}
+                if duration is not None:
+                    entry["ns"] = duration
+                    totals = self.spans.get(name)
+                    if totals is None:
+                        totals = self.spans[name] = SpanTotals()
+                    totals.count += 1
+                    totals.total_ns += duration
+                    totals.max_ns = max(totals.max_ns, duration)
+                if fields:
+                    entry["fields"] = fields
+                lines.append(json.dumps(entry, default=str))
+            if not lines or not self.path:
+                return
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                self.written += len(lines)
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-span count, mean and max, after draining what is buffered."""
+        self.flush()
+        return {
+            name: {"count": t.count, "mean_us": round(t.mean_us, 3), "max_us": round(t.max_ns / 1000, 3)}
+            for name, t in sorted(self.spans.items())
+        }
+
+
+_telemetry = Telemetry.from_env()
+if ENABLED:
+    atexit.register(_telemetry.close)
+
+
+def get() -> Telemetry:
+    return _telemetry
+
+
+def event(name: str, **fields: Any) -> None:
+    """Record a structured event. Guard hot call sites with ``if telemetry.ENABLED``."""
+    if ENABLED:
+        _telemetry.event(name, **fields)
+
+
+class _Span:
+    __slots__ = ("name", "fields", "start")
+
+    def __init__(self, name: str, fields: Optional[Dict[str, Any]]) -> None:
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        _telemetry.record_span(self.name, time.perf_counter_ns() - self.start, self.fields)
+
+
+_NULL_SPAN = nullcontext()
+
+
+def span(name: str, **fields: Any):
+    """Context manager timing a block; a shared no-op when disabled or not sampled."""
+    if not ENABLED or not _telemetry.sampled():
+        return _NULL_SPAN
+    return _Span(name, fields or None)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator timing every (sampled) call of a function as span ``name``.
+
+    The decision is made once, at import: with telemetry off the function is
+    returned as is.
+    """
+
+    def decorate(fn: F) -> F:
+        if not ENABLED:
+            return fn
+        telemetry = _telemetry
+        clock = time.perf_counter_ns
+
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not telemetry.sampled():
+                return fn(*args, **kwargs)
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                telemetry.record_span(name, clock() - start)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import telemetry
+from auth import AuthManager
+from entities import Action, Wall
+from game import GameController
+from gamerecord import GameRecord, RecordLog
+
+
+class TerminalClient:
+    """Plays one game at the terminal: prompts humans and feeds the engine's step API."""
+
+    def __init__(
+        self, controller: GameController, ui, auth: AuthManager, current_user: str, records: Optional[RecordLog] = None
+    ) -> None:
+        self.controller = controller
+        self.ui = ui
+        self.auth = auth
+        self.current_user = current_user
+        self.records = records  # finished games are appended here when set
+
+    def run(self) -> None:
+        controller = self.controller
+        self.ui.print_title("Quoridor")
+
+        # Player mapping for leaderboard: for simplicity, all human seats use current_user
+        leaderboard_players = {
+            pid: self.current_user for pid, kind in controller.seats.items() if kind == "human"
+        }
+        telemetry.event("game.start", mode=controller.mode, seats=controller.seats)
+
+        while True:
+            self.ui.render_board(controller.board, controller.players, controller.current_player())
+            winner = controller.winner()
+            if winner:
+                self.ui.print_message(f"{winner.name} wins!", highlight=True)
+                winner_user = self.current_user if controller.seats[winner.id] == "human" else None
+                self.auth.record_game_result(winner_user, leaderboard_players)
+                telemetry.event("game.end", winner=winner.id, plies=len(controller.moves))
+                self._save_record("goal")
+                break
+
+            if controller.bot_to_move() is not None:
+                if not self._bot_turn():
+                    # The turn did not pass; asking the bot again would loop forever
+                    self.auth.record_game_result(None, leaderboard_players)
+                    telemetry.event("game.end", winner=None, plies=len(controller.moves))
+                    self._save_record("none")
+                    break
+                continue
+
+            action = self.ui.prompt_turn_action(controller.current_player())
+
+            if action == "m":
+                self._handle_move()
+            elif action == "w":
+                self._handle_wall()
+            elif action == "u":
+                if not controller.undo():
+                    self.ui.status_message("Nothing to undo.", error=True)
+                # Step back past bot turns so the human gets to replay theirs
+                while controller.bot_to_move() is not None and controller.undo():
+                    pass
+            elif action == "r":
+                if not controller.redo():
+                    self.ui.status_message("Nothing to redo.", error=True)
+                while controller.bot_to_move() is not None and controller.redo():
+                    pass
+            elif action == "h":
+                hint, source = controller.hint()
+                self.ui.status_message(f"Hint: {hint} ({source})", highlight=True)
+            elif action == "q":
+                self.auth.record_game_result(None, leaderboard_players)
+                telemetry.event("game.end", winner=None, plies=len(controller.moves))
+                self._save_record("quit")
+                break
+            else:
+                self.ui.status_message("Invalid action.", error=True)
+
+    def _save_record(self, reason: str) -> None:
+        if self.records is not None:
+            self.records.append(GameRecord.from_controller(self.controller, reason))
+            self.records.flush()
+
+    # --------- Turns ---------
+    def _handle_move(self) -> None:
+        p = self.controller.current_player()
+        row, col = self.ui.prompt_move(self.controller.board.legal_pawn_moves(p.id))
+        if not self.controller.apply(Action.move((row, col))).ok:
+            self.ui.status_message("Illegal move.", error=True)
+
+    def _handle_wall(self) -> None:
+        if self.controller.current_player().walls_remaining <= 0:
+            self.ui.status_message("No walls remaining.", error=True)
+            return
+        row, col, orient = self.ui.prompt_wall(self.controller.board.size)
+        wall = Wall(row=row, col=col, horizontal=(orient == "h"))
+        if not self.controller.apply(Action.wall(wall)).ok:
+            self.ui.status_message("Invalid wall placement.", error=True)
+
+    def _bot_turn(self) -> bool:
+        """Let the bot to move play; False (after reporting it) if its action was rejected."""
+        p = self.controller.current_player()
+        bot = self.controller.bot_to_move()
+        result = self.controller.step_bot()
+        if not result.ok:
+            self.ui.print_message(f"{p.name} (bot) played {result.action}: {result.error}. Game abandoned.", error=True)
+            return False
+        self.ui.status_message(f"{p.name} (bot) plays {result.action} [{bot.last_stats.summary()}]")
+        return True
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from entities import Action
+from game import GameController
+
+np = pytest.importorskip("numpy")
+
+from batchdist import (  # noqa: E402
+    distance_maps,
+    encode_boards,
+    encode_grooves,
+    player_distances,
+    scalar_player_distances,
+)
+
+
+def random_boards(size, count, seed=0):
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        controller = GameController(2, size=size)
+        for _ in range(rng.randrange(4, 16)):
+            walls = list(controller.board.legal_walls())
+            p = controller.current_player()
+            if p.walls_remaining and walls:
+                controller.play(Action.wall(rng.choice(walls)))
+            else:
+                controller.play(Action.move(rng.choice(controller.board.legal_pawn_moves(p.id))))
+        boards.append(controller.board)
+    return boards
+
+
+@pytest.mark.parametrize("size", [9, 16, 17, 32])
+def test_batched_distances_match_the_scalar_bfs(size):
+    boards = random_boards(size, 6)
+    batch = encode_boards(boards)
+    assert player_distances(batch).tolist() == scalar_player_distances(boards)
+    maps, goals = distance_maps(batch)
+    for i, board in enumerate(boards):
+        for pid in board.players:
+            expected = board.distance_map(pid)
+            assert maps[i, goals.index(board.goal_masks[pid])].ravel().tolist() == expected
+
+
+def test_boards_above_32_are_rejected():
+    batch = encode_grooves(33, [(0, 0)], [[0, 1]], [1, 2], [1, 2])
+    with pytest.raises(ValueError):
+        player_distances(batch)
@@ -0,0 +1,192 @@
+import random
+from collections import deque
+
+from board import UNREACHABLE, Board
+from entities import Wall
+from game import create_players
+
+
+# --------- Reference model: walls as a plain list, edges as cell pairs ---------
+def blocked_edges(walls):
+    edges = set()
+    for w in walls:
+        r, c = w.row, w.col
+        if w.horizontal:
+            edges |= {((r, c), (r + 1, c)), ((r, c + 1), (r + 1, c + 1))}
+        else:
+            edges |= {((r, c), (r, c + 1)), ((r + 1, c), (r + 1, c + 1))}
+    return edges
+
+
+def reference_neighbors(size, edges, pos):
+    r, c = pos
+    result = []
+    for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+        if 0 <= nr < size and 0 <= nc < size and (min(pos, (nr, nc)), max(pos, (nr, nc))) not in edges:
+            result.append((nr, nc))
+    return result
+
+
+def reference_distances(size, walls, goal):
+    """Breadth-first search outward from the goal cells, indexed like ``Board.cell_index``."""
+    edges = blocked_edges(walls)
+    dist = [UNREACHABLE] * (size * size)
+    queue = deque()
+    for r, c in goal:
+        dist[r * size + c] = 0
+        queue.append((r, c))
+    while queue:
+        pos = queue.popleft()
+        for nr, nc in reference_neighbors(size, edges, pos):
+            if dist[nr * size + nc] == UNREACHABLE:
+                dist[nr * size + nc] = dist[pos[0] * size + pos[1]] + 1
+                queue.append((nr, nc))
+    return dist
+
+
+def reference_conflicts(wall, walls):
+    for w in walls:
+        if w.horizontal != wall.horizontal:
+            if (w.row, w.col) == (wall.row, wall.col):
+                return True  # crossing at the same groove centre
+        elif wall.horizontal and w.row == wall.row and abs(w.col - wall.col) <= 1:
+            return True
+        elif not wall.horizontal and w.col == wall.col and abs(w.row - wall.row) <= 1:
+            return True
+    return False
+
+
+def reference_can_place(board, walls, wall):
+    g = board.size - 1
+    if not (0 <= wall.row < g and 0 <= wall.col < g) or reference_conflicts(wall, walls):
+        return False
+    after = walls + [wall]
+    for p in board.players.values():
+        r, c = p.position
+        if reference_distances(board.size, after, p.goal)[r * board.size + c] >= UNREACHABLE:
+            return False
+    return True
+
+
+def every_groove(size):
+    return [Wall(r, c, h) for h in (True, False) for r in range(size - 1) for c in range(size - 1)]
+
+
+def new_board(players=2, size=9):
+    return Board(list(create_players(players, size).values()), size)
+
+
+# --------- Bitboards against the reference ---------
+def test_board_matches_reference_on_random_wall_layouts():
+    rng = random.Random(1)
+    for players, size in ((2, 5), (2, 5), (2, 9), (4, 7), (4, 9)):
+        board = new_board(players, size)
+        walls = []
+        for _ in range(12):
+            grooves = every_groove(size)
+            expected = [w for w in grooves if reference_can_place(board, walls, w)]
+            assert [w for w in grooves if board.can_place_wall(w)] == expected
+            assert sorted(board.legal_walls(), key=lambda w: (not w.horizontal, w.row, w.col)) == expected
+            if not expected:
+                break
+            wall = rng.choice(expected)
+            assert board.place_wall(wall)
+            walls.append(wall)
+        edges = blocked_edges(walls)
+        for r in range(size):
+            for c in range(size):
+                assert board.neighbors((r, c)) == reference_neighbors(size, edges, (r, c))
+                if r + 1 < size:
+                    assert board.is_blocked((r, c), (r + 1, c)) == (((r, c), (r + 1, c)) in edges)
+                if c + 1 < size:
+                    assert board.is_blocked((r, c), (r, c + 1)) == (((r, c), (r, c + 1)) in edges)
+
+
+def test_overlapping_and_crossing_walls_are_rejected():
+    board = new_board()
+    assert board.place_wall(Wall(3, 3, True))
+    assert not board.can_place_wall(Wall(3, 3, True))  # same groove
+    assert not board.can_place_wall(Wall(3, 2, True))  # overlaps the left half
+    assert not board.can_place_wall(Wall(3, 4, True))  # overlaps the right half
+    assert not board.can_place_wall(Wall(3, 3, False))  # crosses it
+    assert board.can_place_wall(Wall(3, 5, True))  # touches end to end
+    assert board.can_place_wall(Wall(2, 3, False))  # vertical through one end
+    assert board.can_place_wall(Wall(4, 3, False))
+
+
+def test_wall_closing_a_region_is_legal_only_when_no_pawn_is_shut_in():
+    board = new_board(size=5)
+    assert board.place_wall(Wall(0, 0, True))
+    # With Wall(0, 1, False) the top-left cells (0, 0) and (0, 1) are sealed off
+    closing = Wall(0, 1, False)
+    assert closing in list(board.legal_walls())
+    board.set_position(2, (0, 1))
+    assert closing not in list(board.legal_walls())
+    assert not board.can_place_wall(closing)
+
+
+def test_removing_one_of_two_overlapping_walls_keeps_the_shared_edge():
+    board = new_board()
+    # add_wall skips the legality checks, so overlapping walls can be loaded
+    board.add_wall(Wall(3, 2, True))
+    board.add_wall(Wall(3, 3, True))
+    before = board.hash
+    board.remove_wall(Wall(3, 3, True))
+    walls = [Wall(3, 2, True)]
+    edges = blocked_edges(walls)
+    assert board.is_blocked((3, 3), (4, 3))  # still covered by (3, 2)
+    assert not board.is_blocked((3, 4), (4, 4))
+    for r in range(9):
+        for c in range(9):
+            assert board.neighbors((r, c)) == reference_neighbors(9, edges, (r, c))
+    for pid, p in board.players.items():
+        assert board.distance_map(pid) == reference_distances(9, walls, p.goal)
+    assert board.hash != before
+    board.remove_wall(Wall(3, 2, True))
+    assert board.hash == new_board().hash
+    assert not board.is_blocked((3, 3), (4, 3))
+
+
+# --------- Incremental distance maps ---------
+def distance_state(board):
+    return {pid: board.distance_map(pid) for pid in board.players}, board.blocked_down, board.blocked_right
+
+
+def test_distance_maps_track_random_wall_additions_and_removals():
+    rng = random.Random(2)
+    for players, size in ((2, 5), (2, 9), (4, 7)):
+        board = new_board(players, size)
+        walls = []
+        rejected = 0
+        for _ in range(60):
+            # Probes run the raise-and-rollback path check whenever the groove is
+            # free; legal or not, they must leave the maps exactly as they were
+            before = distance_state(board)
+            free = [w for w in every_groove(size) if not reference_conflicts(w, walls)]
+            for wall in rng.sample(free, min(8, len(free))):
+                rejected += not board.can_place_wall(wall)
+                assert distance_state(board) == before
+            if walls and rng.random() < 0.35:
+                board.remove_wall(walls.pop(rng.randrange(len(walls))))
+            else:
+                legal = list(board.legal_walls())
+                if not legal:
+                    continue
+                wall = rng.choice(legal)
+                board.add_wall(wall)
+                walls.append(wall)
+            for pid, p in board.players.items():
+                assert board.distance_map(pid) == reference_distances(size, walls, p.goal)
+        assert rejected
+
+
+def test_side_steps_offered_by_two_pawns_are_listed_once():
+    board = new_board(players=4)
+    board.set_position(1, (4, 4))
+    board.set_position(2, (3, 4))
+    board.set_position(3, (4, 5))
+    board.add_wall(Wall(2, 3, True))  # behind (3, 4) seen from (4, 4)
+    board.add_wall(Wall(4, 5, False))  # behind (4, 5)
+    moves = board.legal_pawn_moves(1)
+    assert len(moves) == len(set(moves))
+    assert set(moves) == {(5, 4), (4, 3), (3, 3), (3, 5), (5, 5)}
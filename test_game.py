@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from ai import greedy_action
+from entities import Action, Wall
+from game import MAX_BOARD_SIZE, GameController, decode_delta, encode_delta
+
+
+def test_mcts_seats_share_one_process_pool():
+    seats = {1: "human", 2: "mcts", 3: "mcts", 4: "mcts"}
+    controller = GameController(4, seats, bot_time_ms=50, bot_workers=3)
+    try:
+        assert controller.pool is not None
+        assert {id(bot._pool) for bot in controller.bots.values()} == {id(controller.pool)}
+        controller.apply(controller.legal_actions()[0])
+        for _ in range(3):
+            assert controller.step_bot().ok
+    finally:
+        controller.close()
+    assert controller.pool is None
+
+
+@pytest.mark.parametrize("kind", ["m", "w"])
+def test_delta_round_trips_at_the_field_limits(kind):
+    size = MAX_BOARD_SIZE
+    last_cell = size * size - 1
+    last_groove = (size - 1) * (size - 1) - 1
+    cases = (
+        [(0, 0, 0), (3, last_cell, last_cell), (1, last_cell, 0), (2, 0, last_cell)]
+        if kind == "m"
+        else [(t, g, h) for t in (0, 3) for g in (0, last_groove) for h in (0, 1)]
+    )
+    for turn_index, a, b in cases:
+        assert decode_delta(encode_delta(turn_index, kind, a, b)) == (turn_index, kind, a, b)
+
+
+def game_state(controller):
+    return (
+        controller.board.hash,
+        {pid: p.walls_remaining for pid, p in controller.players.items()},
+        {pid: p.position for pid, p in controller.players.items()},
+        controller.current_player().id,
+    )
+
+
+@pytest.mark.parametrize("mode", [2, 4])
+def test_undo_all_then_redo_all_restores_every_position(mode):
+    rng = random.Random(mode)
+    controller = GameController(mode)
+    states = [game_state(controller)]
+    for _ in range(40):
+        p = controller.current_player()
+        walls = list(controller.board.legal_walls()) if p.walls_remaining else []
+        if walls and rng.random() < 0.4:
+            action = Action.wall(rng.choice(walls))
+        else:
+            action = Action.move(rng.choice(controller.board.legal_pawn_moves(p.id)))
+        assert controller.play(action)
+        states.append(game_state(controller))
+        if controller.is_terminal():
+            break
+    for expected in reversed(states[:-1]):
+        assert controller.undo()
+        assert game_state(controller) == expected
+    assert not controller.undo()
+    for expected in states[1:]:
+        assert controller.redo()
+        assert game_state(controller) == expected
+    assert not controller.redo()
+
+
+def test_boxed_in_pawn_passes_by_moving_to_its_own_cell():
+    controller = GameController(4)
+    board = controller.board
+    # P1 in the corner: P2 above it, P3 behind P2, a wall closing the side
+    for pid, pos in ((1, (8, 0)), (2, (7, 0)), (3, (6, 0))):
+        board.set_position(pid, pos)
+    board.add_wall(Wall(7, 0, False))
+    assert controller.current_player().id == 1
+    assert board.legal_pawn_moves(1) == [(8, 0)]
+    assert greedy_action(board, 1) == Action.move((8, 0))
+    assert Action.move((8, 0)) in controller.legal_actions()
+
+    before = game_state(controller)
+    assert controller.play(Action.move((8, 0)))
+    assert controller.players[1].position == (8, 0)
+    assert board.occupied >> board.cell_index((8, 0)) & 1
+    assert controller.current_player().id != 1
+    assert controller.undo()
+    assert game_state(controller) == before
@@ -0,0 +1,20 @@
+import time
+
+from board import Board
+from game import create_players
+from mcts import MCTSBot
+
+
+def test_parallel_search_stays_within_its_budget():
+    board = Board(list(create_players(2).values()))
+    bot = MCTSBot(time_budget_ms=100, workers=3, seed=0)
+    try:
+        for _ in range(3):
+            start = time.perf_counter()
+            action = bot.choose_action(board, 1)
+            elapsed = time.perf_counter() - start
+            # Worker start-up and slow workers must not hold the move up
+            assert elapsed < 0.1 + 0.05
+            assert board.can_move(1, action.target) if action.kind == "m" else board.can_place_wall(action.to_wall())
+    finally:
+        bot.close()
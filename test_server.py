@@ -0,0 +1,94 @@
+import asyncio
+
+from server import GameServer
+
+
+class FakeAuth:
+    def __init__(self) -> None:
+        self.results = []
+
+    def register(self, username: str, password: str) -> bool:
+        return True
+
+    def authenticate(self, username: str, password: str) -> bool:
+        return True
+
+    def record_game_results(self, results) -> None:
+        self.results.extend(results)
+
+
+class Client:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def login(cls, port: int, username: str) -> "Client":
+        client = cls(*await asyncio.open_connection("127.0.0.1", port))
+        assert (await client.read()).startswith("HELLO")
+        await client.send(f"LOGIN {username} pw")
+        assert await client.read() == f"OK {username}"
+        return client
+
+    async def send(self, line: str) -> None:
+        self.writer.write(line.encode("utf-8") + b"\n")
+        await self.writer.drain()
+
+    async def read(self) -> str:
+        return (await asyncio.wait_for(self.reader.readline(), 5)).decode("utf-8").strip()
+
+    async def read_until(self, prefix: str) -> str:
+        while True:
+            line = await self.read()
+            if line.startswith(prefix):
+                return line
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def with_server(scenario):
+    async def main():
+        auth = FakeAuth()
+        server = GameServer(auth)
+        await server.start(port=0)
+        try:
+            await scenario(server)
+        finally:
+            await server.stop()
+        return auth
+
+    return asyncio.run(main())
+
+
+def test_play_rejects_unknown_sizes():
+    async def scenario(server):
+        client = await Client.login(server.port, "alice")
+        for size in ("3", "x"):
+            await client.send(f"PLAY {size}")
+            assert (await client.read()).startswith("ERR")
+        assert server.queues == {2: [], 4: []}
+        await client.send("PLAY")
+        assert await client.read() == "QUEUED 2"
+        await client.close()
+
+    with_server(scenario)
+
+
+def test_four_player_disconnect_ends_the_match_without_a_winner():
+    async def scenario(server):
+        clients = [await Client.login(server.port, f"p{i}") for i in range(4)]
+        for client in clients:
+            await client.send("PLAY 4")
+        for client in clients:
+            await client.read_until("START")
+        await clients[0].close()
+        for client in clients[1:]:
+            assert await client.read_until("END") == "END - disconnect"
+        assert not server.matches
+        for client in clients[1:]:
+            await client.close()
+
+    auth = with_server(scenario)
+    assert auth.results == [(None, {1: "p0", 2: "p1", 3: "p2", 4: "p3"})]
@@ -0,0 +1,54 @@
+import io
+
+from entities import Action
+from game import GameController
+from renderer import CLEAR_BELOW, BoardRenderer
+from terminal import TerminalClient
+from ui import PLAYER_COLORS, UI, Theme
+
+
+class FakeAuth:
+    def __init__(self) -> None:
+        self.results = []
+
+    def record_game_result(self, winner, players) -> None:
+        self.results.append((winner, players))
+
+
+def play(monkeypatch, commands, seats=None, bots=None):
+    """Run a game (human vs human by default) fed ``commands``; returns the renderer's output."""
+    inputs = iter(commands)
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(inputs))
+    out = io.StringIO()
+    ui = UI(FakeAuth())
+    ui.renderer = BoardRenderer(Theme, PLAYER_COLORS, out=out)
+    controller = GameController(2, seats or {1: "human", 2: "human"})
+    controller.bots.update(bots or {})
+    try:
+        TerminalClient(controller, ui, FakeAuth(), "alice").run()
+    finally:
+        controller.close()
+    return out.getvalue()
+
+
+def test_hint_survives_the_next_frame(monkeypatch):
+    frames = play(monkeypatch, ["h", "q"])
+    # The frame drawn after the hint clears below the board, then shows the hint
+    assert "Hint: " in frames.rsplit(CLEAR_BELOW, 1)[1]
+
+
+def test_error_survives_the_next_frame(monkeypatch):
+    frames = play(monkeypatch, ["x", "q"])
+    assert "Invalid action." in frames.rsplit(CLEAR_BELOW, 1)[1]
+
+
+class IllegalBot:
+    last_stats = None
+
+    def choose_action(self, board, player_id):
+        return Action.move((0, 0))
+
+
+def test_illegal_bot_action_abandons_the_game(monkeypatch, capsys):
+    play(monkeypatch, [], seats={1: "bot", 2: "human"}, bots={1: IllegalBot()})
+    assert "Game abandoned." in capsys.readouterr().out
@@ -0,0 +1,46 @@
+from entities import Action, Wall
+from game import GameController
+from variations import VariationTree
+
+
+def position(controller):
+    return controller.board.hash, controller.current_player().id, list(controller.moves)
+
+
+def test_goto_switches_between_sibling_branches():
+    controller = GameController(2)
+    tree = VariationTree(controller)
+    tree.play(Action.move((7, 4)))
+    fork = tree.current
+    a = [tree.play(Action.move((1, 4))), tree.play(Action.move((6, 4)))][-1]
+    at_a = position(controller)
+    tree.goto(fork)
+    b = [tree.play(Action.wall(Wall(3, 3, True))), tree.play(Action.move((7, 3)))][-1]
+    at_b = position(controller)
+    assert at_a != at_b
+
+    tree.goto(a)
+    assert position(controller) == at_a
+    assert tree.line() == [Action.move((7, 4)), Action.move((1, 4)), Action.move((6, 4))]
+    tree.goto(b)
+    assert position(controller) == at_b
+    assert controller.players[1].walls_remaining == 10 and controller.players[2].walls_remaining == 9
+    assert len(fork.children) == 2
+
+
+def test_compare_returns_to_the_current_node():
+    controller = GameController(2)
+    tree = VariationTree(controller)
+    tree.play(Action.move((7, 4)))
+    a = tree.play(Action.wall(Wall(6, 3, True)))
+    tree.back()
+    b = tree.play(Action.move((1, 4)))
+    home = position(controller)
+
+    comparison = tree.compare(a, b)
+    assert tree.current is b
+    assert position(controller) == home
+    assert comparison.fork_depth == 1
+    assert (comparison.plies_a, comparison.plies_b) == (1, 1)
+    assert comparison.walls_a[2] == 9 and comparison.walls_b[2] == 10
+    assert comparison.distances_a[1] > comparison.distances_b[1]
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, NamedTuple, Optional
+
+from entities import Action
+
+
+EXACT = 0
+LOWER = 1  # score is a lower bound (search failed high)
+UPPER = 2  # score is an upper bound (search failed low)
+
+
+class TTEntry(NamedTuple):
+    key: int
+    depth: int
+    score: int
+    flag: int
+    move: Optional[Action]
+    generation: int
+
+
+@dataclass
+class TTStats:
+    probes: int = 0
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    replacements: int = 0  # a different position was evicted
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+
+class TranspositionTable:
+    """Fixed-size hash table of search results keyed by Zobrist hash.
+
+    The table holds ``capacity`` entries (rounded up to a power of two) in
+    two-slot buckets: the first slot keeps the deepest result seen in the
+    current search, the second always takes the newest one. Memory therefore
+    stays bounded however many games or searches share the table.
+    """
+
+    def __init__(self, capacity: int = 1 << 16) -> None:
+        buckets = 1
+        while buckets * 2 < capacity:
+            buckets *= 2
+        self._mask = buckets - 1
+        self._slots: List[Optional[TTEntry]] = [None] * (buckets * 2)
+        self.generation = 0
+        self.stats = TTStats()
+
+    @property
+    def capacity(self) -> int:
+        return len(self._slots)
+
+    def new_search(self) -> None:
+        """Age existing entries so they lose priority to the next search's results."""
+        self.generation += 1
+
+    def clear(self) -> None:
+        self._slots = [None] * len(self._slots)
+        self.stats = TTStats()
+
+    def probe(self, key: int) -> Optional[TTEntry]:
+        self.stats.probes += 1
+        base = (key & self._mask) * 2
+        for slot in (base, base + 1):
+            entry = self._slots[slot]
+            if entry is not None and entry.key == key:
+                self.stats.hits += 1
+                return entry
+        self.stats.misses += 1
+        return None
+
+    def store(self, key: int, depth: int, score: int, flag: int, move: Optional[Action]) -> None:
+        self.stats.stores += 1
+        base = (key & self._mask) * 2
+        entry = TTEntry(key, depth, score, flag, move, self.generation)
+        deep = self._slots[base]
+        if (
+            deep is None
+            or deep.key == key
+            or deep.generation != self.generation
+            or depth >= deep.depth
+        ):
+            if deep is not None and deep.key != key:
+                # Demote the previous deep entry to the always-replace slot
+                self._evict(base + 1, key)
+                self._slots[base + 1] = deep
+            self._slots[base] = entry
+        else:
+            self._evict(base + 1, key)
+            self._slots[base + 1] = entry
+
+    def _evict(self, slot: int, key: int) -> None:
+        old = self._slots[slot]
+        if old is not None and old.key != key:
+            self.stats.replacements += 1
+
+    def usage(self) -> float:
+        """Fraction of slots in use."""
+        return sum(1 for e in self._slots if e is not None) / len(self._slots)
@@ -1,10 +1,11 @@
 import getpass
 import os
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 from auth import AuthManager
 from board import Board, BOARD_SIZE
-from entities import Player
+from entities import Player, Position
+from renderer import BoardRenderer
 
 
 class Theme:
@@ -56,6 +57,8 @@ class Theme:
     TABLE_ROW_ALT = DIM + FG_WHITE
 
 
+LEADERBOARD_PAGE_SIZE = 20
+
 PLAYER_COLORS = [
     Theme.PLAYER1,
     Theme.PLAYER2,
@@ -65,13 +68,17 @@ PLAYER_COLORS = [
 
 
 class UI:
-    def __init__(self) -> None:
-        self.auth = AuthManager()
+    def __init__(self, auth: AuthManager) -> None:
+        self.auth = auth
+        self.renderer = BoardRenderer(Theme, PLAYER_COLORS)
+        self._status: List[str] = []  # in-game messages shown under the next board frame
 
     # --------- Basic I/O / Frame control ---------
     def clear_screen(self) -> None:
         # Use ANSI clear to avoid platform-specific system calls
         print("\033[2J\033[H", end="")
+        self.renderer.invalidate()
+        self._status.clear()
 
     def render_banner(self) -> None:
         self.clear_screen()
@@ -110,14 +117,22 @@ class UI:
         print(f"\n{Theme.HEADER}{text}{Theme.RESET}")
         print(f"{Theme.BORDER}{'─' * len(text)}{Theme.RESET}")
 
-    def print_message(self, text: str, error: bool = False, highlight: bool = False) -> None:
+    @staticmethod
+    def _styled(text: str, error: bool = False, highlight: bool = False) -> str:
         if error:
             color = Theme.ERROR
         elif highlight:
             color = Theme.SUCCESS
         else:
             color = Theme.FG_CYAN
-        print(f"{color}{text}{Theme.RESET}")
+        return f"{color}{text}{Theme.RESET}"
+
+    def print_message(self, text: str, error: bool = False, highlight: bool = False) -> None:
+        print(self._styled(text, error, highlight))
+
+    def status_message(self, text: str, error: bool = False, highlight: bool = False) -> None:
+        """Show an in-game message under the next board frame (printing it now would be cleared)."""
+        self._status.append(self._styled(text, error, highlight))
 
     def prompt(self, text: str) -> str:
         return input(text)
@@ -140,47 +155,85 @@ class UI:
         print(f"{Theme.FG_WHITE}6){Theme.RESET} Exit")
         return input(f"{Theme.FG_CYAN}Choose an option: {Theme.RESET}").strip()
 
-    def choose_game_mode(self) -> int | None:
+    def choose_game_mode(self) -> tuple[int, Dict[int, str]] | None:
+        """Return (player count, seat types by player id), or None if cancelled."""
         self.print_title("Choose Game Mode")
         print("1) 2 Players")
         print("2) 4 Players")
-        choice = input("Select (1-2, blank to cancel): ").strip()
+        print("3) Human vs Bot")
+        print("4) Bot vs Bot")
+        print("5) Human vs MCTS Bot")
+        print("6) Human vs 3 MCTS Bots (4 players)")
+        choice = input("Select (1-6, blank to cancel): ").strip()
         if not choice:
             return None
         if choice == "1":
-            return 2
+            return 2, {1: "human", 2: "human"}
         if choice == "2":
-            return 4
+            return 4, {1: "human", 2: "human", 3: "human", 4: "human"}
+        if choice == "3":
+            return 2, {1: "human", 2: "bot"}
+        if choice == "4":
+            return 2, {1: "bot", 2: "bot"}
+        if choice == "5":
+            return 2, {1: "human", 2: "mcts"}
+        if choice == "6":
+            return 4, {1: "human", 2: "mcts", 3: "mcts", 4: "mcts"}
         self.print_message("Invalid mode.", error=True)
         return None
 
+    def choose_board_size(self, sizes: Tuple[int, ...]) -> int:
+        """Ask for the board side; blank picks the first (standard) size."""
+        options = "/".join(str(n) for n in sizes)
+        raw = input(f"Board size ({options}, blank for {sizes[0]}): ").strip()
+        if raw.isdigit() and int(raw) in sizes:
+            return int(raw)
+        if raw:
+            self.print_message(f"Unknown size, playing {sizes[0]}x{sizes[0]}.", error=True)
+        return sizes[0]
+
     def show_how_to_play(self) -> None:
         self.clear_screen()
         self.print_title("How to Play Quoridor (Terminal Edition)")
         print(
             f"{Theme.FG_WHITE}Goal:{Theme.RESET} Reach the opposite side of the board before your opponents.\n"
-            "- On your turn, choose to move (m), place a wall (w), undo (u), or quit (q).\n"
-            "- Moves: one square up/down/left/right, or jump over an adjacent pawn.\n"
+            "- On your turn, choose to move (m), place a wall (w), undo (u), redo (r), or quit (q).\n"
+            "- Moves: one square up/down/left/right, or jump over an adjacent pawn\n"
+            "  (diagonally beside it if a wall or the edge is behind it).\n"
             "- Walls: block paths but must not completely prevent any player from reaching their goal.\n"
-            "- You have 10 walls in 2-player mode, 5 in 4-player mode."
+            "- You have 10 walls in 2-player mode, 5 in 4-player mode (more on larger boards)."
         )
 
-    def show_leaderboard(self) -> None:
-        self.clear_screen()
-        self.print_title("Leaderboard")
-        data = self.auth.get_leaderboard()
-        if not data:
-            print(f"{Theme.DIM}No games played yet.{Theme.RESET}")
-            return
-        rows = sorted(data.items(), key=lambda kv: (-kv[1]["wins"], kv[0]))
-        header = f"{'User':15} {'Wins':>6} {'Games':>7}"
-        print(f"{Theme.TABLE_HEADER}{header}{Theme.RESET}")
-        print(f"{Theme.BORDER}{'═' * len(header)}{Theme.RESET}")
-        for idx, (user, stats) in enumerate(rows):
-            color = Theme.TABLE_ROW_ALT if idx % 2 else Theme.FG_WHITE
-            print(
-                f"{color}{user:15} {stats['wins']:>6} {stats['games']:>7}{Theme.RESET}"
-            )
+    def show_leaderboard(self, page_size: int = LEADERBOARD_PAGE_SIZE) -> None:
+        """Show the leaderboard one page at a time; only the visible page is fetched."""
+        total = self.auth.player_count()
+        pages = max(1, -(-total // page_size))
+        page = 0
+        while True:
+            self.clear_screen()
+            self.print_title("Leaderboard")
+            if not total:
+                print(f"{Theme.DIM}No games played yet.{Theme.RESET}")
+            else:
+                rows = self.auth.top_players(page_size, page * page_size)
+                header = f"{'#':>5} {'User':15} {'Wins':>6} {'Games':>7}"
+                print(f"{Theme.TABLE_HEADER}{header}{Theme.RESET}")
+                print(f"{Theme.BORDER}{'═' * len(header)}{Theme.RESET}")
+                for idx, row in enumerate(rows):
+                    color = Theme.TABLE_ROW_ALT if idx % 2 else Theme.FG_WHITE
+                    rank = page * page_size + idx + 1
+                    print(f"{color}{rank:>5} {row.username:15} {row.wins:>6} {row.games:>7}{Theme.RESET}")
+            if pages == 1:
+                input(f"{Theme.FG_CYAN}Press Enter to return to menu...{Theme.RESET}")
+                return
+            print(f"{Theme.DIM}Page {page + 1}/{pages} ({total} players){Theme.RESET}")
+            choice = input(f"{Theme.FG_CYAN}[n]ext, [p]revious, Enter to return: {Theme.RESET}").strip().lower()
+            if choice == "n":
+                page = min(page + 1, pages - 1)
+            elif choice == "p":
+                page = max(page - 1, 0)
+            else:
+                return
 
     # --------- In-game prompts ---------
     def prompt_turn_action(self, player: Player) -> str:
@@ -189,22 +242,24 @@ class UI:
             f"{color}Player {player.id} ({player.name}) turn. "
             f"Position: {player.position}, Walls: {player.walls_remaining}{Theme.RESET}"
         )
-        print("Actions: [m]ove, [w]all, [u]ndo, [q]uit")
+        print("Actions: [m]ove, [w]all, [h]int, [u]ndo, [r]edo, [q]uit")
         return input("Choose action: ").strip().lower()
 
-    def prompt_move(self) -> tuple[int, int]:
+    def prompt_move(self, choices: Optional[List[Position]] = None) -> tuple[int, int]:
+        if choices:
+            print("Legal moves: " + ", ".join(f"{r} {c}" for r, c in sorted(choices)))
         raw = input("Enter move target as 'row col' (0-based): ").strip()
         try:
             r_s, c_s = raw.split()
             r, c = int(r_s), int(c_s)
             return r, c
         except Exception:
-            print("Invalid input, defaulting to (0, 0).")
+            self.status_message("Invalid input, defaulting to (0, 0).", error=True)
             return 0, 0
 
-    def prompt_wall(self) -> tuple[int, int, str]:
+    def prompt_wall(self, size: int = BOARD_SIZE) -> tuple[int, int, str]:
         raw = input(
-            "Enter wall as 'row col orientation', row/col 0-7, orientation h/v (e.g., '3 4 h'): "
+            f"Enter wall as 'row col orientation', row/col 0-{size - 2}, orientation h/v (e.g., '3 4 h'): "
         ).strip()
         try:
             r_s, c_s, o_s = raw.split()
@@ -214,74 +269,10 @@ class UI:
                 raise ValueError
             return r, c, o
         except Exception:
-            print("Invalid input, defaulting to (0, 0, h).")
+            self.status_message("Invalid input, defaulting to (0, 0, h).", error=True)
             return 0, 0, "h"
 
     # --------- Board Rendering ---------
     def render_board(self, board: Board, players: Dict[int, Player], current: Player) -> None:
-        self.clear_screen()
-        self.print_title("Board")
-        # Prepare quick lookup
-        pawn_cells: Dict[tuple[int, int], Player] = {
-            p.position: p for p in players.values()
-        }
-
-        def cell_blocked(a: tuple[int, int], b: tuple[int, int]) -> bool:
-            return board.is_blocked(a, b)
-
-        # Column indices header
-        print("    " + "  ".join(f"{c}" for c in range(BOARD_SIZE)))
-
-        # Top border
-        top_border = "   " + Theme.BORDER + "╔" + "╦".join(
-            ["══"] * BOARD_SIZE
-        ) + "╗" + Theme.RESET
-        print(top_border)
-
-        for r in range(BOARD_SIZE):
-            # Row of cells
-            row_str = f"{r:2} {Theme.BORDER}║{Theme.RESET}"
-            for c in range(BOARD_SIZE):
-                pos = (r, c)
-                if pos in pawn_cells:
-                    p = pawn_cells[pos]
-                    color = PLAYER_COLORS[(p.id - 1) % len(PLAYER_COLORS)]
-                    char = "P"
-                    if p.id == current.id:
-                        char = "@"
-                    cell_repr = f"{color}{char}{Theme.RESET}"
-                else:
-                    cell_repr = " "
-
-                # Right boundary of cell
-                if c < BOARD_SIZE - 1:
-                    # If there's a wall between (r, c) and (r, c+1), draw a colored double bar
-                    if cell_blocked((r, c), (r, c + 1)):
-                        sep = f"{Theme.WALL}║{Theme.RESET}"
-                    else:
-                        sep = f"{Theme.BORDER}║{Theme.RESET}"
-                    row_str += f"{cell_repr}{sep}"
-                else:
-                    row_str += f"{cell_repr}{Theme.BORDER}║{Theme.RESET}"
-
-            print(row_str)
-
-            # Horizontal edges between rows
-            if r < BOARD_SIZE - 1:
-                edge_row = "   " + Theme.BORDER + "╠"
-                segments = []
-                for c in range(BOARD_SIZE):
-                    if cell_blocked((r, c), (r + 1, c)):
-                        seg = f"{Theme.WALL}══{Theme.BORDER}"
-                    else:
-                        seg = "══"
-                    segments.append(seg)
-                edge_row += "╬".join(segments) + "╣" + Theme.RESET
-                print(edge_row)
-
-        # Bottom border
-        bottom_border = "   " + Theme.BORDER + "╚" + "╩".join(
-            ["══"] * BOARD_SIZE
-        ) + "╝" + Theme.RESET
-        print(bottom_border)
-
+        status, self._status = self._status, []
+        self.renderer.render(board, players, current, status)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+from entities import Action
+from game import GameController, decode_delta
+
+
+class GameNode:
+    """Immutable game state stored as its parent plus the one ply leading to it.
+
+    A node never changes once created, so every line through it shares the
+    same prefix; the only per-node cost is the packed delta and parent link.
+    """
+
+    __slots__ = ("parent", "delta", "depth", "_children")
+
+    def __init__(self, parent: Optional["GameNode"], delta: int) -> None:
+        self.parent = parent
+        self.delta = delta
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self._children: Optional[Dict[int, "GameNode"]] = None
+
+    @property
+    def children(self) -> List["GameNode"]:
+        return list(self._children.values()) if self._children else []
+
+    def child(self, delta: int) -> "GameNode":
+        """Return the child reached by ``delta``, creating it on first use."""
+        if self._children is None:
+            self._children = {}
+        node = self._children.get(delta)
+        if node is None:
+            node = self._children[delta] = GameNode(self, delta)
+        return node
+
+    def path(self) -> List["GameNode"]:
+        """Nodes from the root's first child down to this node."""
+        nodes: List[GameNode] = []
+        node: Optional[GameNode] = self
+        while node is not None and node.parent is not None:
+            nodes.append(node)
+            node = node.parent
+        nodes.reverse()
+        return nodes
+
+    def ancestors(self) -> Iterator["GameNode"]:
+        node = self.parent
+        while node is not None:
+            yield node
+            node = node.parent
+
+
+def common_ancestor(a: GameNode, b: GameNode) -> GameNode:
+    while a.depth > b.depth:
+        a = a.parent
+    while b.depth > a.depth:
+        b = b.parent
+    while a is not b:
+        a, b = a.parent, b.parent
+    return a
+
+
+@dataclass
+class BranchComparison:
+    fork_depth: int  # ply where the two lines diverge
+    plies_a: int  # plies after the fork in line a
+    plies_b: int
+    distances_a: Dict[int, int]  # shortest path to goal per player at the end of line a
+    distances_b: Dict[int, int]
+    walls_a: Dict[int, int]  # walls in hand per player
+    walls_b: Dict[int, int]
+
+
+class VariationTree:
+    """Tree of alternative lines rooted at a controller's current position.
+
+    The controller always holds the position of ``current``; switching to
+    another node unmakes plies up to the common ancestor and remakes the
+    plies down to the target, so the cost is the depth difference rather than
+    a full rebuild.
+    """
+
+    def __init__(self, controller: GameController) -> None:
+        self.controller = controller
+        self.root = GameNode(None, 0)
+        self.current = self.root
+
+    def play(self, action: Action) -> Optional[GameNode]:
+        """Play ``action`` from the current node, reusing an existing branch if it was seen."""
+        if not self.controller.play(action):
+            return None
+        self.current = self.current.child(self.controller.moves[-1])
+        return self.current
+
+    def goto(self, node: GameNode) -> None:
+        fork = common_ancestor(self.current, node)
+        controller = self.controller
+        while self.current is not fork:
+            controller.undo()
+            self.current = self.current.parent
+        descent: List[GameNode] = []
+        step = node
+        while step is not fork:
+            descent.append(step)
+            step = step.parent
+        for step in reversed(descent):
+            controller.replay(step.delta)
+        self.current = node
+
+    def back(self) -> bool:
+        if self.current.parent is None:
+            return False
+        self.goto(self.current.parent)
+        return True
+
+    def action_of(self, node: GameNode) -> Action:
+        """The action that led to ``node``."""
+        _, kind, a, b = decode_delta(node.delta)
+        if kind == "m":
+            return Action.move(self.controller.board.cell_position(b))
+        row, col = divmod(a, self.controller.board.size - 1)
+        return Action("w", row, col, bool(b))
+
+    def line(self, node: Optional[GameNode] = None) -> List[Action]:
+        """Actions from the root to ``node`` (default: the current node)."""
+        return [self.action_of(n) for n in (node or self.current).path()]
+
+    def leaves(self) -> Iterator[GameNode]:
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node._children:
+                stack.extend(node._children.values())
+            else:
+                yield node
+
+    def compare(self, a: GameNode, b: GameNode) -> BranchComparison:
+        """Compare the positions at the end of two lines, then return to the current node."""
+        home = self.current
+        fork = common_ancestor(a, b)
+        summaries = []
+        try:
+            for node in (a, b):
+                self.goto(node)
+                board = self.controller.board
+                summaries.append((
+                    {pid: board.distance_to_goal(pid) for pid in board.players},
+                    {pid: p.walls_remaining for pid, p in board.players.items()},
+                ))
+        finally:
+            self.goto(home)
+        (dist_a, walls_a), (dist_b, walls_b) = summaries
+        return BranchComparison(
+            fork.depth, a.depth - fork.depth, b.depth - fork.depth, dist_a, dist_b, walls_a, walls_b
+        )
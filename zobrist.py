@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import random
+from typing import Dict, List
+
+
+MAX_PLAYERS = 4
+MAX_WALL_COUNT = 64  # walls-in-hand values with their own key
+ZOBRIST_SEED = 0x5A0B_2157
+
+
+class ZobristKeys:
+    """Random 64-bit keys for every hashable feature of a position.
+
+    Keys are drawn from a fixed seed so hashes are stable across runs and
+    processes (opening books and self-play workers can share them).
+    """
+
+    _cache: Dict[int, "ZobristKeys"] = {}
+
+    def __init__(self, size: int, seed: int = ZOBRIST_SEED) -> None:
+        rng = random.Random(seed ^ size)
+        cells = size * size
+        grooves = (size - 1) * (size - 1)
+
+        def draw(count: int) -> List[int]:
+            return [rng.getrandbits(64) for _ in range(count)]
+
+        # Indexed by player id (1-based); slot 0 is unused
+        self.pawn: List[List[int]] = [draw(cells) for _ in range(MAX_PLAYERS + 1)]
+        self.h_groove: List[int] = draw(grooves)
+        self.v_groove: List[int] = draw(grooves)
+        self.walls_left: List[List[int]] = [draw(MAX_WALL_COUNT) for _ in range(MAX_PLAYERS + 1)]
+        self.side: List[int] = draw(MAX_PLAYERS + 1)
+
+    @classmethod
+    def for_size(cls, size: int) -> "ZobristKeys":
+        keys = cls._cache.get(size)
+        if keys is None:
+            keys = cls._cache[size] = cls(size)
+        return keys